@@ -0,0 +1,127 @@
+"""
+Чтение лог-файлов для эндпоинтов /logs.
+
+Последние строки читаются с конца файла блоками, файл целиком не
+загружается. Чтение файла выполняется в потоке, поэтому запрос логов
+не задерживает цикл событий и клиентов Socket.IO того же процесса.
+Режим слежения отдает новые строки по мере записи (Server-Sent
+Events) и переоткрывает файл после ротации.
+"""
+import os
+import asyncio
+
+LOG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs'
+)
+# Лог-файлы, доступные через /logs/{parser}
+LOG_FILES = {
+    'akty': 'akty_debug.log',
+    'fb': 'fb_debug.log',
+    'host': 'browser_host_debug.log',
+    'socketio': 'socketio_debug.log',
+    'celery': 'celery.log',
+}
+# Максимальное количество строк в одном ответе
+LOG_TAIL_MAX_LINES = int(os.getenv('LOG_TAIL_MAX_LINES', 1000))
+# Интервал проверки файла в режиме слежения, секунды
+LOG_FOLLOW_INTERVAL = float(os.getenv('LOG_FOLLOW_INTERVAL', 0.5))
+# Интервал комментария-пинга SSE, если новых строк нет, секунды
+LOG_FOLLOW_KEEPALIVE = 15
+# Размер блока при чтении с конца файла, байты
+TAIL_BLOCK_SIZE = 8192
+
+
+def log_path(parser: str) -> str | None:
+    """
+    Путь к лог-файлу парсера или None, если такого лога нет.
+
+    :param parser: Имя из LOG_FILES.
+    """
+    log_file = LOG_FILES.get(parser)
+    return os.path.join(LOG_DIR, log_file) if log_file else None
+
+
+def tail_lines(
+        path: str,
+        count: int
+) -> tuple:
+    """
+    Последние строки файла.
+
+    :param path: Путь к файлу.
+    :param count: Количество строк.
+    :return: Кортеж (строки с переводом строки, позиция конца файла).
+    :raises FileNotFoundError: Файла нет.
+    """
+    with open(path, 'rb') as file:
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        data = b''
+        # Переводов строк нужно на один больше: последняя строка
+        # заканчивается переводом строки
+        while position > 0 and data.count(b'\n') <= count:
+            size = min(TAIL_BLOCK_SIZE, position)
+            position -= size
+            file.seek(position)
+            data = file.read(size) + data
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    return lines[-count:], end
+
+
+def read_from(
+        path: str,
+        offset: int,
+        inode: int | None
+) -> tuple:
+    """
+    Новые данные файла начиная с позиции. После ротации (другой inode
+    или файл короче позиции) чтение начинается с начала нового файла.
+
+    :param path: Путь к файлу.
+    :param offset: Позиция, до которой файл уже прочитан.
+    :param inode: Inode прочитанного файла или None.
+    :return: Кортеж (байты, новая позиция, inode).
+    """
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        if inode is not None and (stat.st_ino != inode or
+                                  stat.st_size < offset):
+            offset = 0
+        file.seek(offset)
+        data = file.read()
+    return data, offset + len(data), stat.st_ino
+
+
+async def follow_lines(
+        path: str,
+        offset: int,
+        interval: float = LOG_FOLLOW_INTERVAL
+):
+    """
+    Новые строки файла по мере записи.
+
+    :param path: Путь к файлу.
+    :param offset: Позиция, с которой начинать (конец уже отданных строк).
+    :param interval: Интервал проверки файла, секунды.
+    :return: Асинхронный генератор списков строк; пустой список -
+    новых строк нет.
+    """
+    inode = (await asyncio.to_thread(os.stat, path)).st_ino
+    rest = b''
+    while True:
+        try:
+            data, offset, inode = await asyncio.to_thread(
+                read_from, path, offset, inode
+            )
+        except FileNotFoundError:
+            # Между переименованием при ротации и созданием нового файла
+            data = b''
+        lines = []
+        if data:
+            data = rest + data
+            # Незаконченная строка дочитывается в следующий раз
+            complete, separator, rest = data.rpartition(b'\n')
+            if separator:
+                lines = complete.decode('utf-8', errors='replace').split('\n')
+        yield lines
+        await asyncio.sleep(interval)
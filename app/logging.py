@@ -1,6 +1,129 @@
 import os
+import json
+import time
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# 'json' - одна JSON-строка на запись, 'text' - прежний текстовый формат
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+# Одинаковые сообщения пишутся не чаще одного раза за интервал, секунды
+# (0 отключает ограничение)
+LOG_RATE_INTERVAL = float(os.getenv('LOG_RATE_INTERVAL', 60))
+
+# Фоновые слушатели очередей по пути лог-файла: один поток записи
+# на файл, сколько бы раз ни вызывался setup_logger
+_listeners = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Запись лога одной JSON-строкой.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Прежний текстовый формат с числом пропущенных повторов.
+    """
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            line += f' (повторов пропущено: {suppressed})'
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничение частоты одинаковых сообщений (например, "Данные не
+    изменились." на каждом тике). Повтор в течение интервала
+    отбрасывается, следующая запись получает поле suppressed
+    с количеством пропущенных повторов.
+    """
+    # Количество запоминаемых сообщений, после которого устаревшие
+    # записи удаляются
+    MAX_KEYS = 1000
+
+    def __init__(self, interval: float = LOG_RATE_INTERVAL):
+        """
+        :param interval: Интервал в секундах.
+        """
+        super().__init__()
+        self.interval = interval
+        self.seen = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.interval <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.levelno, record.getMessage())
+        last, suppressed = self.seen.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self.seen[key] = (last, suppressed + 1)
+            return False
+        if len(self.seen) >= self.MAX_KEYS:
+            self.seen = {
+                seen_key: value for seen_key, value in self.seen.items()
+                if now - value[0] < self.interval
+            }
+        self.seen[key] = (now, 0)
+        record.suppressed = suppressed
+        return True
+
+
+def _get_listener(
+        path: str,
+        max_bytes: int,
+        backup_count: int
+) -> QueueListener:
+    """
+    Слушатель очереди, пишущий в файл из фонового потока.
+    Создается один раз на файл.
+    """
+    listener = _listeners.get(path)
+    if listener is None:
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+        handler.setFormatter(
+            JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter()
+        )
+        listener = QueueListener(queue.SimpleQueue(), handler)
+        listener.start()
+        _listeners[path] = listener
+    return listener
+
+
+@atexit.register
+def stop_listeners() -> None:
+    """
+    Запись оставшихся в очередях сообщений при завершении процесса.
+    """
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
 
 def setup_logger(
         name: str,
@@ -12,6 +135,10 @@ def setup_logger(
     """
     Настраивает логгер с заданным именем и уровнем логирования.
 
+    Запись в файл и ротация выполняются фоновым потоком: логгер только
+    кладет запись в очередь и не блокирует цикл событий. Повторный
+    вызов для того же логгера не добавляет обработчиков.
+
     :param name: Имя логгера.
     :param log_file: Путь к лог-файлу.
     :param level: Уровень логирования.
@@ -26,16 +153,17 @@ def setup_logger(
     # Создание директории логов, если она не существует
     os.makedirs(log_dir, exist_ok=True)
 
-    handler = RotatingFileHandler(
-        os.path.join(log_dir, log_file),
-        maxBytes=max_bytes,
-        backupCount=backup_count
-    )
-    handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
+    path = os.path.join(log_dir, log_file)
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    for handler in logger.handlers:
+        if getattr(handler, 'log_path', None) == path:
+            return logger
+
+    listener = _get_listener(path, max_bytes, backup_count)
+    handler = QueueHandler(listener.queue)
+    handler.log_path = path
+    handler.addFilter(RateLimitFilter())
     logger.addHandler(handler)
 
-    return logger
\ No newline at end of file
+    return logger
@@ -1,11 +1,20 @@
-import json
+import os
 from fastapi import FastAPI
 from app.router import route
-from transfer_data.socketio_server import app as socket_app, origins
+from transfer_data.socketio_server import (
+    app as socket_app,
+    origins,
+    start_bus,
+    stop_bus
+)
+from transfer_data.transport import SOCKET_WS_DEFLATE, WEB_WORKERS
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
 
+APP_HOST = os.getenv('APP_HOST', '0.0.0.0')
+APP_PORT = int(os.getenv('APP_PORT', 8123))
+
 middleware = [
     Middleware(
         CORSMiddleware,
@@ -15,11 +24,29 @@ middleware = [
         allow_headers=['*']
     )
 ]
-app = FastAPI(middleware=middleware)
+# Жизненный цикл смонтированного приложения Socket.IO не запускается,
+# поэтому чтение шины обновлений стартует вместе с FastAPI
+app = FastAPI(
+    middleware=middleware,
+    on_startup=[start_bus],
+    on_shutdown=[stop_bus]
+)
 app.include_router(route)
 
 # Монтируем приложение SocketIO в FastAPI
 app.mount("/socket.io", socket_app)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8123, reload=True)
+    if WEB_WORKERS > 1:
+        # Несколько процессов: сессии, комнаты и рассылки согласуются
+        # через Redis (SOCKET_MANAGER=redis, шина обновлений), reload
+        # с воркерами не работает
+        uvicorn.run(
+            "app.main:app", host=APP_HOST, port=APP_PORT,
+            workers=WEB_WORKERS, ws_per_message_deflate=SOCKET_WS_DEFLATE
+        )
+    else:
+        uvicorn.run(
+            "app.main:app", host=APP_HOST, port=APP_PORT, reload=True,
+            ws_per_message_deflate=SOCKET_WS_DEFLATE
+        )
@@ -1,6 +1,19 @@
+import os
 import asyncio
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from services_app.tasks import parse_some_data
+from transfer_data.socketio_server import readiness, odds_cache, redis_client
+from transfer_data.odds_cache import etag_matches
+from transfer_data.history import HISTORY_MAX_ENTRIES, read_history
+from app.log_tail import (
+    LOG_FOLLOW_INTERVAL,
+    LOG_FOLLOW_KEEPALIVE,
+    LOG_TAIL_MAX_LINES,
+    follow_lines,
+    log_path,
+    tail_lines
+)
 from app.schema import ParserRequest
 
 route = APIRouter()
@@ -33,41 +46,130 @@ async def run_parser(request: ParserRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@route.get("/logs/akty")
-async def get_akty_logs():
+@route.get("/health")
+async def health():
     """
-    Эндпоинт для получения последних 50 строк из файла логов akty_debug.log.
+    Эндпоинт проверки живости воркера (процесс отвечает на запросы).
 
-    :return: Содержимое последних 50 строк лог-файла
+    :return: Статус и идентификатор процесса воркера
     """
-    log_file_path = 'logs/akty_debug.log'
+    return {"status": "ok", "worker": os.getpid()}
+
+
+@route.get("/ready")
+async def ready():
+    """
+    Эндпоинт проверки готовности воркера: Redis доступен, шина
+    обновлений парсеров читается.
+
+    :return: Состояние воркера; 503, если воркер не готов
+    """
+    status = await readiness()
+    if not status['ready']:
+        raise HTTPException(status_code=503, detail=status)
+    return status
+
+
+@route.get("/odds")
+async def get_odds(
+        request: Request,
+        bookmaker: list[str] | None = Query(None),
+        league: list[str] | None = Query(None)
+):
+    """
+    Эндпоинт текущих данных букмекеров из памяти сервера (без Redis).
+    Поддерживает If-None-Match (304, пока данные не изменились) и gzip.
+
+    :param request: Запрос (заголовки If-None-Match и Accept-Encoding)
+    :param bookmaker: Букмекеры (параметр можно повторять), по умолчанию все
+    :param league: Лиги (параметр можно повторять), по умолчанию все
+    :return: `{bookmaker: {league: [game, ...]}}`
+    """
+    etag = odds_cache.etag(bookmaker, league)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    body, encoding = odds_cache.render(
+        bookmaker, league,
+        use_gzip='gzip' in request.headers.get('accept-encoding', '')
+    )
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+
+@route.get("/history/{match}")
+async def get_history(
+        match: str,
+        start: float | None = Query(None, alias='from'),
+        end: float | None = Query(None, alias='to'),
+        limit: int = Query(HISTORY_MAX_ENTRIES, ge=1, le=HISTORY_MAX_ENTRIES)
+):
+    """
+    Эндпоинт истории изменений игры (движение линий) за интервал.
+
+    :param match: Идентификатор игры (поле 'id')
+    :param start: Начало интервала, unix-время в секундах (параметр from)
+    :param end: Конец интервала, unix-время в секундах (параметр to)
+    :param limit: Максимальное количество записей
+    :return: Изменения игры по времени: первая запись - игра целиком,
+    дальше измененные поля
+    """
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="Redis is not configured")
     try:
-        with open(log_file_path, 'r') as log_file:
-            lines = log_file.readlines()
-            # Получаем последние 50 строк
-            last_lines = lines[-50:]
-            return {"logs": last_lines}
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Log file not found")
+        entries = await read_history(redis_client, match, start, end, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"match": match, "history": entries}
 
 
-@route.get("/logs/fb")
-async def get_akty_logs():
+@route.get("/logs/{parser}")
+async def get_logs(
+        parser: str,
+        request: Request,
+        lines: int = Query(50, ge=1, le=LOG_TAIL_MAX_LINES),
+        follow: bool = False
+):
     """
-    Эндпоинт для получения последних 50 строк из файла логов akty_debug.log.
+    Эндпоинт для получения последних строк лога парсера (akty, fb,
+    socketio, celery). Файл читается с конца в отдельном потоке.
 
-    :return: Содержимое последних 50 строк лог-файла
+    :param parser: Имя лога
+    :param request: Запрос (для отслеживания отключения в режиме follow)
+    :param lines: Количество последних строк
+    :param follow: Отдавать новые строки по мере записи (text/event-stream)
+    :return: Последние строки лог-файла или поток событий с новыми строками
     """
-    log_file_path = 'logs/fb_debug.log'
+    path = log_path(parser)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Log not found")
     try:
-        with open(log_file_path, 'r') as log_file:
-            lines = log_file.readlines()
-            # Получаем последние 50 строк
-            last_lines = lines[-50:]
-            return {"logs": last_lines}
+        last_lines, offset = await asyncio.to_thread(tail_lines, path, lines)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Log file not found")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    if not follow:
+        return {"logs": last_lines}
+
+    async def events():
+        for line in last_lines:
+            yield f"data: {line.rstrip()}\n\n"
+        idle = 0
+        async for new_lines in follow_lines(path, offset):
+            if await request.is_disconnected():
+                break
+            for line in new_lines:
+                yield f"data: {line.rstrip()}\n\n"
+            idle = 0 if new_lines else idle + LOG_FOLLOW_INTERVAL
+            if idle >= LOG_FOLLOW_KEEPALIVE:
+                # Комментарий SSE: соединение не закрывается прокси
+                idle = 0
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
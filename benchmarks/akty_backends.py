@@ -0,0 +1,110 @@
+"""
+Сравнение бэкендов разбора контейнера с играми akty.com.
+
+Запуск на сохраненном outerHTML блока `v-scroll-content`:
+
+    python -m benchmarks.akty_backends saved_container.html
+
+Без аргументов используется синтетический контейнер той же структуры.
+Перед замером проверяется, что бэкенды возвращают одинаковые данные.
+"""
+import sys
+import timeit
+from dataclasses import asdict
+from fetch_data.backends import BACKENDS, get_backend
+
+LEAGUE_CARD = (
+    '<div class="list-card-wrap 1 v-scroll-item 1 relative-position"'
+    ' style="height: 37px;">'
+    '<span class="ellipsis allow-user-select">{league}</span></div>'
+)
+MATCH = (
+    '<div id="list-mid-undefined">'
+    '<span class="timer-layout2">Q{quarter} 0{minute}:1{minute}</span>'
+    '<div class="row-item team-item"><div class="name allow-user-select">'
+    '队伍{home}</div><div class="score"><span>{home_score}</span></div></div>'
+    '<div class="row-item team-item soon"><div class="name allow-user-select">'
+    '队伍{away}</div><div class="score"><span>{away_score}</span></div></div>'
+    '</div>'
+)
+BETS = (
+    '<div class="handicap-col"></div>'
+    '<div class="handicap-col"><span class="highlight-odds">-{line}.5</span>'
+    '<span class="highlight-odds">+{line}.5</span></div>'
+    '<div class="handicap-col"><span class="highlight-odds">O 1{line}0.5</span>'
+    '<span class="highlight-odds">U 1{line}0.5</span></div>'
+)
+
+
+def make_sample(leagues: int = 8, matches: int = 12) -> str:
+    """
+    Генерация синтетического контейнера, повторяющего разметку akty.com.
+
+    :param leagues: Количество лиг.
+    :param matches: Количество игр в лиге.
+    :return: outerHTML контейнера.
+    """
+    names = ['IPBL篮球专业组', 'IPBL女子篮球专业组', '火箭篮球联盟', '火箭女子篮球联盟']
+    cards = []
+    for league in range(leagues):
+        cards.append(LEAGUE_CARD.format(
+            league=names[league % len(names)] if league < len(names)
+            else f'联赛{league}'
+        ))
+        for match in range(matches):
+            cards.append(
+                '<div class="list-card-wrap 1 v-scroll-item 1 relative-position">'
+                + MATCH.format(quarter=match % 4 + 1, minute=match % 10,
+                               home=2 * match, away=2 * match + 1,
+                               home_score=40 + match, away_score=38 + match)
+                + BETS.format(line=match % 10)
+                + '</div>'
+            )
+    return (
+        '<div class="v-scroll-content relative-position">'
+        + ''.join(cards) + '</div>'
+    )
+
+
+def walk(backend, html: str) -> list:
+    """
+    Полный проход по контейнеру, как в `FetchAkty.extract_league_data`.
+
+    :return: Список (лига, свернута, игры) для каждой карточки.
+    """
+    result = []
+    for card in backend.find_cards(backend.parse(html)):
+        league = backend.card_league(card)
+        if league is not None:
+            result.append((league, backend.card_collapsed(card), []))
+        else:
+            result.append((None, False, [
+                asdict(match) for match in backend.card_matches(card)
+            ]))
+    return result
+
+
+def main(paths: list) -> None:
+    samples = {path: open(path, encoding='utf-8').read() for path in paths}
+    if not samples:
+        samples = {'synthetic': make_sample()}
+
+    # JS-бэкенд работает только в браузере
+    backends = [get_backend(name) for name, backend in BACKENDS.items()
+                if backend.script is None]
+    for label, html in samples.items():
+        reference = walk(backends[0], html)
+        for backend in backends[1:]:
+            if walk(backend, html) != reference:
+                raise SystemExit(
+                    f"{label}: бэкенд {backend.name} вернул другие данные"
+                )
+        print(f"{label}: {len(html)} байт, {len(reference)} карточек")
+        for backend in backends:
+            number = 20
+            seconds = timeit.timeit(lambda: walk(backend, html), number=number)
+            print(f"  {backend.name:>5}: {seconds / number * 1000:.2f} мс")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+"""
+Сравнение форматов сериализации данных игр.
+
+    python -m benchmarks.records [лиг] [игр в лиге]
+
+Для каждого формата печатается размер сообщения, время кодирования
+и декодирования. 'dicts' - словари схемы transfer_data.records (как
+уходят в Socket.IO и Redis), 'rows' - компактные плоские списки полей
+(to_row).
+Кодеки, пакеты которых не установлены, пропускаются.
+"""
+import sys
+import json
+import timeit
+from transfer_data.codec import orjson, msgpack
+from transfer_data.records import OPPONENT_FIELDS, game_record, opponent
+
+
+def make_records(leagues: int = 8, matches: int = 12) -> dict:
+    """
+    Синтетические данные одного букмекера.
+
+    :return: `{league: [game, ...]}`.
+    """
+    data = {}
+    for league in range(leagues):
+        data[f'Лига {league}'] = [
+            game_record(
+                id=f'{league:08x}{match:08x}',
+                opponent_0=opponent(f'Команда {2 * match}', str(40 + match),
+                                    f'-{match % 10}.5', f'O 1{match % 10}0.5'),
+                opponent_1=opponent(f'Команда {2 * match + 1}',
+                                    str(38 + match), f'+{match % 10}.5',
+                                    f'U 1{match % 10}0.5'),
+                process_time=f'Q{match % 4 + 1} 0{match % 10}:1{match % 10}',
+                server_time='2024-07-01 12:00:00'
+            )
+            for match in range(matches)
+        ]
+    return data
+
+
+def to_row(game: dict) -> list:
+    """
+    Плоский список полей игры: компактная форма для сравнения.
+    """
+    return [
+        game['id'],
+        *(game[side][field]
+          for side in ('opponent_0', 'opponent_1')
+          for field in OPPONENT_FIELDS),
+        game['process_time'], game['server_time'],
+    ]
+
+
+def formats() -> dict:
+    """
+    Доступные форматы: {название: (кодирование, декодирование)}.
+    """
+    result = {
+        'json': (lambda data: json.dumps(data, ensure_ascii=False),
+                 json.loads),
+    }
+    if orjson is not None:
+        result['orjson'] = (orjson.dumps, orjson.loads)
+    if msgpack is not None:
+        result['msgpack'] = (
+            lambda data: msgpack.packb(data, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False)
+        )
+    return result
+
+
+def size(encoded) -> int:
+    return len(encoded.encode('utf-8') if isinstance(encoded, str)
+               else encoded)
+
+
+def main(leagues: int = 8, matches: int = 12) -> None:
+    records = make_records(leagues, matches)
+    shapes = {
+        'dicts': {'akty.com': {
+            league: games
+            for league, games in records.items()
+        }},
+        'rows': {'akty.com': {
+            league: [to_row(game) for game in games]
+            for league, games in records.items()
+        }},
+    }
+    print(f"{leagues} лиг x {matches} игр")
+    number = 200
+    for shape, data in shapes.items():
+        for name, (dumps, loads) in formats().items():
+            encoded = dumps(data)
+            encode_time = timeit.timeit(lambda: dumps(data), number=number)
+            decode_time = timeit.timeit(lambda: loads(encoded), number=number)
+            print(f"  {shape:>5} {name:>7}: {size(encoded):>7} байт, "
+                  f"кодирование {encode_time / number * 1e6:8.1f} мкс, "
+                  f"декодирование {decode_time / number * 1e6:8.1f} мкс")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
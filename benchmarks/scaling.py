@@ -0,0 +1,282 @@
+"""
+Нагрузочный тест рассылки обновлений при разном числе воркеров.
+
+    python -m benchmarks.scaling [воркеры] [клиентов] [обновлений] [процессов клиентов] [интервал, мс]
+    python -m benchmarks.scaling 1,2,4 400 300 4 5
+
+Для каждого числа воркеров запускает приложение (app.main:app) с
+WEB_WORKERS воркерами на отдельном потоке шины, ждет ответа /ready от
+всех воркеров, подключает клиентов Socket.IO по WebSocket из
+нескольких процессов и публикует в шину снимок и дельты с одной
+измененной игрой. Печатаются сообщения, доставленные клиентам в
+секунду, время до получения всеми клиентами последнего обновления и
+задержка доставки (публикация - получение). Медленным клиентам сервер
+объединяет дельты, поэтому при нехватке воркеров падает число
+сообщений и растет задержка, а не теряются обновления.
+
+Нужен Redis (REDIS_URL, по умолчанию redis://localhost:6379/0).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import statistics
+import subprocess
+import multiprocessing
+import urllib.request
+import socketio
+import redis.asyncio as aioredis
+from transfer_data.bus import RedisBus
+from transfer_data.codec import encode, decode
+from transfer_data.delta import DeltaTracker
+from transfer_data.records import SCHEMA_VERSION
+from transfer_data.transport import client_options
+from benchmarks.records import make_records
+from benchmarks.transport import free_port
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Отдельный поток шины, чтобы не смешивать тест с данными парсеров
+BENCH_STREAM = 'bench_updates'
+BENCH_KEY = 'bench'
+BENCH_SOURCE = 'bench.com'
+# Сколько клиентов одного процесса подключается одновременно
+CONNECT_BATCH = 50
+
+
+def start_app(
+        workers: int,
+        port: int
+) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        WEB_WORKERS=str(workers),
+        REDIS_URL=REDIS_URL,
+        SOCKET_MANAGER='redis',
+        BUS_STREAM=BENCH_STREAM,
+        SOCKET_KEY=BENCH_KEY,
+        SOCKET_LEGACY_MESSAGES='0',
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app',
+         '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        env=env
+    )
+
+
+def wait_ready(
+        port: int,
+        workers: int,
+        process: subprocess.Popen,
+        timeout: float = 60
+) -> None:
+    """
+    Ожидание готовности всех воркеров. Запросы распределяются между
+    воркерами ядром, поэтому опрашиваем, пока не ответит каждый.
+    """
+    ready = set()
+    deadline = time.monotonic() + timeout
+    while len(ready) < workers:
+        if process.poll() is not None:
+            raise RuntimeError('Приложение завершилось при запуске')
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'Готовы воркеры {sorted(ready)} из {workers}')
+        try:
+            with urllib.request.urlopen(
+                    f'http://127.0.0.1:{port}/ready', timeout=2
+            ) as response:
+                ready.add(json.load(response)['worker'])
+        except OSError:
+            time.sleep(0.2)
+
+
+async def client_group(
+        url: str,
+        count: int,
+        final_seq: int,
+        connected,
+        timeout: float
+) -> dict:
+    """
+    Клиенты одного процесса.
+
+    :param final_seq: Номер последнего обновления.
+    :param connected: Очередь, в которую сообщается о подключении.
+    :return: Счетчики процесса.
+    """
+    stats = {'messages': 0, 'complete': 0, 'latency': []}
+    finished = asyncio.Event()
+
+    def make_handler(progress: dict):
+        def handler(data):
+            message = decode(data)
+            stats['messages'] += 1
+            if message['type'] == 'delta':
+                for item in message['changed']:
+                    sent = item['fields'].get('server_time')
+                    if sent:
+                        stats['latency'].append(time.time() - float(sent))
+            if message['seq'] >= final_seq and not progress['done']:
+                progress['done'] = True
+                stats['complete'] += 1
+                if stats['complete'] == count:
+                    finished.set()
+        return handler
+
+    clients = []
+    for _ in range(count):
+        client = socketio.AsyncClient(**client_options())
+        handler = make_handler({'done': False})
+        client.on('snapshot', handler)
+        client.on('delta', handler)
+        clients.append(client)
+    for start in range(0, count, CONNECT_BATCH):
+        await asyncio.gather(*(
+            client.connect(url, auth={'socket_key': BENCH_KEY},
+                           transports=['websocket'])
+            for client in clients[start:start + CONNECT_BATCH]
+        ))
+    connected.put(count)
+    try:
+        await asyncio.wait_for(finished.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    stats['finished_at'] = time.time()
+    await asyncio.gather(
+        *(client.disconnect() for client in clients),
+        return_exceptions=True
+    )
+    return stats
+
+
+def client_process(
+        url: str,
+        count: int,
+        final_seq: int,
+        connected,
+        results,
+        timeout: float
+) -> None:
+    results.put(asyncio.run(
+        client_group(url, count, final_seq, connected, timeout)
+    ))
+
+
+async def reset_stream() -> None:
+    redis_client = aioredis.from_url(REDIS_URL)
+    await redis_client.delete(BENCH_STREAM)
+    await redis_client.aclose()
+
+
+async def publish(
+        updates: int,
+        interval: float
+) -> None:
+    """
+    Публикация снимка (seq 1) и дельт (seq 2..updates + 1) в шину.
+    """
+    redis_client = aioredis.from_url(REDIS_URL)
+    bus = RedisBus(redis_client, stream=BENCH_STREAM)
+    tracker = DeltaTracker()
+    data = make_records()
+    await bus.publish(
+        'snapshot', encode(tracker.snapshot(BENCH_SOURCE, data))
+    )
+    game = next(iter(data.values()))[0]
+    for tick in range(updates):
+        await bus.publish('delta', encode({
+            'type': 'delta',
+            'v': SCHEMA_VERSION,
+            'source': BENCH_SOURCE,
+            'epoch': tracker.epoch,
+            'seq': tick + 2,
+            'added': [],
+            'removed': [],
+            'changed': [{'id': game['id'], 'fields': {
+                'process_time': f'Q1 {tick // 60:02d}:{tick % 60:02d}',
+                'server_time': f'{time.time():.6f}',
+            }}],
+        }))
+        await asyncio.sleep(interval)
+    await redis_client.aclose()
+
+
+def run(
+        workers: int,
+        clients: int,
+        updates: int,
+        processes: int,
+        interval: float
+) -> dict:
+    asyncio.run(reset_stream())
+    port = free_port()
+    app = start_app(workers, port)
+    try:
+        wait_ready(port, workers, app)
+        context = multiprocessing.get_context('spawn')
+        connected, results = context.Queue(), context.Queue()
+        timeout = updates * interval + 60
+        shares = [
+            clients // processes + (index < clients % processes)
+            for index in range(processes)
+        ]
+        group = [
+            context.Process(target=client_process, args=(
+                f'http://127.0.0.1:{port}', share, updates + 1,
+                connected, results, timeout
+            ))
+            for share in shares if share
+        ]
+        for process in group:
+            process.start()
+        for _ in group:
+            connected.get(timeout=120)
+        started = time.time()
+        asyncio.run(publish(updates, interval))
+        stats = [results.get(timeout=timeout + 60) for _ in group]
+        for process in group:
+            process.join()
+    finally:
+        app.terminate()
+        app.wait()
+    elapsed = max(item['finished_at'] for item in stats) - started
+    latency = sorted(value for item in stats for value in item['latency'])
+    return {
+        'messages': sum(item['messages'] for item in stats) / elapsed,
+        'complete': sum(item['complete'] for item in stats),
+        'elapsed': elapsed,
+        'latency': (
+            statistics.mean(latency) * 1000,
+            latency[int(len(latency) * 0.95) - 1] * 1000
+        ) if latency else (0, 0),
+    }
+
+
+def main(
+        workers: list,
+        clients: int = 400,
+        updates: int = 300,
+        processes: int = 4,
+        interval_ms: float = 5
+) -> None:
+    print(f"{clients} клиентов ({processes} процессов), {updates} обновлений "
+          f"с интервалом {interval_ms} мс")
+    for count in workers:
+        result = run(count, clients, updates, processes, interval_ms / 1000)
+        mean, p95 = result['latency']
+        print(f"  воркеров {count}: {result['messages']:.0f} сообщений/с, "
+              f"все обновления за {result['elapsed']:.2f} с "
+              f"({result['complete']}/{clients} клиентов), задержка "
+              f"(среднее/p95) {mean:.1f}/{p95:.1f} мс")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:6]
+    main(
+        [int(value) for value in args[0].split(',')] if args else [1, 2, 4],
+        int(args[1]) if len(args) > 1 else 400,
+        int(args[2]) if len(args) > 2 else 300,
+        int(args[3]) if len(args) > 3 else 4,
+        float(args[4]) if len(args) > 4 else 5
+    )
@@ -0,0 +1,182 @@
+"""
+Сравнение транспортов Socket.IO: long-polling и WebSocket.
+
+    python -m benchmarks.transport [обновлений] [интервал, мс]
+
+Запускает локальный сервер (uvicorn + socketio.AsyncServer с
+параметрами из transfer_data.transport) и TCP-прокси, который считает
+байты в обе стороны. Сервер отправляет клиенту дельты с одной
+измененной игрой и полные снимки; для каждого транспорта печатаются
+средняя и 95-я перцентиль задержки доставки и байты на обновление
+(с заголовками HTTP и кадрами WebSocket).
+"""
+import sys
+import time
+import socket
+import asyncio
+import statistics
+import socketio
+import uvicorn
+from transfer_data.codec import encode
+from transfer_data.transport import (
+    SOCKET_WS_DEFLATE,
+    server_options,
+    client_options
+)
+from benchmarks.records import make_records
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class CountingProxy:
+    """
+    TCP-прокси, считающий переданные байты.
+    """
+
+    def __init__(self, target_port: int):
+        self.target_port = target_port
+        self.bytes = 0
+
+    async def handle(self, reader, writer) -> None:
+        target_reader, target_writer = await asyncio.open_connection(
+            '127.0.0.1', self.target_port
+        )
+
+        async def pipe(source, destination):
+            try:
+                while data := await source.read(65536):
+                    self.bytes += len(data)
+                    destination.write(data)
+                    await destination.drain()
+            except ConnectionError:
+                pass
+            finally:
+                destination.close()
+
+        await asyncio.gather(
+            pipe(reader, target_writer), pipe(target_reader, writer)
+        )
+
+
+def make_server(payloads: dict) -> socketio.AsyncServer:
+    sio = socketio.AsyncServer(
+        async_mode='asgi', **server_options(['polling', 'websocket'])
+    )
+
+    @sio.on('start')
+    async def start(sid, data):
+        for tick in range(data['count']):
+            for kind, variants in payloads.items():
+                await sio.emit(kind, {'sent': time.perf_counter(),
+                                      'payload': variants[tick]}, to=sid)
+            await asyncio.sleep(data['interval'])
+
+    return sio
+
+
+async def measure(
+        transport: str,
+        proxy: CountingProxy,
+        port: int,
+        kinds: list,
+        count: int,
+        interval: float
+) -> dict:
+    client = socketio.AsyncClient(**client_options())
+    latencies = {kind: [] for kind in kinds}
+    done = asyncio.Event()
+
+    for kind in kinds:
+        def handler(data, kind=kind):
+            latencies[kind].append(time.perf_counter() - data['sent'])
+            if all(len(values) == count for values in latencies.values()):
+                done.set()
+        client.on(kind, handler)
+
+    await client.connect(f'http://127.0.0.1:{port}', transports=[transport])
+    proxy.bytes = 0
+    await client.emit('start', {'count': count, 'interval': interval})
+    await asyncio.wait_for(done.wait(), timeout=count * interval + 60)
+    transferred = proxy.bytes
+    await client.disconnect()
+    return {
+        'latency': {
+            kind: (statistics.mean(values) * 1000,
+                   sorted(values)[int(len(values) * 0.95) - 1] * 1000)
+            for kind, values in latencies.items()
+        },
+        'bytes': transferred / (count * len(kinds)),
+    }
+
+
+def make_payloads(count: int) -> dict:
+    """
+    Дельты и снимки для каждого тика. Как и на сайте, на каждом тике
+    меняется время всех игр, поэтому сжатие не получает одинаковых
+    сообщений.
+
+    :return: {'delta': [...], 'snapshot': [...]}.
+    """
+    records = make_records()
+    payloads = {'delta': [], 'snapshot': []}
+    for tick in range(count):
+        process_time = f'Q1 {tick // 60:02d}:{tick % 60:02d}'
+        for games in records.values():
+            for game in games:
+                game['process_time'] = process_time
+        snapshot = {'akty.com': records}
+        game = next(iter(records.values()))[0]
+        delta = {'type': 'delta', 'source': 'akty.com', 'epoch': 'bench',
+                 'seq': tick + 1, 'added': [], 'removed': [],
+                 'changed': [{'id': game['id'], 'fields': {
+                     'opponent_0': {'score': str(40 + tick)},
+                     'process_time': process_time}}]}
+        payloads['delta'].append(encode(delta))
+        payloads['snapshot'].append(encode(snapshot))
+    return payloads
+
+
+async def main(count: int = 100, interval_ms: float = 20) -> None:
+    payloads = make_payloads(count)
+
+    server_port, proxy_port = free_port(), free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        socketio.ASGIApp(make_server(payloads)), host='127.0.0.1',
+        port=server_port, log_level='warning',
+        ws_per_message_deflate=SOCKET_WS_DEFLATE
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    proxy = CountingProxy(server_port)
+    proxy_server = await asyncio.start_server(
+        proxy.handle, '127.0.0.1', proxy_port
+    )
+
+    print(f"{count} x (дельта {len(payloads['delta'][0])} байт + снимок "
+          f"{len(payloads['snapshot'][0])} байт), интервал {interval_ms} мс")
+    for transport in ('polling', 'websocket'):
+        result = await measure(transport, proxy, proxy_port, list(payloads),
+                               count, interval_ms / 1000)
+        latency = ', '.join(
+            f'{kind} {mean:.2f}/{p95:.2f} мс'
+            for kind, (mean, p95) in result['latency'].items()
+        )
+        print(f"  {transport:>9}: задержка (среднее/p95) {latency}; "
+              f"{result['bytes']:.0f} байт на сообщение")
+
+    proxy_server.close()
+    server.should_exit = True
+    await server_task
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    asyncio.run(main(
+        int(args[0]) if args else 100,
+        float(args[1]) if len(args) > 1 else 20
+    ))
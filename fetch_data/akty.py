@@ -1,25 +1,53 @@
 import os
-import re
+import time
 import asyncio
 import socketio
-import hashlib
 import traceback
-import json
 import redis.asyncio as aioredis
 import undetected_chromedriver as uc
-from googletrans import Translator
 from zoneinfo import ZoneInfo
 from datetime import datetime
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import (
+    TimeoutException,
+    JavascriptException,
+    WebDriverException
+)
 from selenium.webdriver.common.keys import Keys
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from app.logging import setup_logger
+from transfer_data.delta import DeltaTracker, match_id
+from transfer_data.records import game_record, opponent
+from transfer_data.codec import encode
+from transfer_data.transport import client_options, connect_client
+from transfer_data.bus import RedisBus, PARSER_BUS
+from transfer_data.state_store import RedisStateStore
+from transfer_data.history import HistoryWriter
+from fetch_data.translation import (
+    RedisTranslationStore,
+    TranslationStage,
+    create_translation_cache
+)
+from fetch_data.backends import Bs4Backend, get_backend, PARSE_BACKEND
+from fetch_data.snapshot import ContainerSnapshot
+from fetch_data.watch import DomWatcher, WATCH_MODE
+from fetch_data.driver import AsyncDriver
+from fetch_data.chrome import (
+    ChromeMemoryMonitor,
+    LEAN_CHROME,
+    block_resources,
+    lean_options
+)
+from fetch_data.session import BrowserSession, origin_of, profile_dir
+from fetch_data.startup import (
+    StartupTimer,
+    element_interactable,
+    page_loaded,
+    wait_until
+)
 
 # Загрузка переменных окружения из .env файла
 load_dotenv()
@@ -47,32 +75,87 @@ class FetchAkty:
     def __init__(
             self,
             url=URL,
-            proxy=PROXY
+            proxy=PROXY,
+            parse_backend=PARSE_BACKEND,
+            watch_mode=WATCH_MODE,
+            browser=None
     ):
         """
         Инициализация класса FetchAkty. Устанавливает URL
         и инициализирует WebDriver.
+
+        :param parse_backend: Бэкенд разбора HTML ('lxml', 'bs4' или 'js'
+        для извлечения данных скриптом в браузере).
+        :param watch_mode: Режим отслеживания изменений ('poll' - опрос
+        с интервалом, 'observer' - MutationObserver в браузере).
+        :param browser: Вкладка общего браузера
+        (fetch_data.browser_host.TabDriver) или None - свой Chrome.
         """
         self.url = url
+        self.watch_mode = watch_mode
         self.proxy = proxy
+        self.backend = get_backend(parse_backend)
+        # Эталонный бэкенд: запасной путь, если скрипт в браузере упал
+        self.fallback_backend = Bs4Backend()
         self.loop = asyncio.new_event_loop()
-        self.sio = socketio.AsyncSimpleClient()
+        self.sio = socketio.AsyncSimpleClient(**client_options())
+        # Шина обновлений в Redis (PARSER_BUS=redis) вместо Socket.IO
+        self.bus = None
         self.redis_client = None
+        self.state_store = None
+        # История изменений игр, пишется в Redis фоновой задачей
+        self.history = None
+        # Постоянный профиль Chrome и снимок сессии: после перезапуска
+        # парсер продолжает работу без авторизации
+        self.profile = profile_dir('akty') if browser is None else None
+        self.session = BrowserSession('akty')
+        self.session_restored = False
+        # Время запуска попытки, до первой отправки данных
+        self.started_at = None
         asyncio.set_event_loop(self.loop)
-        self.driver = self.loop.run_until_complete(
-            self.get_driver(headless=HEADLESS)
+        if browser is None:
+            self.driver = self.loop.run_until_complete(
+                self.get_driver(headless=HEADLESS)
+            )
+            # Все команды браузера выполняются в отдельном потоке, цикл
+            # событий в это время обслуживает сеть
+            self.browser = AsyncDriver(self.driver, log=self.send_to_logs)
+        else:
+            self.driver = browser.driver
+            self.browser = browser
+            self.browser.log = self.send_to_logs
+        # Память процессов Chrome, пишется в лог периодически (память
+        # общего браузера учитывает BrowserHost)
+        self.memory = ChromeMemoryMonitor(
+            self.driver if self.browser.owns_browser else None,
+            log=self.send_to_logs
         )
         self.debug = LOCAL_DEBUG
-        self.translate_cash = {}
-        self.translator = Translator()
+        # Кэш переводов: память, SQLite и Redis (после подключения)
+        self.translate_cash = create_translation_cache(log=self.send_to_logs)
+        self.translation_stage = TranslationStage(
+            self.translate_cash,
+            on_translated=self.on_translated,
+            log=self.send_to_logs
+        )
+        # Строки игр последнего извлечения, для повторной отправки
+        # после готовности переводов
+        self.last_rows = []
+        # Формирование и отправка данных основным циклом и стадией
+        # перевода по очереди: иначе данные, собранные до перевода,
+        # могут уйти после переведенных
+        self.emit_lock = asyncio.Lock()
         self.action = ActionChains(self.driver)
+        self.watcher = DomWatcher(self.browser)
+        self.delta_tracker = DeltaTracker()
 
     async def send_and_save_data(
             self,
             data: dict
     ):
         """
-        Отправка данных на Socket.IO сервер и сохранение в Redis.
+        Отправка изменений в шину обновлений (или на Socket.IO сервер)
+        и сохранение в Redis.
 
         :param data: Данные для отправки и сохранения.
         """
@@ -85,45 +168,94 @@ class FetchAkty:
             )
             return
         try:
-            json_data = json.dumps(data, ensure_ascii=False)
-            # Отправляем данные на Socket.IO сервер напрямую
-            await self.sio.emit('message', json_data)
-            # Сохраняем данные в Redis
-            await self.redis_client.set('akty_data', json_data)
+            # Отправляем только изменения (или снимок). Вызывается под
+            # emit_lock: дельты должны уходить в порядке номеров
+            for message in self.delta_tracker.update(data):
+                await self.publish(message)
+                if self.history:
+                    self.history.record(message)
+            # Сохраняем данные в Redis (только поле своего букмекера)
+            await self.state_store.save(data)
+            if self.started_at is not None:
+                await self.send_to_logs(
+                    f"Первые данные отправлены через "
+                    f"{time.monotonic() - self.started_at:.1f} с после "
+                    f"запуска (сессия "
+                    f"{'восстановлена' if self.session_restored else 'новая'})"
+                )
+                self.started_at = None
         except Exception as e:
             await self.send_to_logs(f'Ошибка при отправке данных: {str(e)}')
 
+    async def publish(
+            self,
+            message: dict
+    ) -> None:
+        """
+        Отправка сообщения протокола дельт в шину Redis или, при
+        PARSER_BUS=socketio, на Socket.IO сервер.
+
+        :param message: Снимок или дельта.
+        """
+        payload = encode(message)
+        if self.bus:
+            await self.bus.publish(message['type'], payload)
+        else:
+            await self.sio.emit(message['type'], payload)
+
     async def init_async_components(self):
         """
-        Инициализация асинхронных компонентов, таких как Redis клиент и подключение к Socket.IO.
+        Инициализация асинхронных компонентов, таких как Redis клиент и шина обновлений (или подключение к Socket.IO).
         """
         if self.debug:
             return None
         try:
-            await self.send_to_logs(
-                f"Connecting to Redis at {REDIS_URL}"
-            )
-            self.redis_client = await aioredis.from_url(REDIS_URL)
-            await self.send_to_logs(
-                f"Connecting to Socket.IO server at {SOCKETIO_URL}"
-            )
-            await self.sio.connect(SOCKETIO_URL,
-                                   auth={'socket_key': SOCKET_KEY})
-            data_str = await self.redis_client.get('translate_cash')
-            if data_str:
-                self.translate_cash = json.loads(data_str.decode('utf-8'))
+            # Клиент Redis и все, что его использует, создаются один раз:
+            # при повторных попытках клиент сам переподключается
+            if self.redis_client is None:
+                await self.send_to_logs(
+                    f"Connecting to Redis at {REDIS_URL}"
+                )
+                self.redis_client = await aioredis.from_url(REDIS_URL)
+                self.state_store = RedisStateStore(self.redis_client)
+                self.history = HistoryWriter(
+                    self.redis_client, log=self.send_to_logs
+                )
+                self.translate_cash.remote = RedisTranslationStore(
+                    self.redis_client
+                )
+                if PARSER_BUS == 'redis':
+                    self.bus = RedisBus(self.redis_client)
+                    await self.send_to_logs(
+                        f"Publishing updates to Redis stream "
+                        f"{self.bus.stream}"
+                    )
+            migrated = await self.translate_cash.remote.migrate_legacy()
+            if migrated:
+                await self.send_to_logs(
+                    f"Перенесено переводов в хэш Redis: {migrated}"
+                )
+            # Клиент Socket.IO остается подключенным между попытками,
+            # повторный connect завершился бы ошибкой
+            if self.bus is None and not self.sio.connected:
+                await self.send_to_logs(
+                    f"Connecting to Socket.IO server at {SOCKETIO_URL}"
+                )
+                transport = await connect_client(
+                    self.sio, SOCKETIO_URL, {'socket_key': SOCKET_KEY}
+                )
+                await self.send_to_logs(f"Socket.IO transport: {transport}")
+            # После подключения сервер должен получить полный снимок
+            self.delta_tracker.request_snapshot()
         except Exception as e:
             print(f"Error initializing async components: {e}")
             raise
 
     async def clear_cache(self):
         """
-        Удаление всех данных из ключа 'translate_cash' в Redis.
+        Удаление всех переводов: память, локальная база и Redis.
         """
-        if self.debug:
-            return
-        await self.redis_client.delete('translate_cash')
-        self.translate_cash = {}
+        await self.translate_cash.clear()
 
     async def get_driver(
             self,
@@ -140,11 +272,22 @@ class FetchAkty:
         options = uc.ChromeOptions()
         if self.proxy:
             options.add_argument(f'--proxy-server={self.proxy}')
+        if LEAN_CHROME:
+            lean_options(options)
 
         attempt = 0
         while attempt < retries:
             try:
-                driver = uc.Chrome(options=options, headless=headless)
+                driver = uc.Chrome(
+                    options=options,
+                    headless=headless,
+                    user_data_dir=self.profile
+                )
+                if LEAN_CHROME:
+                    try:
+                        block_resources(driver)
+                    except WebDriverException as e:
+                        logger.error(f"Не удалось заблокировать ресурсы: {e}")
                 return driver
             except WebDriverException as e:
                 attempt += 1
@@ -164,7 +307,7 @@ class FetchAkty:
 
         :param url: URL страницы для загрузки.
         """
-        self.driver.get(url)
+        await self.browser.get(url)
 
     async def scroll_to_element(
             self,
@@ -176,7 +319,7 @@ class FetchAkty:
 
         :param element: WebElement, до которого необходимо прокрутить страницу.
         """
-        self.driver.execute_script(
+        await self.browser.execute_script(
             "arguments[0].scrollIntoView({block: 'center', inline: 'center'});",
             element)
 
@@ -194,14 +337,14 @@ class FetchAkty:
         scroll_pause_time = 0.1  # Уменьшенная пауза  для плавности
         scroll_step = 100  # Количество пикселей для каждой прокрутки
 
-        last_height = self.driver.execute_script(
+        last_height = await self.browser.execute_script(
             "return document.body.scrollHeight")
 
         while True:
-            self.driver.execute_script("window.scrollBy(0, arguments[0]);",
-                                       scroll_step)
+            await self.browser.execute_script(
+                "window.scrollBy(0, arguments[0]);", scroll_step)
             await asyncio.sleep(scroll_pause_time)
-            new_height = self.driver.execute_script(
+            new_height = await self.browser.execute_script(
                 "return document.body.scrollHeight")
 
             if new_height == last_height:
@@ -213,31 +356,35 @@ class FetchAkty:
             by: By,
             value: str,
             timeout: int = 10,
+            condition=EC.presence_of_element_located
     ) -> WebElement:
         """
         Ожидает загрузки элемента на странице по заданным критериям.
+        Между проверками управление отдается циклу событий.
 
         :param by: Стратегия поиска элемента (например, By.CSS_SELECTOR).
         :param value: Значение для поиска элемента.
         :param timeout: Время ожидания в секундах (по умолчанию 10 секунд).
-        :param is_debug: Для остановки во время отладки.
+        :param condition: Условие из expected_conditions (по умолчанию
+        наличие элемента; element_interactable - готовность к клику).
         :return: Найденный элемент или None,
         если элемент не был найден в течение заданного времени.
         """
-        try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((by, value))
-            )
+        element = await wait_until(
+            lambda: self.browser.check(condition((by, value))),
+            timeout
+        )
+        if element:
             return element
-        except TimeoutException:
-            print(
-                f"Элемент {by} {value} не был загружен в"
-                f" течение заданного времени")
-            if not self.debug:
-                await self.sio.disconnect()
-                self.driver.quit()
-            else:
-                breakpoint()
+        await self.send_to_logs(
+            f"Элемент {by} {value} не был загружен в"
+            f" течение заданного времени"
+        )
+        if not self.debug:
+            await self.sio.disconnect()
+            await self.browser.quit()
+        else:
+            breakpoint()
 
     async def send_to_logs(
             self,
@@ -259,16 +406,21 @@ class FetchAkty:
         Авторизация на странице.
         """
         await self.get_url(self.url)
-        login_input = await self.wait_for_element(By.CSS_SELECTOR,
-                                            "input[placeholder*='账号']",
-                                            timeout=60)
-        await asyncio.sleep(15)
-        login_input.send_keys(LOGIN)
+        # Форма готова, когда страница загружена и поле не перекрыто
+        # загрузочным слоем
+        await wait_until(lambda: self.browser.check(page_loaded), timeout=60)
+        login_input = await self.wait_for_element(
+            By.CSS_SELECTOR,
+            "input[placeholder*='账号']",
+            timeout=75,
+            condition=element_interactable
+        )
+        await self.browser.call(login_input.send_keys, LOGIN)
         password_input = await self.wait_for_element(By.CSS_SELECTOR,
                                                "input[placeholder='密码']")
-        password_input.clear()
-        password_input.send_keys(PASSWORD)
-        password_input.send_keys(Keys.ENTER)
+        await self.browser.call(password_input.clear)
+        await self.browser.call(password_input.send_keys, PASSWORD)
+        await self.browser.call(password_input.send_keys, Keys.ENTER)
         await self.send_to_logs('Авторизация успешно пройдена')
 
     async def translate_and_cache(
@@ -277,28 +429,45 @@ class FetchAkty:
     ) -> str:
         """
         Перевод строки на Русский язык. Если строка уже переводилась,
-        забираем данные из Redis, если нет, то переводим и сохраняем.
-        Метод возвращает строку, переведенную на Русский язык.
+        берем перевод из кэша (заполняется из Redis через
+        prefetch_translations). Если нет, строка ставится в очередь
+        стадии перевода и пока возвращается без перевода: перевод
+        уйдет следующим обновлением (см. on_translated).
         """
 
         if text in self.translate_cash.keys():
             return self.translate_cash[text]
 
-        translation = self.translator.translate(
-            text, src='zh-cn',
-            dest='ru'
-        ).text
-        await self.send_to_logs(f"Перевод текста {text} - {translation}")
-        self.translate_cash[text] = translation
-        if self.debug:
-            return translation
-        data_str = await self.redis_client.get('translate_cash')
-        if data_str:
-            self.translate_cash = json.loads(data_str.decode('utf-8'))
-        self.translate_cash[text] = translation
-        json_data = json.dumps(self.translate_cash, ensure_ascii=False)
-        await self.redis_client.set('translate_cash', json_data)
-        return translation
+        self.translation_stage.request(text)
+        return text
+
+    async def on_translated(
+            self,
+            translations: dict
+    ) -> None:
+        """
+        Повторная отправка последних данных, когда готовы переводы.
+
+        :param translations: Готовые переводы {название: перевод}.
+        """
+        async with self.emit_lock:
+            if self.last_rows:
+                await self.send_and_save_data(
+                    await self.build_leagues_data(self.last_rows)
+                )
+
+    async def prefetch_translations(
+            self,
+            texts: set
+    ) -> None:
+        """
+        Загрузка переводов всех названий страницы, которых еще нет
+        в памяти: сначала из локальной базы SQLite, затем из Redis
+        одним запросом HMGET.
+
+        :param texts: Названия команд на странице.
+        """
+        await self.translate_cash.load(texts)
 
     async def main_page(
             self
@@ -306,15 +475,29 @@ class FetchAkty:
         """
         Переход с главной страницы.
         """
-        await asyncio.sleep(5)
-        self.driver.execute_script("window.scrollBy(0, arguments[0]);", 1700)
-        await asyncio.sleep(2)
-        button_section = await self.wait_for_element(By.CSS_SELECTOR,
-                                               "div[data-apiname='YBTY']",
-                                               timeout=30)
-        await self.scroll_to_element(button_section)
-        await asyncio.sleep(2)
-        button_section.click()
+
+        def find_section():
+            # Блок разделов подгружается при прокрутке главной страницы,
+            # которая после входа загружается не сразу
+            self.driver.execute_script(
+                "window.scrollTo(0, arguments[0]);", 1700
+            )
+            return self.driver.find_element(
+                By.CSS_SELECTOR, "div[data-apiname='YBTY']"
+            )
+
+        section = await wait_until(
+            lambda: self.browser.call(find_section), timeout=37
+        )
+        if not section:
+            raise TimeoutException('Не найден раздел на главной странице')
+        await self.scroll_to_element(section)
+        button_section = await self.wait_for_element(
+            By.CSS_SELECTOR,
+            "div[data-apiname='YBTY']",
+            condition=element_interactable
+        )
+        await self.browser.call(button_section.click)
         await self.send_to_logs('Переход с главной страницы выполнен')
 
     async def aggregator_page(
@@ -335,39 +518,90 @@ class FetchAkty:
             "iframe[title='venuIframe']",
             timeout=60
         )
-        await asyncio.sleep(20)
-        self.driver.switch_to.frame(iframe_element)
-        basketball_element = await self.wait_for_element(By.CSS_SELECTOR,
-                                                   "span[alt='篮球']",
-                                                   timeout=15)
+        # Переключение по элементу сохраняется при загрузке документа
+        # фрейма, дальше ждем готовности раздела внутри фрейма
+        await self.browser.switch_to_frame(iframe_element)
+        basketball_element = await self.wait_for_element(
+            By.CSS_SELECTOR,
+            "span[alt='篮球']",
+            timeout=35,
+            condition=element_interactable
+        )
         if basketball_element:
-            basketball_element.click()
+            await self.browser.call(basketball_element.click)
+            await self.save_session()
         else:
-            window_size = self.driver.get_window_size()
+            window_size = await self.browser.get_window_size()
             window_width = window_size['width']
             # Вычисляем координаты для клика в правый верхний угол
             right_upper_x = window_width - 1  # 1 пиксель левее правой границы
             right_upper_y = 1
-            self.actions.move_by_offset(right_upper_x, right_upper_y).click().perform()
+            await self.browser.call(
+                self.action.move_by_offset(
+                    right_upper_x, right_upper_y
+                ).click().perform
+            )
             await self.aggregator_page()
 
         await self.send_to_logs('Успешный переход в раздел баскетбола')
 
+    async def save_session(
+            self
+    ) -> None:
+        """
+        Сохранение сессии после входа в раздел баскетбола: адрес
+        агрегатора (документ iframe), cookies и localStorage сайта
+        и агрегатора.
+        """
+        try:
+            resume_url = await self.browser.execute_script(
+                'return location.href;'
+            )
+            await self.session.save(
+                self.browser,
+                resume_url,
+                [origin_of(self.url), origin_of(resume_url)]
+            )
+        except Exception as e:
+            await self.send_to_logs(f"Не удалось сохранить сессию: {e}")
+
+    async def resume_session(
+            self
+    ) -> bool:
+        """
+        Продолжение сохраненной сессии: агрегатор открывается сразу,
+        без авторизации и переходов с главной страницы.
+
+        :return: True, если раздел открыт.
+        """
+        self.session_restored = await self.session.resume(
+            self.browser,
+            "div[class*='v-scroll-content relative-position']",
+            log=self.send_to_logs
+        )
+        if self.session_restored:
+            # Раздел баскетбола, если агрегатор открылся на другом
+            for element in await self.browser.find_elements(
+                    By.CSS_SELECTOR, "span[alt='篮球']"):
+                await self.browser.call(element.click)
+            await self.send_to_logs('Сессия восстановлена, вход пропущен')
+        return self.session_restored
+
     async def change_zoom(
             self
     ):
-        self.driver.get('chrome://settings/appearance')
-        self.driver.execute_script(
+        await self.browser.get('chrome://settings/appearance')
+        await self.browser.execute_script(
             'chrome.settingsPrivate.setDefaultZoom(0.25);'
         )
 
     async def get_content(
             self
-    ):
+    ) -> ContainerSnapshot | None:
         """
         Получение контента с страницы с 5 попытками.
 
-        :return: Объект BeautifulSoup с содержимым HTML или None, если контент не найден.
+        :return: Снимок контейнера с играми или None, если контент не найден.
         """
         max_attempts = 6
         attempt = 0
@@ -380,9 +614,7 @@ class FetchAkty:
             )
 
             if element:
-                html = element.get_attribute('outerHTML')
-                soup = BeautifulSoup(html, 'html.parser')
-                return soup
+                return await self.read_container(element)
             logger.info(
                 f"Внимание! Отсутствие контента на странице,"
                 f" Попытка {attempt + 1} из {max_attempts} получить контент.")
@@ -394,26 +626,57 @@ class FetchAkty:
             'Остановка парсера, не найден <div> с играми после 5 попыток.'
         )
         await self.sio.disconnect()
-        self.driver.quit()
+        await self.browser.quit()
         return None
 
-    async def get_container_hash(self) -> str:
+    async def read_container(
+            self,
+            element: WebElement
+    ) -> ContainerSnapshot:
+        """
+        Снимок контейнера: в режиме 'js' строки игр собираются скриптом
+        в браузере, иначе забирается outerHTML для разбора в Python.
+        При ошибке скрипта используется эталонный бэкенд bs4.
+
+        :param element: Элемент контейнера с играми.
+        :return: Снимок контейнера.
+        """
+        if self.backend.script:
+            try:
+                raw = await self.browser.execute_script(
+                    self.backend.script, element
+                )
+                return ContainerSnapshot(raw, self.backend)
+            except JavascriptException as e:
+                await self.send_to_logs(
+                    f'Ошибка извлечения в браузере, разбор HTML: {e}'
+                )
+        html = await self.browser.call(element.get_attribute, 'outerHTML')
+        return ContainerSnapshot(html, self.fallback_backend
+                                 if self.backend.script else self.backend)
+
+    async def get_container_hash(
+            self,
+            snapshot: ContainerSnapshot | None = None
+    ) -> str:
         """
         Получение хэш-суммы контейнера с играми.
+        :param snapshot: Уже полученный снимок контейнера, если есть.
         :return: str
         """
-        soup = await self.get_content()
+        if snapshot is None:
+            snapshot = await self.get_content()
 
-        if not soup:
+        if snapshot is None:
             return ''
-        return hashlib.md5(str(soup).encode('utf-8')).hexdigest()
+        return snapshot.hash
 
     async def click_element_by_text(self) -> None:
         try:
             spoiler_button = await self.wait_for_element(By.CSS_SELECTOR,"div[class*='match-type']",timeout=30)
-            spoiler_button.click()
+            await self.browser.call(spoiler_button.click)
             await asyncio.sleep(1)
-            spoiler_button.click()
+            await self.browser.call(spoiler_button.click)
             await self.send_to_logs(
                 'Переключение видимости лиг произошло успешно'
             )
@@ -424,110 +687,108 @@ class FetchAkty:
 
     async def extract_league_data(
             self,
-            target_leagues: dict
+            target_leagues: dict,
+            snapshot: ContainerSnapshot | None = None
     ) -> dict:
         """
         Извлечение данных лиг из HTML.
         :param target_leagues: list
+        :param snapshot: Снимок контейнера текущего тика. Если не передан,
+        контент запрашивается заново.
         :return: dict
         """
-        soup = await self.get_content()
-        leagues_data = {NAME_BOOKMAKER: {}}
+        if snapshot is None:
+            snapshot = await self.get_content()
 
-        scroll_content = soup.find('div',
-                                   class_='v-scroll-content relative-position')
-        if not scroll_content:
-            return leagues_data
-
-        cards = scroll_content.find_all('div', class_=re.compile('list-card-wrap 1 v-scroll-item 1 relative-position'),recursive=False)
+        backend = snapshot.backend
         league_name = None
-        for card in cards:
-            div_name_liga = card.find('span',
-                                      class_="ellipsis allow-user-select")
-            if div_name_liga:
-                league_name = div_name_liga.get_text()
+        rows = []
+        for card in backend.find_cards(snapshot.tree):
+            card_league = backend.card_league(card)
+            if card_league is not None:
+                league_name = card_league
                 if league_name in target_leagues.keys():
-                    if 'style' in card.attrs and re.search(
-                            r'height:\s*37px;',
-                            card['style']
-                    ):
+                    if backend.card_collapsed(card):
                         await self.click_element_by_text()
             elif league_name and league_name in target_leagues.keys():
 
                 league_name = target_leagues[league_name]
-                list_mid_elements = card.find_all('div',
-                                                  id='list-mid-undefined')
-                for list_mid_element in list_mid_elements:
-                    opponent_0 = list_mid_element.find('div', class_='row-item team-item')
-                    opponent_1 = list_mid_element.find('div', class_='row-item team-item soon')
-                    if opponent_0 and opponent_1:
-                        opponent_0_name = opponent_0.find('div', class_=re.compile(
-                            'allow-user-select')).get_text()
-                        translate_opponent_0_name = await self.translate_and_cache(
-                            opponent_0_name
-                        ) if opponent_0_name != '' else ''
-                        opponent_1_name = opponent_1.find('div', class_=re.compile(
-                            'allow-user-select')).get_text()
-                        translate_opponent_1_name = await self.translate_and_cache(
-                            opponent_1_name
-                        ) if opponent_1_name != '' else ''
-                        opponent_0_score_div = opponent_0.find(
-                            'div',
-                            class_='score'
-                        )
-                        opponent_0_score = opponent_0_score_div.find(
-                            'span').get_text() if opponent_0_score_div else ""
-                        opponent_1_score_div = opponent_1.find('div',
-                                                               class_='score')
-                        opponent_1_score = opponent_1_score_div.find(
-                            'span').get_text() if opponent_1_score_div else ""
-                        bet_divs = card.find_all('div', class_='handicap-col')
-                        handicap_bet_div = bet_divs[1].find_all(
-                            'span',
-                            class_='highlight-odds'
-                        )
-                        opponent_0_handicap_bet = handicap_bet_div[
-                            0].get_text() if len(handicap_bet_div) > 0 else ""
-                        opponent_1_handicap_bet = handicap_bet_div[
-                            1].get_text() if len(handicap_bet_div) > 1 else ""
-                        total_bet_div = bet_divs[2].find_all(
-                            'span',
-                            class_='highlight-odds'
-                        )
-                        opponent_0_total_bet = total_bet_div[0].get_text() if len(
-                            total_bet_div) > 0 else ""
-                        opponent_1_total_bet = total_bet_div[1].get_text() if len(
-                            total_bet_div) > 1 else ""
-                        process_time_span = list_mid_element.find(
-                            'span',
-                            class_='timer-layout2'
-                        )
-                        process_time = process_time_span.get_text() if\
-                            process_time_span else ""
-                        server_time = datetime.now(
-                            tz=ZoneInfo("Europe/Moscow")).strftime(
-                            "%Y-%m-%d %H:%M:%S")
-                        game_info = {
-                            'opponent_0': {
-                                'name': translate_opponent_0_name,
-                                'score': opponent_0_score,
-                                'handicap_bet': opponent_0_handicap_bet,
-                                'total_bet': opponent_0_total_bet,
-                            },
-                            'opponent_1': {
-                                'name': translate_opponent_1_name,
-                                'score': opponent_1_score,
-                                'handicap_bet': opponent_1_handicap_bet,
-                                'total_bet': opponent_1_total_bet,
-                            },
-                            'process_time': process_time,
-                            'server_time': server_time
-                        }
-                        if league_name not in leagues_data[NAME_BOOKMAKER]:
-                            leagues_data[NAME_BOOKMAKER][league_name] = []
-                        leagues_data[NAME_BOOKMAKER][league_name].append(game_info)
+                for match in backend.card_matches(card):
+                    rows.append((league_name, match))
+
+        self.last_rows = rows
+        return await self.build_leagues_data(rows)
+
+    async def build_leagues_data(
+            self,
+            rows: list
+    ) -> dict:
+        """
+        Формирование данных лиг из извлеченных строк игр.
+
+        :param rows: Список (лига, AktyMatch).
+        :return: dict
+        """
+        leagues_data = {NAME_BOOKMAKER: {}}
+        # Переводы всех названий страницы - одним запросом к Redis
+        await self.prefetch_translations(
+            {match.opponent_0_name for _, match in rows}
+            | {match.opponent_1_name for _, match in rows}
+        )
+        for league_name, match in rows:
+            translate_opponent_0_name = await self.translate_and_cache(
+                match.opponent_0_name
+            ) if match.opponent_0_name != '' else ''
+            translate_opponent_1_name = await self.translate_and_cache(
+                match.opponent_1_name
+            ) if match.opponent_1_name != '' else ''
+            server_time = datetime.now(
+                tz=ZoneInfo("Europe/Moscow")).strftime(
+                "%Y-%m-%d %H:%M:%S")
+            game_info = game_record(
+                id=match_id(
+                    NAME_BOOKMAKER, league_name,
+                    match.opponent_0_name, match.opponent_1_name
+                ),
+                opponent_0=opponent(
+                    name=translate_opponent_0_name,
+                    score=match.opponent_0_score,
+                    handicap_bet=match.opponent_0_handicap_bet,
+                    total_bet=match.opponent_0_total_bet,
+                ),
+                opponent_1=opponent(
+                    name=translate_opponent_1_name,
+                    score=match.opponent_1_score,
+                    handicap_bet=match.opponent_1_handicap_bet,
+                    total_bet=match.opponent_1_total_bet,
+                ),
+                process_time=match.process_time,
+                server_time=server_time
+            )
+            if league_name not in leagues_data[NAME_BOOKMAKER]:
+                leagues_data[NAME_BOOKMAKER][league_name] = []
+            leagues_data[NAME_BOOKMAKER][league_name].append(game_info)
         return leagues_data
 
+    async def wait_for_changes(self) -> bool:
+        """
+        Ожидание изменений контейнера с играми через MutationObserver.
+        Если наблюдатель потерян, он устанавливается заново.
+
+        :return: True, если контейнер изменился или наблюдатель
+        был установлен заново.
+        """
+        changed = await self.watcher.wait()
+        if changed is None:
+            element = await self.wait_for_element(
+                By.CSS_SELECTOR,
+                "div[class*='v-scroll-content relative-position']",
+                timeout=30
+            )
+            await self.watcher.install(element)
+            return True
+        return changed
+
     async def monitor_leagues(
             self,
             target_leagues: dict,
@@ -541,16 +802,27 @@ class FetchAkty:
         """
         previous_hash = await self.get_container_hash()
         while True:
-            await asyncio.sleep(check_interval)
-            current_hash = await self.get_container_hash()
+            if self.watch_mode == 'observer':
+                if not await self.wait_for_changes():
+                    await self.send_to_logs(
+                        "Данные не изменились."
+                    )
+                    continue
+            else:
+                await asyncio.sleep(check_interval)
+            # Один снимок на тик: и хэш, и извлечение работают с ним
+            snapshot = await self.get_content()
+            current_hash = await self.get_container_hash(snapshot)
 
             if current_hash != previous_hash:
                 try:
-                    leagues_data = await self.extract_league_data(
-                        target_leagues
-                    )
-                    previous_hash = current_hash
-                    await self.send_and_save_data(leagues_data)
+                    async with self.emit_lock:
+                        leagues_data = await self.extract_league_data(
+                            target_leagues,
+                            snapshot
+                        )
+                        previous_hash = current_hash
+                        await self.send_and_save_data(leagues_data)
                 except Exception:
                     await self.send_to_logs(
                         f'Ошибка: {traceback.format_exc()}'
@@ -561,12 +833,29 @@ class FetchAkty:
                 )
 
     async def close(self):
+        await self.translation_stage.close()
+        if self.history:
+            await self.history.close()
+            await self.send_to_logs(f"История игр: {self.history.stats}")
+        await self.send_to_logs(
+            f"Кэш переводов (попадания/запросы): "
+            f"{self.translate_cash.format_stats()}"
+        )
+        await self.translate_cash.close()
+        # Клиент Redis закрывается последним: им пользуются история и кэш
+        if self.redis_client:
+            await self.redis_client.aclose()
+        await self.send_to_logs(
+            f"Команды браузера: {self.browser.format_stats()}"
+        )
         if self.driver:
-            self.driver.quit()
+            await self.memory.close()
+            await self.browser.quit()
+            self.browser.shutdown()
             await self.send_to_logs("Драйвер был закрыт принудительно")
 
     def __del__(self):
-        if self.driver:
+        if self.driver and self.browser.owns_browser:
             self.driver.quit()
             print("Драйвер закрыт")
 
@@ -583,18 +872,35 @@ class FetchAkty:
         max_retries = 5
 
         while attempt < max_retries:
+            self.started_at = time.monotonic()
+            timer = StartupTimer()
+            self.memory.start()
+            # Подключение к Redis и Socket.IO идет параллельно с
+            # навигацией браузера
+            network = asyncio.ensure_future(
+                timer.measure('network', self.init_async_components())
+            )
             try:
-                await self.change_zoom()
-                await self.init_async_components()
+                with timer.phase('zoom'):
+                    await self.change_zoom()
+                with timer.phase('resume'):
+                    restored = await self.resume_session()
+                if not restored:
+                    with timer.phase('login'):
+                        await self.authorization()
+                    with timer.phase('main_page'):
+                        await self.main_page()
+                    with timer.phase('aggregator'):
+                        await self.aggregator_page()
+                await network
+                await self.send_to_logs(timer.report())
                 if self.debug:
                     await self.clear_cache()
-                await self.authorization()
-                await self.main_page()
-                await self.aggregator_page()
                 await self.monitor_leagues(leagues)
                 break  # Успешное выполнение, выход из цикла
             except Exception as e:
-                self.driver.save_screenshot(
+                network.cancel()
+                await self.browser.save_screenshot(
                     f'screenshot_akty_{attempt}.png')
                 await self.send_to_logs(
                     f"Произошла ошибка: {str(e)}. Попытка {attempt + 1} из {max_retries}.")
@@ -605,7 +911,7 @@ class FetchAkty:
                         "Достигнуто максимальное количество попыток. Остановка.")
                     break
             finally:
-                self.driver.quit()
+                await self.browser.quit()
 
 
 
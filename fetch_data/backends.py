@@ -0,0 +1,461 @@
+"""
+Бэкенды разбора страниц с играми akty.com и fb.com.
+
+Бэкенды akty.com разбирают `outerHTML` блока `v-scroll-content`
+и отдают одинаковые структуры, поэтому
+`FetchAkty.extract_league_data` не зависит от выбранного бэкенда.
+Регулярные выражения и XPath-селекторы собираются один раз
+при импорте модуля, а не на каждой карточке.
+
+JS-бэкенды (`script` не None) получают не HTML, а JSON со строками игр,
+собранными в браузере скриптами из fetch_data.browser_scripts.
+Бэкенды bs4 остаются запасным вариантом и эталоном для сверки.
+"""
+import os
+import re
+import json
+from dataclasses import dataclass
+from bs4 import BeautifulSoup
+from fetch_data.browser_scripts import AKTY_EXTRACT_JS, FB_EXTRACT_JS
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml не установлен, доступен только bs4
+    etree = None
+    lxml_html = None
+
+PARSE_BACKEND = os.getenv('AKTY_PARSE_BACKEND', 'lxml')
+FB_PARSE_BACKEND = os.getenv('FB_PARSE_BACKEND', 'bs4')
+
+# Общие для всех бэкендов скомпилированные выражения
+COLLAPSED_STYLE_RE = re.compile(r'height:\s*37px;')
+CARD_CLASS_RE = re.compile(
+    'list-card-wrap 1 v-scroll-item 1 relative-position'
+)
+USER_SELECT_RE = re.compile('allow-user-select')
+
+
+@dataclass
+class AktyMatch:
+    """
+    Сырые данные одной игры из карточки лиги (без перевода названий).
+    """
+    opponent_0_name: str
+    opponent_1_name: str
+    opponent_0_score: str
+    opponent_1_score: str
+    opponent_0_handicap_bet: str
+    opponent_1_handicap_bet: str
+    opponent_0_total_bet: str
+    opponent_1_total_bet: str
+    process_time: str
+
+
+@dataclass
+class FbMatch:
+    """
+    Сырые данные одной игры fb.com (короткие названия команд).
+    """
+    team_0: str
+    team_1: str
+    score_0: str
+    score_1: str
+    process_time: str
+    handicap_bet_0: str = ""
+    handicap_bet_1: str = ""
+    total_bet_0: str = ""
+    total_bet_1: str = ""
+
+
+def _pair(values: list) -> tuple:
+    """
+    Возвращает первые два значения списка, подставляя "" для отсутствующих.
+    """
+    first = values[0] if len(values) > 0 else ""
+    second = values[1] if len(values) > 1 else ""
+    return first, second
+
+
+class Bs4Backend:
+    """
+    Эталонный бэкенд на BeautifulSoup с `html.parser`.
+    """
+    name = 'bs4'
+    script = None
+
+    def parse(self, html: str):
+        """
+        Разбор HTML в дерево.
+
+        :param html: outerHTML контейнера с играми.
+        :return: Объект BeautifulSoup.
+        """
+        return BeautifulSoup(html, 'html.parser')
+
+    def find_cards(self, tree) -> list:
+        """
+        Поиск карточек (заголовков лиг и блоков игр) в контейнере.
+
+        :param tree: Разобранное дерево.
+        :return: Список карточек или пустой список, если контейнер не найден.
+        """
+        scroll_content = tree.find(
+            'div', class_='v-scroll-content relative-position'
+        )
+        if not scroll_content:
+            return []
+        return scroll_content.find_all(
+            'div', class_=CARD_CLASS_RE, recursive=False
+        )
+
+    def card_league(self, card):
+        """
+        Название лиги, если карточка является заголовком лиги.
+
+        :param card: Карточка.
+        :return: Название лиги или None.
+        """
+        div_name_liga = card.find('span', class_="ellipsis allow-user-select")
+        if div_name_liga is None:
+            return None
+        return div_name_liga.get_text()
+
+    def card_collapsed(self, card) -> bool:
+        """
+        Свернута ли лига (карточка заголовка высотой 37px).
+
+        :param card: Карточка.
+        """
+        return 'style' in card.attrs and bool(
+            COLLAPSED_STYLE_RE.search(card['style'])
+        )
+
+    def card_matches(self, card) -> list:
+        """
+        Извлечение игр из карточки лиги.
+
+        :param card: Карточка.
+        :return: Список AktyMatch.
+        """
+        matches = []
+        bet_divs = None
+        for list_mid_element in card.find_all('div', id='list-mid-undefined'):
+            opponent_0 = list_mid_element.find(
+                'div', class_='row-item team-item'
+            )
+            opponent_1 = list_mid_element.find(
+                'div', class_='row-item team-item soon'
+            )
+            if not (opponent_0 and opponent_1):
+                continue
+            if bet_divs is None:
+                bet_divs = card.find_all('div', class_='handicap-col')
+            handicap = [span.get_text() for span in bet_divs[1].find_all(
+                'span', class_='highlight-odds'
+            )]
+            total = [span.get_text() for span in bet_divs[2].find_all(
+                'span', class_='highlight-odds'
+            )]
+            process_time_span = list_mid_element.find(
+                'span', class_='timer-layout2'
+            )
+            opponent_0_handicap_bet, opponent_1_handicap_bet = _pair(handicap)
+            opponent_0_total_bet, opponent_1_total_bet = _pair(total)
+            matches.append(AktyMatch(
+                opponent_0_name=self._team_name(opponent_0),
+                opponent_1_name=self._team_name(opponent_1),
+                opponent_0_score=self._team_score(opponent_0),
+                opponent_1_score=self._team_score(opponent_1),
+                opponent_0_handicap_bet=opponent_0_handicap_bet,
+                opponent_1_handicap_bet=opponent_1_handicap_bet,
+                opponent_0_total_bet=opponent_0_total_bet,
+                opponent_1_total_bet=opponent_1_total_bet,
+                process_time=process_time_span.get_text()
+                if process_time_span else "",
+            ))
+        return matches
+
+    @staticmethod
+    def _team_name(team) -> str:
+        return team.find('div', class_=USER_SELECT_RE).get_text()
+
+    @staticmethod
+    def _team_score(team) -> str:
+        score_div = team.find('div', class_='score')
+        return score_div.find('span').get_text() if score_div else ""
+
+
+def _has_class(name: str) -> str:
+    """
+    XPath-условие наличия класса, аналог `class_='name'` в bs4.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlBackend(Bs4Backend):
+    """
+    Быстрый бэкенд на lxml с заранее скомпилированными XPath-селекторами.
+
+    Селекторы повторяют семантику поиска по классам в bs4: строка с
+    пробелами сравнивается со всем атрибутом class целиком, строка без
+    пробелов - с отдельным классом, регулярное выражение - как подстрока.
+    """
+    name = 'lxml'
+
+    if etree is not None:
+        SCROLL_CONTENT = etree.XPath(
+            "(descendant-or-self::div[normalize-space(@class)="
+            "'v-scroll-content relative-position'])[1]"
+        )
+        CARDS = etree.XPath(
+            "div[contains(normalize-space(@class), "
+            "'list-card-wrap 1 v-scroll-item 1 relative-position')]"
+        )
+        LEAGUE = etree.XPath(
+            "(.//span[normalize-space(@class)="
+            "'ellipsis allow-user-select'])[1]"
+        )
+        LIST_MID = etree.XPath(".//div[@id='list-mid-undefined']")
+        TEAM_0 = etree.XPath(
+            "(.//div[normalize-space(@class)='row-item team-item'])[1]"
+        )
+        TEAM_1 = etree.XPath(
+            "(.//div[normalize-space(@class)='row-item team-item soon'])[1]"
+        )
+        TEAM_NAME = etree.XPath(
+            "(.//div[contains(normalize-space(@class), "
+            "'allow-user-select')])[1]"
+        )
+        SCORE = etree.XPath(f"(.//div[{_has_class('score')}])[1]")
+        FIRST_SPAN = etree.XPath("(.//span)[1]")
+        HANDICAP_COLS = etree.XPath(f".//div[{_has_class('handicap-col')}]")
+        ODDS = etree.XPath(f".//span[{_has_class('highlight-odds')}]")
+        TIMER = etree.XPath(f"(.//span[{_has_class('timer-layout2')}])[1]")
+
+    def parse(self, html: str):
+        return lxml_html.fromstring(html)
+
+    def find_cards(self, tree) -> list:
+        scroll_content = self.SCROLL_CONTENT(tree)
+        if not scroll_content:
+            return []
+        return self.CARDS(scroll_content[0])
+
+    def card_league(self, card):
+        league = self.LEAGUE(card)
+        if not league:
+            return None
+        return league[0].text_content()
+
+    def card_collapsed(self, card) -> bool:
+        style = card.get('style')
+        return style is not None and bool(COLLAPSED_STYLE_RE.search(style))
+
+    def card_matches(self, card) -> list:
+        matches = []
+        bet_divs = None
+        for list_mid_element in self.LIST_MID(card):
+            opponent_0 = self.TEAM_0(list_mid_element)
+            opponent_1 = self.TEAM_1(list_mid_element)
+            if not (opponent_0 and opponent_1):
+                continue
+            opponent_0, opponent_1 = opponent_0[0], opponent_1[0]
+            if bet_divs is None:
+                bet_divs = self.HANDICAP_COLS(card)
+            handicap = [span.text_content() for span in self.ODDS(bet_divs[1])]
+            total = [span.text_content() for span in self.ODDS(bet_divs[2])]
+            process_time_span = self.TIMER(list_mid_element)
+            opponent_0_handicap_bet, opponent_1_handicap_bet = _pair(handicap)
+            opponent_0_total_bet, opponent_1_total_bet = _pair(total)
+            matches.append(AktyMatch(
+                opponent_0_name=self._team_name(opponent_0),
+                opponent_1_name=self._team_name(opponent_1),
+                opponent_0_score=self._team_score(opponent_0),
+                opponent_1_score=self._team_score(opponent_1),
+                opponent_0_handicap_bet=opponent_0_handicap_bet,
+                opponent_1_handicap_bet=opponent_1_handicap_bet,
+                opponent_0_total_bet=opponent_0_total_bet,
+                opponent_1_total_bet=opponent_1_total_bet,
+                process_time=process_time_span[0].text_content()
+                if process_time_span else "",
+            ))
+        return matches
+
+    def _team_name(self, team) -> str:
+        return self.TEAM_NAME(team)[0].text_content()
+
+    def _team_score(self, team) -> str:
+        score_div = self.SCORE(team)
+        if not score_div:
+            return ""
+        return self.FIRST_SPAN(score_div[0])[0].text_content()
+
+
+class AktyJsBackend(Bs4Backend):
+    """
+    Бэкенд режима извлечения в браузере: карточки уже собраны скриптом
+    AKTY_EXTRACT_JS и приходят одной JSON-строкой.
+    """
+    name = 'js'
+    script = AKTY_EXTRACT_JS
+
+    def parse(self, raw: str) -> list:
+        return json.loads(raw)
+
+    def find_cards(self, tree: list) -> list:
+        return tree
+
+    def card_league(self, card: dict):
+        return card['league']
+
+    def card_collapsed(self, card: dict) -> bool:
+        return card['collapsed']
+
+    def card_matches(self, card: dict) -> list:
+        if card['matches'] is None:
+            raise ValueError("Не удалось разобрать карточку лиги в браузере")
+        return [AktyMatch(*row) for row in card['matches']]
+
+
+BACKENDS = {
+    Bs4Backend.name: Bs4Backend,
+    LxmlBackend.name: LxmlBackend,
+    AktyJsBackend.name: AktyJsBackend,
+}
+
+
+def get_backend(name: str = PARSE_BACKEND):
+    """
+    Возвращает экземпляр бэкенда разбора по имени.
+
+    Если lxml не установлен, используется эталонный бэкенд bs4.
+
+    :param name: Имя бэкенда ('lxml', 'bs4' или 'js').
+    :return: Экземпляр бэкенда.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд разбора: {name}")
+    if name == LxmlBackend.name and etree is None:
+        name = Bs4Backend.name
+    return BACKENDS[name]()
+
+
+class FbBs4Backend:
+    """
+    Эталонный бэкенд fb.com: разбор `page_source` через BeautifulSoup.
+    """
+    name = 'bs4'
+    script = None
+
+    def parse(self, html: str):
+        """
+        Разбор HTML страницы в дерево.
+
+        :param html: Исходный код страницы.
+        :return: Объект BeautifulSoup.
+        """
+        return BeautifulSoup(html, 'html.parser')
+
+    def find_groups(self, tree) -> list:
+        """
+        Поиск групп игр (лиг) на странице.
+
+        :param tree: Разобранное дерево.
+        """
+        return tree.select('.home-match-list-box .group-matches')
+
+    def group_league(self, group):
+        """
+        Название лиги группы или None, если оно не найдено.
+
+        :param group: Группа игр.
+        """
+        league_name_element = group.select_one('.league-name')
+        if league_name_element is None:
+            return None
+        return league_name_element.text
+
+    def group_matches(self, group) -> list:
+        """
+        Извлечение игр группы. Игры без двух команд, двух счетов
+        или времени пропускаются.
+
+        :param group: Группа игр.
+        :return: Список FbMatch.
+        """
+        result = []
+        for match in group.select('.home-match-list__item.home-match-info'):
+            team_names = match.select('.match-teams-name .team-name')
+            if len(team_names) != 2:
+                continue
+            scores = match.select('.match-score p span')
+            if len(scores) != 2:
+                continue
+            process_time_element = match.select_one('.match-left-time')
+            if process_time_element is None:
+                continue
+            fb_match = FbMatch(
+                team_0=team_names[0].text.strip(),
+                team_1=team_names[1].text.strip(),
+                score_0=scores[0].text,
+                score_1=scores[1].text,
+                process_time=process_time_element.text.strip(),
+            )
+            found_handicap = False
+            found_ou = False
+            for odds_box in match.select('.home-match-odds-box'):
+                category = odds_box.get('class', '')
+                if 'match-full-odds-handicap' in category and not found_handicap:
+                    found_handicap = True
+                    odds_items = odds_box.select('.team-odds-list .value.font-din')
+                    if len(odds_items) >= 2:
+                        fb_match.handicap_bet_0 = odds_items[0].text
+                        fb_match.handicap_bet_1 = odds_items[1].text
+                elif 'match-full-odds-total' in category and not found_ou:
+                    found_ou = True
+                    odds_items = odds_box.select('.team-odds-list .value.font-din')
+                    if len(odds_items) >= 2:
+                        fb_match.total_bet_0 = odds_items[0].text
+                        fb_match.total_bet_1 = odds_items[1].text
+            result.append(fb_match)
+        return result
+
+
+class FbJsBackend(FbBs4Backend):
+    """
+    Бэкенд режима извлечения в браузере для fb.com: группы собраны
+    скриптом FB_EXTRACT_JS, который принимает список целевых лиг.
+    """
+    name = 'js'
+    script = FB_EXTRACT_JS
+
+    def parse(self, raw: str) -> list:
+        return json.loads(raw)
+
+    def find_groups(self, tree: list) -> list:
+        return tree
+
+    def group_league(self, group: list):
+        return group[0]
+
+    def group_matches(self, group: list) -> list:
+        return [FbMatch(*row) for row in group[1]]
+
+
+FB_BACKENDS = {
+    FbBs4Backend.name: FbBs4Backend,
+    FbJsBackend.name: FbJsBackend,
+}
+
+
+def get_fb_backend(name: str = FB_PARSE_BACKEND):
+    """
+    Возвращает экземпляр бэкенда разбора fb.com по имени.
+
+    :param name: Имя бэкенда ('bs4' или 'js').
+    :return: Экземпляр бэкенда.
+    """
+    if name not in FB_BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд разбора fb.com: {name}")
+    return FB_BACKENDS[name]()
@@ -0,0 +1,354 @@
+"""
+Несколько парсеров во вкладках одного браузера.
+
+Каждый парсер запускает свой Chrome, а при перезапуске через Celery
+старый и новый инстансы работают одновременно - до четырех браузеров
+на два букмекера. BrowserHost запускает один Chrome и открывает в нем
+по окну на парсер (BROWSER_HOST_TARGETS): новый букмекер стоит одной
+вкладки, а не целого браузера.
+
+Парсеры работают в одном цикле событий и получают вместо своего
+драйвера TabDriver. Все вкладки используют один поток команд
+WebDriver, поэтому команды разных парсеров идут по очереди в порядке
+вызова, а перед командой драйвер переключается на окно (и фрейм)
+своей вкладки. Вкладки открываются отдельными окнами, а фоновое
+замедление страниц отключено: иначе Chrome приостанавливает таймеры
+скрытых страниц, и данные в них перестают обновляться.
+
+Парсер не закрывает свое окно между попытками, а потерянное окно
+открывается заново. Отдельной задачи Celery у парсера нет, поэтому
+парсер, завершивший работу (исчерпал попытки или упал), BrowserHost
+запускает снова через BROWSER_HOST_RESTART_DELAY секунд.
+
+Ограничения: прокси и масштаб по умолчанию (change_zoom akty.com)
+общие для всех вкладок; ожидание MutationObserver занимает общий поток,
+поэтому в общем браузере оно не дольше BROWSER_HOST_WATCH_TIMEOUT.
+"""
+import os
+import asyncio
+import traceback
+import undetected_chromedriver as uc
+from concurrent.futures import ThreadPoolExecutor
+from selenium.common.exceptions import (
+    NoSuchWindowException,
+    WebDriverException
+)
+from app.logging import setup_logger
+from fetch_data.driver import AsyncDriver
+from fetch_data.chrome import (
+    ChromeMemoryMonitor,
+    LEAN_CHROME,
+    block_resources,
+    lean_options
+)
+from fetch_data.session import profile_dir
+
+logger = setup_logger('browser_host', 'browser_host_debug.log')
+
+# Запуск парсеров во вкладках общего браузера (задача Celery 'Host')
+BROWSER_HOST = os.getenv('BROWSER_HOST', '0') == '1'
+# Парсеры общего браузера (имена из fetch_data.parsers) через запятую
+BROWSER_HOST_TARGETS = [
+    name.strip() for name in
+    os.getenv('BROWSER_HOST_TARGETS', 'FetchAkty,FB').split(',')
+    if name.strip()
+]
+# Максимальное ожидание MutationObserver за вызов в общем браузере,
+# секунды: на это время остальные вкладки ждут своей очереди
+BROWSER_HOST_WATCH_TIMEOUT = float(
+    os.getenv('BROWSER_HOST_WATCH_TIMEOUT', 1)
+)
+# Пауза перед повторным запуском остановившегося парсера, секунды
+BROWSER_HOST_RESTART_DELAY = float(
+    os.getenv('BROWSER_HOST_RESTART_DELAY', 30)
+)
+PROXY = os.getenv('PROXY')
+HEADLESS = True
+# Скрытые и фоновые страницы работают без замедления
+BACKGROUND_ARGUMENTS = (
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+)
+BACKGROUND_DISABLED_FEATURES = ('IntensiveWakeUpThrottling',)
+
+
+class TabDriver(AsyncDriver):
+    """
+    Вкладка общего браузера: фасад AsyncDriver, который перед каждой
+    командой переключает драйвер на свое окно.
+    """
+    owns_browser = False
+
+    def __init__(
+            self,
+            host,
+            handle: str,
+            log=None
+    ):
+        """
+        :param host: Общий браузер (BrowserHost).
+        :param handle: Идентификатор окна вкладки.
+        :param log: Корутина для логирования сообщений.
+        """
+        # До AsyncDriver.__init__: он задает script_timeout
+        self.host = host
+        super().__init__(host.driver, log=log, executor=host.executor)
+        self.handle = handle
+
+    @property
+    def script_timeout(self) -> float | None:
+        # Таймаут общий для всех окон сессии WebDriver
+        return self.host.script_timeout
+
+    @script_timeout.setter
+    def script_timeout(self, seconds: float | None) -> None:
+        self.host.script_timeout = seconds
+
+    def _focus(self) -> None:
+        if self.host.focus == self.handle:
+            return
+        try:
+            self.driver.switch_to.window(self.handle)
+        except NoSuchWindowException:
+            # Окно закрыто (например, самой страницей): парсер
+            # продолжит работу в новом окне
+            self.handle = self.host.new_window()
+            self.frame = None
+            return
+        self.host.focus = self.handle
+        if self.frame is not None:
+            try:
+                self.driver.switch_to.frame(self.frame)
+            except WebDriverException:
+                # Страница перезагружена, фрейма больше нет
+                self.frame = None
+
+    async def get(self, url: str) -> None:
+        """
+        Переход вкладки по адресу (фрейм после перехода не сохраняется).
+
+        :param url: Адрес страницы.
+        """
+        self.frame = None
+        await self.call(self.driver.get, url)
+
+    async def quit(self) -> None:
+        """
+        Уход вкладки со страницы. Парсер вызывает quit после каждой
+        неудачной попытки и продолжает в том же окне, поэтому окно
+        не закрывается: окна и браузер закрывает BrowserHost.
+        """
+        try:
+            await self.get('about:blank')
+        except WebDriverException:
+            pass
+
+    def shutdown(self) -> None:
+        """
+        Поток команд общий, его останавливает BrowserHost.
+        """
+
+
+class BrowserHost:
+    """
+    Один Chrome с парсерами во вкладках. Интерфейс как у парсеров
+    (run, close), поэтому запускается той же задачей Celery.
+    """
+
+    def __init__(
+            self,
+            targets: list = BROWSER_HOST_TARGETS,
+            proxy: str | None = PROXY,
+            watch_timeout: float = BROWSER_HOST_WATCH_TIMEOUT,
+            restart_delay: float = BROWSER_HOST_RESTART_DELAY
+    ):
+        """
+        :param targets: Имена парсеров из fetch_data.parsers.
+        :param proxy: Прокси для всего браузера.
+        :param watch_timeout: Максимальное ожидание MutationObserver
+        за вызов, секунды.
+        :param restart_delay: Пауза перед повторным запуском
+        остановившегося парсера, секунды.
+        """
+        # Реестр парсеров импортирует этот модуль
+        from fetch_data.parsers import all_parsers
+
+        self.proxy = proxy
+        self.restart_delay = restart_delay
+        self.profile = profile_dir('host')
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.driver = self.loop.run_until_complete(
+            self.get_driver(headless=HEADLESS)
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='webdriver'
+        )
+        # Окно, на которое сейчас переключен драйвер (меняется только
+        # в потоке команд)
+        self.focus = self.driver.current_window_handle
+        # Последний установленный таймаут execute_async_script (общий
+        # для всех окон)
+        self.script_timeout = None
+        self.memory = ChromeMemoryMonitor(self.driver, log=self.send_to_logs)
+        self.parsers = []
+        for name in targets:
+            parser = all_parsers[name](browser=self.open_tab())
+            parser.watcher.timeout = min(parser.watcher.timeout, watch_timeout)
+            self.parsers.append(parser)
+
+    async def get_driver(
+            self,
+            headless: bool = False,
+            retries: int = 3
+    ) -> uc.Chrome:
+        """
+        Инициализирует и возвращает WebDriver общего браузера.
+
+        :param headless: Запуск браузера в headless режиме.
+        :param retries: Количество попыток запуска WebDriver в случае ошибки.
+        :return: WebDriver для браузера Chrome.
+        """
+        options = uc.ChromeOptions()
+        if self.proxy:
+            options.add_argument(f'--proxy-server={self.proxy}')
+        if LEAN_CHROME:
+            lean_options(
+                options, disabled_features=BACKGROUND_DISABLED_FEATURES
+            )
+        else:
+            options.add_argument(
+                f"--disable-features={','.join(BACKGROUND_DISABLED_FEATURES)}"
+            )
+        for argument in BACKGROUND_ARGUMENTS:
+            options.add_argument(argument)
+
+        attempt = 0
+        while attempt < retries:
+            try:
+                return uc.Chrome(
+                    options=options,
+                    headless=headless,
+                    user_data_dir=self.profile
+                )
+            except WebDriverException as e:
+                attempt += 1
+                logger.error(
+                    f"Ошибка при запуске драйвера "
+                    f"(попытка {attempt} из {retries}): {e}")
+                if attempt >= retries:
+                    raise e
+                await asyncio.sleep(5)  # Ожидание перед повторной попыткой
+
+    def open_tab(self) -> TabDriver:
+        """
+        Окно для очередного парсера. Первый парсер получает окно,
+        открытое при запуске браузера. Вызывается до запуска парсеров,
+        поэтому драйвер используется напрямую.
+
+        :return: Вкладка.
+        """
+        if self.parsers:
+            return TabDriver(self, self.new_window())
+        self.prepare_window()
+        return TabDriver(self, self.focus)
+
+    def new_window(self) -> str:
+        """
+        Открытие нового окна и переключение на него (в потоке команд
+        или до запуска парсеров).
+
+        :return: Идентификатор окна.
+        """
+        self.driver.switch_to.new_window('window')
+        self.prepare_window()
+        return self.focus
+
+    def prepare_window(self) -> None:
+        """
+        Настройка текущего окна драйвера.
+        """
+        self.focus = self.driver.current_window_handle
+        if LEAN_CHROME:
+            # Блокировка задается для каждой вкладки отдельно
+            try:
+                block_resources(self.driver)
+            except WebDriverException as e:
+                logger.error(f"Не удалось заблокировать ресурсы: {e}")
+
+    async def send_to_logs(
+            self,
+            message: str
+    ):
+        """
+        Логирование сообщений.
+
+        :param message: Сообщение для логирования.
+        """
+        logger.info(message)
+
+    async def run(self, *args, **kwargs):
+        """
+        Запуск всех парсеров в одном цикле событий. Остановка одного
+        парсера не останавливает остальные.
+        """
+        await self.send_to_logs(
+            f"Парсеры в общем браузере: "
+            f"{', '.join(type(parser).__name__ for parser in self.parsers)}"
+        )
+        self.memory.start()
+        await asyncio.gather(
+            *(self.keep_running(parser, *args, **kwargs)
+              for parser in self.parsers)
+        )
+
+    async def keep_running(self, parser, *args, **kwargs):
+        """
+        Работа парсера, пока работает общий браузер: завершившийся
+        парсер запускается снова через self.restart_delay секунд
+        (задача Celery 'Host' продолжает работать, и перезапустить
+        парсер больше некому).
+
+        :param parser: Парсер во вкладке.
+        """
+        name = type(parser).__name__
+        while True:
+            try:
+                await parser.run(*args, **kwargs)
+                await self.send_to_logs(f"Парсер {name} остановлен")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.send_to_logs(
+                    f"Парсер {name} остановлен с ошибкой: "
+                    f"{''.join(traceback.format_exception(e))}"
+                )
+            await self.send_to_logs(
+                f"Перезапуск {name} через {self.restart_delay:.0f} с"
+            )
+            await asyncio.sleep(self.restart_delay)
+
+    async def close(self):
+        for parser in self.parsers:
+            try:
+                await parser.close()
+            except Exception as e:
+                await self.send_to_logs(
+                    f"Ошибка остановки {type(parser).__name__}: {e}"
+                )
+        await self.memory.close()
+        if self.driver:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.driver.quit
+                )
+            except WebDriverException:
+                pass
+            self.executor.shutdown(wait=False)
+            self.driver = None
+            await self.send_to_logs("Общий браузер закрыт")
+
+    def __del__(self):
+        if getattr(self, 'driver', None):
+            self.driver.quit()
@@ -0,0 +1,358 @@
+"""
+JavaScript, выполняемый в браузере через `execute_script`.
+
+Скрипты извлечения обходят DOM внутри страницы и возвращают компактную
+JSON-строку со строками игр, повторяя логику эталонных бэкендов bs4 из
+fetch_data.backends. Строки игр передаются массивами в порядке полей
+AktyMatch и FbMatch соответственно.
+"""
+
+# Аргумент arguments[0] - элемент контейнера `v-scroll-content`.
+# Результат: [{league, collapsed, matches}], где matches равен null,
+# если разметка карточки не распознана.
+AKTY_EXTRACT_JS = r"""
+var root = arguments[0];
+var CARD_CLASS = 'list-card-wrap 1 v-scroll-item 1 relative-position';
+
+function cls(el) {
+    return (el.getAttribute('class') || '').trim().split(/\s+/).join(' ');
+}
+function hasCls(el, name) {
+    return (' ' + cls(el) + ' ').indexOf(' ' + name + ' ') !== -1;
+}
+function all(el, tag, test) {
+    var nodes = el.getElementsByTagName(tag), result = [];
+    for (var i = 0; i < nodes.length; i++) {
+        if (test(nodes[i])) result.push(nodes[i]);
+    }
+    return result;
+}
+function first(el, tag, test) {
+    var nodes = el.getElementsByTagName(tag);
+    for (var i = 0; i < nodes.length; i++) {
+        if (test(nodes[i])) return nodes[i];
+    }
+    return null;
+}
+function pair(el) {
+    var spans = all(el, 'span', function (s) { return hasCls(s, 'highlight-odds'); });
+    return [
+        spans.length > 0 ? spans[0].textContent : '',
+        spans.length > 1 ? spans[1].textContent : ''
+    ];
+}
+function teamName(team) {
+    return first(team, 'div', function (e) {
+        return cls(e).indexOf('allow-user-select') !== -1;
+    }).textContent;
+}
+function teamScore(team) {
+    var score = first(team, 'div', function (e) { return hasCls(e, 'score'); });
+    if (!score) return '';
+    return first(score, 'span', function () { return true; }).textContent;
+}
+function cardMatches(card) {
+    var matches = [], bets = null;
+    all(card, 'div', function (e) { return e.id === 'list-mid-undefined'; })
+        .forEach(function (mid) {
+            var team0 = first(mid, 'div', function (e) {
+                return cls(e) === 'row-item team-item';
+            });
+            var team1 = first(mid, 'div', function (e) {
+                return cls(e) === 'row-item team-item soon';
+            });
+            if (!team0 || !team1) return;
+            if (bets === null) {
+                bets = all(card, 'div', function (e) { return hasCls(e, 'handicap-col'); });
+            }
+            if (bets.length < 3) throw new Error('handicap-col');
+            var handicap = pair(bets[1]), total = pair(bets[2]);
+            var timer = first(mid, 'span', function (e) { return hasCls(e, 'timer-layout2'); });
+            matches.push([
+                teamName(team0), teamName(team1),
+                teamScore(team0), teamScore(team1),
+                handicap[0], handicap[1], total[0], total[1],
+                timer ? timer.textContent : ''
+            ]);
+        });
+    return matches;
+}
+
+var isScroll = function (e) { return cls(e) === 'v-scroll-content relative-position'; };
+var scroll = isScroll(root) ? root : first(root, 'div', isScroll);
+var cards = [];
+if (scroll) {
+    for (var i = 0; i < scroll.children.length; i++) {
+        var card = scroll.children[i];
+        if (card.tagName !== 'DIV' || cls(card).indexOf(CARD_CLASS) === -1) continue;
+        var league = first(card, 'span', function (e) {
+            return cls(e) === 'ellipsis allow-user-select';
+        });
+        if (league) {
+            cards.push({
+                league: league.textContent,
+                collapsed: /height:\s*37px;/.test(card.getAttribute('style') || '')
+            });
+            continue;
+        }
+        var matches;
+        try {
+            matches = cardMatches(card);
+        } catch (e) {
+            matches = null;
+        }
+        cards.push({league: null, collapsed: false, matches: matches});
+    }
+}
+return JSON.stringify(cards);
+"""
+
+# Аргумент arguments[0] - список названий целевых лиг.
+# Результат: [[league, [match, ...]], ...] только для целевых лиг.
+FB_EXTRACT_JS = r"""
+var targets = arguments[0];
+var groups = [];
+document.querySelectorAll('.home-match-list-box .group-matches').forEach(function (group) {
+    var league = group.querySelector('.league-name');
+    if (!league || targets.indexOf(league.textContent) === -1) return;
+    var matches = [];
+    group.querySelectorAll('.home-match-list__item.home-match-info').forEach(function (match) {
+        var teams = match.querySelectorAll('.match-teams-name .team-name');
+        if (teams.length !== 2) return;
+        var scores = match.querySelectorAll('.match-score p span');
+        if (scores.length !== 2) return;
+        var time = match.querySelector('.match-left-time');
+        if (!time) return;
+        var handicap = ['', ''], total = ['', ''];
+        var foundHandicap = false, foundTotal = false;
+        match.querySelectorAll('.home-match-odds-box').forEach(function (box) {
+            var items;
+            if (box.classList.contains('match-full-odds-handicap') && !foundHandicap) {
+                foundHandicap = true;
+                items = box.querySelectorAll('.team-odds-list .value.font-din');
+                if (items.length >= 2) handicap = [items[0].textContent, items[1].textContent];
+            } else if (box.classList.contains('match-full-odds-total') && !foundTotal) {
+                foundTotal = true;
+                items = box.querySelectorAll('.team-odds-list .value.font-din');
+                if (items.length >= 2) total = [items[0].textContent, items[1].textContent];
+            }
+        });
+        matches.push([
+            teams[0].textContent.trim(), teams[1].textContent.trim(),
+            scores[0].textContent, scores[1].textContent,
+            time.textContent.trim(),
+            handicap[0], handicap[1], total[0], total[1]
+        ]);
+    });
+    groups.push([league.textContent, matches]);
+});
+return JSON.stringify(groups);
+"""
+
+# Установка MutationObserver на контейнер с играми.
+# arguments[0] - элемент контейнера или null, arguments[1] - CSS-селектор
+# контейнера, если элемент не передан (по умолчанию document.body).
+# Наблюдатель только отмечает, что контейнер изменился: данные все равно
+# извлекаются одним снимком всего контейнера.
+WATCH_INSTALL_JS = r"""
+var target = arguments[0] || (arguments[1] && document.querySelector(arguments[1]))
+    || document.body;
+var old = window.__parserWatch;
+if (old && old.target === target && target.isConnected) return false;
+if (old) old.observer.disconnect();
+
+var watch = {target: target, dirty: false, waiters: []};
+watch.observer = new MutationObserver(function () {
+    watch.dirty = true;
+    var waiters = watch.waiters;
+    watch.waiters = [];
+    waiters.forEach(function (waiter) { waiter(); });
+});
+watch.observer.observe(target, {
+    subtree: true, childList: true, characterData: true, attributes: true
+});
+window.__parserWatch = watch;
+return true;
+"""
+
+# Ожидание изменений (execute_async_script).
+# arguments[0] - максимальное время ожидания в мс, arguments[1] - пауза
+# в мс для объединения пачки мутаций. Возвращает true при изменении,
+# false по таймауту или null, если наблюдатель потерян (перезагрузка
+# страницы или замена контейнера).
+WATCH_WAIT_JS = r"""
+var timeout = arguments[0], settle = arguments[1];
+var done = arguments[arguments.length - 1];
+var watch = window.__parserWatch;
+if (!watch || !watch.target.isConnected) {
+    done(null);
+    return;
+}
+function flush() {
+    watch.dirty = false;
+    done(true);
+}
+if (watch.dirty) {
+    flush();
+    return;
+}
+var waiter = function () {
+    clearTimeout(timer);
+    setTimeout(flush, settle);
+};
+var timer = setTimeout(function () {
+    watch.waiters = watch.waiters.filter(function (w) { return w !== waiter; });
+    done(false);
+}, timeout);
+watch.waiters.push(waiter);
+"""
+
+# Видимая всплывающая подсказка fb.com с полным названием команды
+FB_TOOLTIP_SELECTOR = (
+    'div[role="complementary"].q-tooltip--style.q-position-engine'
+    '.no-pointer-events[style*="visibility: visible"]'
+)
+
+# Текст видимой подсказки или null.
+FB_TOOLTIP_JS = r"""
+var tooltip = document.querySelector(arguments[0]);
+return tooltip ? tooltip.textContent.trim() : null;
+"""
+
+# Полные названия команд за один проход (execute_async_script).
+# arguments[0] - короткие названия, arguments[1] - селектор подсказки,
+# arguments[2] - ожидание появления (и скрытия) подсказки в мс.
+# Сначала полное название ищется в атрибутах элемента (title,
+# data-title, aria-label), затем подсказки вызываются по очереди
+# событиями мыши. Подсказка, видимая до наведения (еще не скрытая
+# подсказка предыдущей команды), не засчитывается. Результат:
+# {короткое название: полное или null}.
+FB_TEAM_NAMES_JS = r"""
+var names = arguments[0], tooltipSelector = arguments[1], delay = arguments[2];
+var done = arguments[arguments.length - 1];
+var elements = {};
+document.querySelectorAll('.match-teams-name .team-name').forEach(function (el) {
+    var text = el.textContent.trim();
+    if (!(text in elements)) elements[text] = el;
+});
+
+function fromAttributes(el) {
+    for (var node = el; node && node !== document.body; node = node.parentElement) {
+        var attrs = ['title', 'data-title', 'aria-label'];
+        for (var i = 0; i < attrs.length; i++) {
+            var value = node.getAttribute(attrs[i]);
+            if (value && value.trim()) return value.trim();
+        }
+        if (node.classList.contains('match-teams-name')) break;
+    }
+    return null;
+}
+function hoverTargets(el) {
+    var targets = [];
+    for (var node = el; node && node !== document.body; node = node.parentElement) {
+        targets.push(node);
+        if (node.classList.contains('match-teams-name')) break;
+    }
+    return targets;
+}
+function fire(targets, type) {
+    targets.forEach(function (node) {
+        node.dispatchEvent(new MouseEvent(type, {bubbles: type.indexOf('enter') === -1
+            && type.indexOf('leave') === -1, view: window}));
+    });
+}
+
+var result = {}, queue = [];
+names.forEach(function (name) {
+    var el = elements[name];
+    if (!el) {
+        result[name] = null;
+        return;
+    }
+    var full = fromAttributes(el);
+    if (full && full !== name) {
+        result[name] = full;
+    } else {
+        queue.push(name);
+    }
+});
+
+// Проверка check каждые 25 мс, пока она не вернет значение или не
+// истечет timeout; callback получает последнее значение
+function poll(check, timeout, callback) {
+    var started = Date.now();
+    (function step() {
+        var value = check();
+        if (value || Date.now() - started >= timeout) {
+            callback(value);
+            return;
+        }
+        setTimeout(step, 25);
+    })();
+}
+function visibleTooltips() {
+    return Array.prototype.map.call(
+        document.querySelectorAll(tooltipSelector),
+        function (el) { return {el: el, text: el.textContent.trim()}; }
+    );
+}
+
+function next() {
+    if (!queue.length) {
+        done(result);
+        return;
+    }
+    var name = queue.shift(), targets = hoverTargets(elements[name]);
+    var stale = visibleTooltips();
+    fire(targets, 'mouseover');
+    fire(targets, 'mouseenter');
+    poll(function () {
+        var fresh = visibleTooltips().filter(function (tooltip) {
+            return tooltip.text && !stale.some(function (old) {
+                return old.el === tooltip.el && old.text === tooltip.text;
+            });
+        });
+        return fresh.length ? fresh[0].text : null;
+    }, delay, function (text) {
+        result[name] = text;
+        fire(targets, 'mouseout');
+        fire(targets, 'mouseleave');
+        // Следующая команда наводится после скрытия подсказки
+        poll(function () {
+            return !document.querySelector(tooltipSelector);
+        }, delay, next);
+    });
+}
+next();
+"""
+
+# Восстановление localStorage сохраненной сессии
+# (Page.addScriptToEvaluateOnNewDocument, до скриптов страницы).
+# Вызывается с объектом {origin: {key: value}}; существующие ключи
+# не перезаписываются.
+RESTORE_STORAGE_JS = r"""
+(function (storage) {
+    var items = storage[location.origin];
+    if (!items) return;
+    try {
+        for (var key in items) {
+            if (localStorage.getItem(key) === null) {
+                localStorage.setItem(key, items[key]);
+            }
+        }
+    } catch (e) {
+        // localStorage недоступен (например, sandbox iframe)
+    }
+})
+"""
+
+# Готовность элемента к клику: элемент отрисован, и точка в его центре
+# не перекрыта другим элементом (загрузочным слоем, модальным окном).
+# arguments[0] - элемент. Результат: true или false.
+ELEMENT_INTERACTABLE_JS = r"""
+var e = arguments[0];
+var r = e.getBoundingClientRect();
+if (!r.width || !r.height) return false;
+var t = document.elementFromPoint(r.left + r.width / 2, r.top + r.height / 2);
+return !!t && (t === e || e.contains(t));
+"""
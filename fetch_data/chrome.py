@@ -0,0 +1,251 @@
+"""
+Облегченный режим Chrome для парсеров.
+
+Парсеры работают часами на страницах с картинками, шрифтами, видео
+и аналитикой, а при перезапуске одновременно работают старый и новый
+браузер, поэтому память Chrome ограничивает число парсеров на сервере.
+В облегченном режиме (LEAN_CHROME=1):
+
+- запросы тяжелых ресурсов блокируются через CDP `Network.setBlockedURLs`
+  по шаблонам адресов (CHROME_BLOCKED_URLS). SVG не блокируются:
+  по ним находятся кнопки разделов;
+- отключены фоновые службы и функции Chrome, которые парсеру не нужны
+  (синхронизация, обновление компонентов, перевод, back-forward cache);
+- ограничены дисковый кэш и куча V8 страницы.
+
+ChromeMemoryMonitor раз в CHROME_RSS_INTERVAL секунд пишет в лог
+суммарный RSS всех процессов браузера (по /proc, только Linux).
+"""
+import os
+import asyncio
+
+# Облегченный режим включается явно: блокировка ресурсов и ограничения
+# еще не проверены на обоих сайтах
+LEAN_CHROME = os.getenv('LEAN_CHROME', '0') == '1'
+# Шаблоны блокируемых адресов через запятую, пустая строка отключает
+CHROME_BLOCKED_URLS = [
+    pattern.strip() for pattern in os.getenv(
+        'CHROME_BLOCKED_URLS',
+        '*.png,*.jpg,*.jpeg,*.gif,*.webp,*.avif,*.ico,'
+        '*.woff,*.woff2,*.ttf,*.otf,*.eot,'
+        '*.mp4,*.webm,*.m3u8,*.mp3,'
+        '*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,'
+        '*mc.yandex.ru*,*hm.baidu.com*,*cnzz.com*'
+    ).split(',') if pattern.strip()
+]
+# Размер дискового кэша, байты
+CHROME_DISK_CACHE_SIZE = int(os.getenv('CHROME_DISK_CACHE_SIZE', 32 * 2 ** 20))
+# Максимальный размер кучи V8 процесса страницы, МБ
+CHROME_JS_HEAP_MB = int(os.getenv('CHROME_JS_HEAP_MB', 512))
+# Интервал записи памяти Chrome в лог, секунды (0 - только при остановке)
+CHROME_RSS_INTERVAL = float(os.getenv('CHROME_RSS_INTERVAL', 300))
+# Аргументы запуска облегченного режима
+LEAN_ARGUMENTS = (
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-domain-reliability',
+    '--disable-extensions',
+    '--disable-notifications',
+    '--disable-sync',
+    '--disable-breakpad',
+    '--mute-audio',
+    '--no-first-run',
+)
+# Функции Chrome, отключаемые в облегченном режиме
+LEAN_DISABLED_FEATURES = (
+    'Translate',
+    'MediaRouter',
+    'OptimizationHints',
+    'BackForwardCache',
+    'AutofillServerCommunication',
+)
+
+
+def lean_options(
+        options,
+        disk_cache_size: int = CHROME_DISK_CACHE_SIZE,
+        js_heap_mb: int = CHROME_JS_HEAP_MB,
+        disabled_features: tuple = ()
+):
+    """
+    Добавление аргументов облегченного режима в настройки запуска.
+
+    :param options: uc.ChromeOptions.
+    :param disk_cache_size: Размер дискового кэша, байты.
+    :param js_heap_mb: Максимальный размер кучи V8, МБ.
+    :param disabled_features: Дополнительные отключаемые функции
+    (Chrome учитывает только последний аргумент --disable-features).
+    :return: Те же настройки.
+    """
+    for argument in LEAN_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_argument(
+        f"--disable-features="
+        f"{','.join(LEAN_DISABLED_FEATURES + tuple(disabled_features))}"
+    )
+    options.add_argument(f'--disk-cache-size={disk_cache_size}')
+    options.add_argument(f'--js-flags=--max-old-space-size={js_heap_mb}')
+    return options
+
+
+def block_resources(
+        driver,
+        patterns: list = CHROME_BLOCKED_URLS
+) -> None:
+    """
+    Блокировка запросов по шаблонам адресов для вкладки драйвера.
+    Действует до закрытия вкладки, в том числе после переходов.
+
+    :param driver: WebDriver.
+    :param patterns: Шаблоны адресов (`*` - любая подстрока).
+    """
+    if not patterns:
+        return
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+
+def process_tree(pid: int) -> list:
+    """
+    Процесс и все его потомки.
+
+    :param pid: Идентификатор корневого процесса.
+    :return: Список идентификаторов.
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # Имя процесса в скобках может содержать пробелы
+        parent = int(stat.rsplit(b')', 1)[1].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def process_rss(pid: int) -> tuple:
+    """
+    Тип процесса Chrome и его RSS.
+
+    :param pid: Идентификатор процесса.
+    :return: Кортеж (тип: 'browser', 'renderer', 'gpu-process', ...;
+    RSS в байтах). Для завершившегося процесса RSS равен 0.
+    """
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as file:
+            arguments = file.read().split(b'\0')
+        with open(f'/proc/{pid}/status', 'rb') as file:
+            status = file.read()
+    except OSError:
+        return 'exited', 0
+    kind = 'browser'
+    for argument in arguments:
+        if argument.startswith(b'--type='):
+            kind = argument[7:].decode('utf-8', errors='replace')
+            break
+    for line in status.splitlines():
+        if line.startswith(b'VmRSS:'):
+            return kind, int(line.split()[1]) * 1024
+    return kind, 0
+
+
+def chrome_memory(pid: int) -> dict:
+    """
+    RSS процессов браузера по типам.
+
+    :param pid: Идентификатор главного процесса Chrome.
+    :return: `{тип: [количество процессов, RSS в байтах]}`.
+    """
+    memory = {}
+    for child in process_tree(pid):
+        kind, rss = process_rss(child)
+        if rss:
+            entry = memory.setdefault(kind, [0, 0])
+            entry[0] += 1
+            entry[1] += rss
+    return memory
+
+
+def format_memory(memory: dict) -> str:
+    """
+    Строка для лога: суммарный RSS и RSS по типам процессов, МБ.
+    """
+    total = sum(rss for _, rss in memory.values())
+    count = sum(count for count, _ in memory.values())
+    kinds = ', '.join(
+        f'{kind} {rss / 2 ** 20:.0f}' for kind, (_, rss) in sorted(
+            memory.items(), key=lambda item: -item[1][1]
+        )
+    )
+    return f"{total / 2 ** 20:.0f} МБ в {count} процессах ({kinds})"
+
+
+class ChromeMemoryMonitor:
+    """
+    Периодическая запись памяти процессов браузера в лог.
+    """
+
+    def __init__(
+            self,
+            driver,
+            log,
+            interval: float = CHROME_RSS_INTERVAL
+    ):
+        """
+        :param driver: WebDriver (undetected_chromedriver знает PID
+        браузера, для других драйверов монитор ничего не делает).
+        :param log: Корутина для логирования сообщений.
+        :param interval: Интервал записи, секунды (0 - только report()).
+        """
+        self.pid = getattr(driver, 'browser_pid', None)
+        self.log = log
+        self.interval = interval
+        self.task = None
+        # Максимальный суммарный RSS за время работы, байты
+        self.peak = 0
+
+    def start(self) -> None:
+        """
+        Запуск периодической записи в текущем цикле событий.
+        """
+        if self.task is None and self.pid and self.interval > 0:
+            self.task = asyncio.ensure_future(self._run())
+
+    async def report(self) -> None:
+        """
+        Запись текущей памяти браузера в лог.
+        """
+        if not self.pid:
+            return
+        memory = await asyncio.to_thread(chrome_memory, self.pid)
+        if not memory:
+            return
+        self.peak = max(self.peak, sum(rss for _, rss in memory.values()))
+        await self.log(
+            f"Память Chrome: {format_memory(memory)}, "
+            f"максимум {self.peak / 2 ** 20:.0f} МБ"
+        )
+
+    async def close(self) -> None:
+        """
+        Остановка периодической записи и последняя запись.
+        """
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        await self.report()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.report()
@@ -0,0 +1,201 @@
+"""
+Асинхронный фасад WebDriver.
+
+Команды Selenium (`get`, `execute_script`, `outerHTML`, ожидание
+MutationObserver) - синхронные HTTP-запросы к chromedriver. Выполняясь
+в цикле событий парсера, они останавливали на время работы браузера
+пинги Socket.IO, запись в Redis и стадию перевода. AsyncDriver
+выполняет все команды в отдельном потоке: один поток - одна очередь,
+поэтому команды идут строго по очереди, как и раньше, а цикл событий
+в это время продолжает сетевую работу.
+
+Для каждой команды считаются количество, время выполнения и время
+ожидания в очереди; команды дольше DRIVER_SLOW_COMMAND секунд
+(кроме ожидающих по своей природе) пишутся в лог.
+"""
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Порог записи медленной команды в лог, секунды
+DRIVER_SLOW_COMMAND = float(os.getenv('DRIVER_SLOW_COMMAND', 5))
+# Команды, которые ждут событий в браузере, медленными не считаются
+WAITING_COMMANDS = ('execute_async_script', 'get')
+
+
+class AsyncDriver:
+    """
+    Очередь команд WebDriver в отдельном потоке.
+
+    Методы драйвера доступны как корутины: `await browser.get(url)`,
+    `await browser.execute_script(js, element)`. Методы элементов и
+    ActionChains выполняются через `await browser.call(element.click)`,
+    условия expected_conditions - через `await browser.check(condition)`.
+    """
+    # Браузер принадлежит этому фасаду и закрывается вместе с ним
+    owns_browser = True
+
+    def __init__(
+            self,
+            driver,
+            log=None,
+            slow_command: float = DRIVER_SLOW_COMMAND,
+            executor: ThreadPoolExecutor | None = None
+    ):
+        """
+        :param driver: WebDriver.
+        :param log: Корутина для логирования сообщений.
+        :param slow_command: Порог записи медленной команды, секунды.
+        :param executor: Общий поток команд (вкладки одного браузера)
+        или None - свой поток.
+        """
+        self.driver = driver
+        self.log = log
+        self.slow_command = slow_command
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='webdriver'
+        )
+        # Фрейм, в который переключен драйвер, или None
+        self.frame = None
+        # Последний установленный таймаут execute_async_script, секунды
+        self.script_timeout = None
+        # Команда -> [количество, выполнение, максимум, ожидание в очереди]
+        self.stats = {}
+
+    async def call(
+            self,
+            func,
+            *args,
+            **kwargs
+    ):
+        """
+        Выполнение функции, обращающейся к браузеру, в потоке драйвера.
+
+        :param func: Метод драйвера, элемента или любая функция.
+        :return: Результат функции.
+        """
+        # 'WebDriver.get' -> 'get',
+        # 'element_to_be_clickable.<locals>._predicate' -> 'element_to_be_clickable'
+        name = getattr(func, '__qualname__', type(func).__name__)
+        name = name.split('.<locals>')[0].rsplit('.', 1)[-1]
+        queued = time.perf_counter()
+        timing = []
+
+        def command():
+            started = time.perf_counter()
+            try:
+                self._focus()
+                return func(*args, **kwargs)
+            finally:
+                timing.append((started - queued,
+                               time.perf_counter() - started))
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, command
+            )
+        finally:
+            if timing:
+                await self._record(name, *timing[0])
+
+    async def check(self, condition):
+        """
+        Проверка условия в стиле expected_conditions (функция от
+        драйвера) в потоке драйвера.
+
+        :param condition: Функция, принимающая WebDriver.
+        :return: Результат условия.
+        """
+        return await self.call(condition, self.driver)
+
+    async def attribute(self, name: str):
+        """
+        Чтение свойства драйвера, которое выполняет команду
+        (`current_url`, `page_source`).
+
+        :param name: Имя свойства.
+        """
+        def read():
+            return getattr(self.driver, name)
+
+        read.__qualname__ = name
+        return await self.call(read)
+
+    async def switch_to_frame(self, element) -> None:
+        """
+        Переключение в фрейм. Фрейм запоминается, чтобы вкладка общего
+        браузера возвращалась в него после команд других вкладок.
+
+        :param element: Элемент iframe.
+        """
+        await self.call(self.driver.switch_to.frame, element)
+        self.frame = element
+
+    async def set_script_timeout(self, seconds: float) -> None:
+        """
+        Таймаут execute_async_script. Команда отправляется браузеру
+        только при изменении значения.
+
+        :param seconds: Таймаут, секунды.
+        """
+        if self.script_timeout == seconds:
+            return
+        await self.call(self.driver.set_script_timeout, seconds)
+        self.script_timeout = seconds
+
+    def _focus(self) -> None:
+        """
+        Подготовка драйвера перед командой (в потоке драйвера).
+        У собственного браузера подготовка не нужна.
+        """
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        member = getattr(type(self.driver), name, None)
+        if isinstance(member, property) or not callable(member):
+            raise AttributeError(
+                f"{name}: не метод драйвера, используйте attribute() или call()"
+            )
+        method = getattr(self.driver, name)
+
+        async def _command(*args, **kwargs):
+            return await self.call(method, *args, **kwargs)
+
+        return _command
+
+    async def _record(
+            self,
+            name: str,
+            wait: float,
+            duration: float
+    ) -> None:
+        entry = self.stats.setdefault(name, [0, 0.0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+        entry[2] = max(entry[2], duration)
+        entry[3] += wait
+        if (duration > self.slow_command and name not in WAITING_COMMANDS
+                and self.log):
+            await self.log(
+                f"Медленная команда браузера {name}: {duration:.1f} с"
+            )
+
+    def format_stats(self) -> str:
+        """
+        Строка для лога: команды по суммарному времени выполнения.
+        """
+        return ', '.join(
+            f'{name} {count}x {total:.1f} с (макс. {peak:.2f} с, '
+            f'очередь {wait:.1f} с)'
+            for name, (count, total, peak, wait) in sorted(
+                self.stats.items(), key=lambda item: -item[1][1]
+            )
+        )
+
+    def shutdown(self) -> None:
+        """
+        Остановка потока драйвера (после quit).
+        """
+        self.executor.shutdown(wait=False)
@@ -1,21 +1,48 @@
-import time
 import os
+import time
 import socketio
-import json
 import asyncio
 import redis.asyncio as aioredis
-from bs4 import BeautifulSoup
 from datetime import datetime
 from dotenv import load_dotenv
 from selenium import webdriver
-from googletrans import Translator
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import (
+    JavascriptException,
+    WebDriverException
+)
 from selenium.webdriver.support import expected_conditions as EC
 from app.logging import setup_logger
+from transfer_data.delta import DeltaTracker, match_id
+from transfer_data.records import game_record, opponent
+from transfer_data.codec import encode
+from transfer_data.transport import client_options, connect_client
+from transfer_data.bus import RedisBus, PARSER_BUS
+from transfer_data.state_store import RedisStateStore
+from transfer_data.history import HistoryWriter
+from fetch_data.translation import (
+    RedisTranslationStore,
+    TranslationStage,
+    create_translation_cache
+)
+from fetch_data.backends import FbBs4Backend, get_fb_backend, FB_PARSE_BACKEND
+from fetch_data.watch import DomWatcher, WATCH_MODE
+from fetch_data.driver import AsyncDriver
+from fetch_data.chrome import (
+    ChromeMemoryMonitor,
+    LEAN_CHROME,
+    block_resources,
+    lean_options
+)
+from fetch_data.session import BrowserSession, origin_of, profile_dir
+from fetch_data.startup import wait_until
+from fetch_data.browser_scripts import (
+    FB_TEAM_NAMES_JS,
+    FB_TOOLTIP_JS,
+    FB_TOOLTIP_SELECTOR
+)
 from selenium.webdriver.common.action_chains import ActionChains
 
 # Загрузка переменных окружения из .env файла
@@ -33,6 +60,11 @@ REDIS_URL = os.getenv('REDIS_URL')
 SOCKETIO_URL = os.getenv('SOCKETIO_URL')
 SOCKET_KEY = os.getenv('SOCKET_KEY')
 HEADLESS = True
+# Ожидание появления (и скрытия) подсказки с полным названием команды, мс
+TOOLTIP_DELAY = int(os.getenv('FB_TOOLTIP_DELAY', 300))
+# Сколько названий за один сбор можно получить наведением мыши,
+# если скрипт не нашел их подсказки
+HOVER_FALLBACK_LIMIT = int(os.getenv('FB_HOVER_FALLBACK_LIMIT', 3))
 
 # Настройка логгера
 logger = setup_logger('fb', 'fb_debug.log')
@@ -40,29 +72,81 @@ logger = setup_logger('fb', 'fb_debug.log')
 
 class OddsFetcher:
     def __init__(
-            self
+            self,
+            parse_backend=FB_PARSE_BACKEND,
+            watch_mode=WATCH_MODE,
+            browser=None
     ):
         """
         Инициализация класса OddsFetcher.
         Устанавливает URL и инициализирует WebDriver.
 
-        :param url: URL страницы для загрузки.
-        :param leagues: Список целевых лиг.
-        :param headless: Запуск браузера в headless режиме.
+        :param parse_backend: Бэкенд разбора страницы ('bs4' или 'js'
+        для извлечения данных скриптом в браузере).
+        :param watch_mode: Режим отслеживания изменений ('poll' - опрос
+        раз в секунду, 'observer' - MutationObserver в браузере).
+        :param browser: Вкладка общего браузера
+        (fetch_data.browser_host.TabDriver) или None - свой Chrome.
         """
         self.url = URL
+        self.watch_mode = watch_mode
+        self.backend = get_fb_backend(parse_backend)
+        # Эталонный бэкенд: запасной путь, если скрипт в браузере упал
+        self.fallback_backend = FbBs4Backend()
         self.loop = asyncio.new_event_loop()
-        self.sio = socketio.AsyncSimpleClient()
+        self.sio = socketio.AsyncSimpleClient(**client_options())
+        # Шина обновлений в Redis (PARSER_BUS=redis) вместо Socket.IO
+        self.bus = None
+        # Постоянный профиль Chrome и снимок сессии: после перезапуска
+        # парсер сразу открывает раздел баскетбола
+        self.profile = profile_dir('fb') if browser is None else None
+        self.session = BrowserSession('fb')
+        self.session_restored = False
+        # Время запуска попытки, до первой отправки данных
+        self.started_at = None
         asyncio.set_event_loop(self.loop)
         self.redis_client = None
-        self.driver = self.loop.run_until_complete(
-            self.get_driver(headless=HEADLESS)
-        )
+        if browser is None:
+            self.driver = self.loop.run_until_complete(
+                self.get_driver(headless=HEADLESS)
+            )
+            # Все команды браузера выполняются в отдельном потоке, цикл
+            # событий в это время обслуживает сеть
+            self.browser = AsyncDriver(self.driver, log=self.send_to_logs)
+        else:
+            self.driver = browser.driver
+            self.browser = browser
+            self.browser.log = self.send_to_logs
         self.redis_client = None
+        self.state_store = None
+        # История изменений игр, пишется в Redis фоновой задачей
+        self.history = None
         self.debug = LOCAL_DEBUG
+        # Память процессов Chrome, пишется в лог периодически (память
+        # общего браузера учитывает BrowserHost)
+        self.memory = ChromeMemoryMonitor(
+            self.driver if self.browser.owns_browser else None,
+            log=self.send_to_logs
+        )
         self.actions = ActionChains(self.driver)
-        self.translate_cash = {}
-        self.translator = Translator()
+        self.watcher = DomWatcher(self.browser)
+        self.delta_tracker = DeltaTracker()
+        # Кэш переводов: память, SQLite и Redis (после подключения)
+        self.translate_cash = create_translation_cache(log=self.send_to_logs)
+        # Полные (непереведенные) названия, уже считанные из подсказок
+        self.full_names = {}
+        self.translation_stage = TranslationStage(
+            self.translate_cash,
+            on_translated=self.on_translated,
+            log=self.send_to_logs
+        )
+        # Строки игр последнего сбора, для повторной отправки
+        # после готовности переводов
+        self.last_rows = []
+        # Формирование и отправка данных основным циклом и стадией
+        # перевода по очереди: иначе данные, собранные до перевода,
+        # могут уйти после переведенных
+        self.emit_lock = asyncio.Lock()
 
     async def get_driver(self, headless: bool = False, retries: int = 3) -> uc.Chrome:
         """
@@ -73,10 +157,21 @@ class OddsFetcher:
         :return: WebDriver для браузера Chrome.
         """
         options = uc.ChromeOptions()
+        if LEAN_CHROME:
+            lean_options(options)
         attempt = 0
         while attempt < retries:
             try:
-                driver = uc.Chrome(options=options, headless=headless)
+                driver = uc.Chrome(
+                    options=options,
+                    headless=headless,
+                    user_data_dir=self.profile
+                )
+                if LEAN_CHROME:
+                    try:
+                        block_resources(driver)
+                    except WebDriverException as e:
+                        logger.error(f"Не удалось заблокировать ресурсы: {e}")
                 return driver
             except WebDriverException as e:
                 attempt += 1
@@ -90,7 +185,7 @@ class OddsFetcher:
         """
         Загружает основную страницу по заданному URL.
         """
-        self.driver.get(self.url)
+        await self.browser.get(self.url)
         await self.send_to_logs(
             f"Переход на главную страницу выыполнен {self.url}"
         )
@@ -99,7 +194,8 @@ class OddsFetcher:
             data: dict,
     ):
         """
-        Отправка данных на Socket.IO сервер и сохранение в Redis.
+        Отправка изменений в шину обновлений (или на Socket.IO сервер)
+        и сохранение в Redis.
 
         :param data: Данные для отправки и сохранения.
         """
@@ -109,32 +205,85 @@ class OddsFetcher:
             )
             return
         try:
-            json_data = json.dumps(data, ensure_ascii=False)
-            # Отправляем данные на Socket.IO сервер напрямую
-            await self.sio.emit('message', json_data)
-            # Сохраняем данные в Redis
-            await self.redis_client.set('akty_data', json_data)
+            # Отправляем только изменения (или снимок). Вызывается под
+            # emit_lock: дельты должны уходить в порядке номеров
+            for message in self.delta_tracker.update(data):
+                await self.publish(message)
+                if self.history:
+                    self.history.record(message)
+            # Сохраняем данные в Redis (только поле своего букмекера)
+            await self.state_store.save(data)
+            if self.started_at is not None:
+                await self.send_to_logs(
+                    f"Первые данные отправлены через "
+                    f"{time.monotonic() - self.started_at:.1f} с после "
+                    f"запуска (сессия "
+                    f"{'восстановлена' if self.session_restored else 'новая'})"
+                )
+                self.started_at = None
         except Exception as e:
             await self.send_to_logs(f'Ошибка при отправке данных: {str(e)}')
 
+    async def publish(
+            self,
+            message: dict
+    ) -> None:
+        """
+        Отправка сообщения протокола дельт в шину Redis или, при
+        PARSER_BUS=socketio, на Socket.IO сервер.
+
+        :param message: Снимок или дельта.
+        """
+        payload = encode(message)
+        if self.bus:
+            await self.bus.publish(message['type'], payload)
+        else:
+            await self.sio.emit(message['type'], payload)
+
     async def init_async_components(self):
         """
-        Инициализация асинхронных компонентов, таких как Redis клиент и подключение к Socket.IO.
+        Инициализация асинхронных компонентов, таких как Redis клиент и шина обновлений (или подключение к Socket.IO).
         """
         if self.debug:
             return None
         try:
-            await self.send_to_logs(
-                f"Connecting to Redis at {REDIS_URL}"
-            )
-            self.redis_client = await aioredis.from_url(REDIS_URL)
-            await self.send_to_logs(
-                f"Connecting to Socket.IO server at {SOCKETIO_URL}"
-            )
-            await self.sio.connect(SOCKETIO_URL, auth={'socket_key': SOCKET_KEY})
-            data_str = await self.redis_client.get('translate_cash')
-            if data_str:
-                self.translate_cash = json.loads(data_str.decode('utf-8'))
+            # Клиент Redis и все, что его использует, создаются один раз:
+            # при повторных попытках клиент сам переподключается
+            if self.redis_client is None:
+                await self.send_to_logs(
+                    f"Connecting to Redis at {REDIS_URL}"
+                )
+                self.redis_client = await aioredis.from_url(REDIS_URL)
+                self.state_store = RedisStateStore(self.redis_client)
+                self.history = HistoryWriter(
+                    self.redis_client, log=self.send_to_logs
+                )
+                self.translate_cash.remote = RedisTranslationStore(
+                    self.redis_client
+                )
+                if PARSER_BUS == 'redis':
+                    self.bus = RedisBus(self.redis_client)
+                    await self.send_to_logs(
+                        f"Publishing updates to Redis stream "
+                        f"{self.bus.stream}"
+                    )
+            migrated = await self.translate_cash.remote.migrate_legacy()
+            if migrated:
+                await self.send_to_logs(
+                    f"Перенесено переводов в хэш Redis: {migrated}"
+                )
+            # Клиент Socket.IO остается подключенным между попытками,
+            # повторный connect завершился бы ошибкой
+            if self.bus is None and not self.sio.connected:
+                await self.send_to_logs(
+                    f"Connecting to Socket.IO server at {SOCKETIO_URL}"
+                )
+                transport = await connect_client(
+                    self.sio, SOCKETIO_URL, {'socket_key': SOCKET_KEY}
+                )
+                await self.send_to_logs(f"Socket.IO transport: {transport}")
+            # После подключения сервер должен получить полный снимок
+            self.delta_tracker.request_snapshot()
         except Exception as e:
             print(f"Error initializing async components: {e}")
             raise
@@ -160,25 +309,53 @@ class OddsFetcher:
             timeout: int = 10,
     ) -> WebElement:
         """
-        Ожидает загрузки элемента на странице по заданным критериям.
+        Ожидает, пока элемент станет доступен для клика. Между
+        проверками управление отдается циклу событий.
 
         :param by: Стратегия поиска элемента (например, By.CSS_SELECTOR).
         :param value: Значение для поиска элемента.
         :param timeout: Время ожидания в секундах (по умолчанию 10 секунд).
-        :param is_debug: Для остановки во время отладки.
         :return: Найденный элемент или None,
         если элемент не был найден в течение заданного времени.
         """
+        return await wait_until(
+            lambda: self.browser.check(EC.element_to_be_clickable((by, value))),
+            timeout
+        )
+
+    async def save_session(
+            self
+    ) -> None:
+        """
+        Сохранение сессии после перехода в раздел баскетбола.
+        """
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR,
-                     '.ui-carousel-item.sport-type-item img[src="sport-svg/sport_id_3.svg"]'))
+            resume_url = await self.browser.attribute('current_url')
+            await self.session.save(
+                self.browser,
+                resume_url,
+                [origin_of(self.url), origin_of(resume_url)]
             )
+        except Exception as e:
+            await self.send_to_logs(f"Не удалось сохранить сессию: {e}")
 
-            return element
-        except TimeoutException:
-            return None
+    async def resume_session(
+            self
+    ) -> bool:
+        """
+        Продолжение сохраненной сессии: раздел баскетбола открывается
+        сразу, без главной страницы.
+
+        :return: True, если список игр загружен.
+        """
+        self.session_restored = await self.session.resume(
+            self.browser,
+            '.home-match-list-box',
+            log=self.send_to_logs
+        )
+        if self.session_restored:
+            await self.send_to_logs('Сессия восстановлена')
+        return self.session_restored
 
     async def main_page(
             self
@@ -192,8 +369,9 @@ class OddsFetcher:
             timeout=30
         )
         if basketball_button:
-            basketball_button.click()
+            await self.browser.call(basketball_button.click)
             await self.send_to_logs('Успешный переход в баскетбольную лигу')
+            await self.save_session()
             return
         logger.info(
             f"Внимание! Отсутствие контента на странице,"
@@ -207,48 +385,166 @@ class OddsFetcher:
             'Остановка парсера, не найден <div> с играми после 5 попыток.'
         )
         await self.sio.disconnect()
-        self.driver.quit()
+        await self.browser.quit()
 
     async def get_full_team_name(
             self,
             short_name: str
     ) -> str:
         """
-        Получает полное название команды, используя кэш или выполнив наведение на элемент.
+        Получает полное название команды из кэша переводов или из уже
+        считанных подсказок. Браузер не используется: названия заранее
+        собирает `resolve_full_names`.
+        Пока перевод не готов, возвращается полное название без перевода,
+        а пока неизвестно и оно - короткое название.
         """
         if short_name in self.translate_cash.keys():
             return self.translate_cash[short_name]
+        return self.full_names.get(short_name, short_name)
 
-        time.sleep(1)  # Подождем, чтобы всплывающее окно появилось
-        data_str = await self.redis_client.get('translate_cash')
-        if data_str:
-            self.translate_cash = json.loads(data_str.decode('utf-8'))
-        team1_element = self.driver.find_element(By.XPATH, f"//*[text()='{short_name}']")
-        self.actions.move_to_element(team1_element).perform()
-        time.sleep(2)  # Увеличиваем время ожидания
-
-        full_name_element = self.driver.execute_script("""
-                   var tooltip = document.querySelector('div[role="complementary"].q-tooltip--style.q-position-engine.no-pointer-events[style*="visibility: visible"]');
-                   if (tooltip) {
-                       return tooltip.textContent.trim();
-                   } else {
-                       return null;
-                   }
-               """)
-
-        if full_name_element:
-            translation = self.translator.translate(
-                full_name_element, src='zh-cn',
-                dest='ru'
-            ).text
-            self.translate_cash[short_name] = translation
-            if self.debug:
-                return translation
-            json_data = json.dumps(self.translate_cash, ensure_ascii=False)
-            await self.redis_client.set('translate_cash', json_data)
-            await self.send_to_logs(f"Перевод текста {text} - {translation}")
-            return full_name_element
-        return None
+    async def resolve_full_names(
+            self,
+            short_names: set
+    ) -> None:
+        """
+        Получение полных названий всех новых команд за один проход
+        скриптом в браузере. Названия, для которых скрипт не нашел
+        подсказку, считываются наведением мыши (не больше
+        HOVER_FALLBACK_LIMIT за сбор, остальные - в следующих сборах).
+
+        :param short_names: Короткие названия команд на странице.
+        """
+        unknown = [
+            name for name in short_names
+            if name and name not in self.translate_cash
+            and name not in self.full_names
+        ]
+        if not unknown:
+            return
+        try:
+            await self.browser.set_script_timeout(
+                len(unknown) * (2 * TOOLTIP_DELAY + 50) / 1000 + 10
+            )
+            found = await self.browser.execute_async_script(
+                FB_TEAM_NAMES_JS, unknown, FB_TOOLTIP_SELECTOR, TOOLTIP_DELAY
+            ) or {}
+        except WebDriverException as e:
+            await self.send_to_logs(f'Ошибка получения полных названий: {e}')
+            found = {}
+
+        missing = [name for name in unknown if not found.get(name)]
+        for short_name in missing[:HOVER_FALLBACK_LIMIT]:
+            found[short_name] = await self.hover_full_name(short_name)
+        for short_name, full_name in found.items():
+            if full_name:
+                self.full_names[short_name] = full_name
+                self.translation_stage.request(short_name, full_name)
+
+    async def hover_full_name(
+            self,
+            short_name: str
+    ) -> str | None:
+        """
+        Полное название команды наведением мыши на элемент.
+
+        :param short_name: Короткое название команды.
+        :return: Текст подсказки или None (в том числе если видна
+        прежняя подсказка: ее нельзя отнести к этой команде).
+        """
+        try:
+            team_element = await self.browser.find_element(
+                By.XPATH, f"//*[text()='{short_name}']"
+            )
+            # Подсказка предыдущего наведения еще может быть видна
+            previous = await self.browser.execute_script(
+                FB_TOOLTIP_JS, FB_TOOLTIP_SELECTOR
+            )
+            await self.browser.call(
+                self.actions.move_to_element(team_element).perform
+            )
+            await asyncio.sleep(TOOLTIP_DELAY / 1000)
+            tooltip = await self.browser.execute_script(
+                FB_TOOLTIP_JS, FB_TOOLTIP_SELECTOR
+            )
+            return tooltip if tooltip != previous else None
+        except WebDriverException as e:
+            await self.send_to_logs(
+                f'Не удалось получить подсказку для {short_name}: {e}'
+            )
+            return None
+
+    async def on_translated(
+            self,
+            translations: dict
+    ) -> None:
+        """
+        Повторная отправка последних данных, когда готовы переводы.
+        Вызывается из стадии перевода, поэтому драйвер не используется.
+
+        :param translations: Готовые переводы {короткое название: перевод}.
+        """
+        for short_name in translations:
+            self.full_names.pop(short_name, None)
+        async with self.emit_lock:
+            if self.last_rows:
+                await self.send_and_save_data(
+                    await self.build_odds_data(self.last_rows)
+                )
+
+    async def prefetch_translations(
+            self,
+            short_names: set
+    ) -> None:
+        """
+        Загрузка переводов всех названий страницы, которых еще нет
+        в памяти: сначала из локальной базы SQLite, затем из Redis
+        одним запросом HMGET.
+
+        :param short_names: Короткие названия команд на странице.
+        """
+        await self.translate_cash.load(short_names)
+
+    async def wait_for_changes(self) -> bool:
+        """
+        Ожидание изменений списка игр через MutationObserver.
+        Если наблюдатель потерян, он устанавливается заново.
+
+        :return: True, если список изменился или наблюдатель
+        был установлен заново.
+        """
+        changed = await self.watcher.wait()
+        if changed is None:
+            await self.watcher.install(selector='.home-match-list-box')
+            return True
+        return changed
+
+    async def read_page(
+            self,
+            target_leagues: dict
+    ) -> tuple:
+        """
+        Получение данных страницы: в режиме 'js' группы игр собираются
+        скриптом в браузере, иначе разбирается `page_source`.
+        При ошибке скрипта используется эталонный бэкенд bs4.
+
+        :param target_leagues: Целевые лиги.
+        :return: Кортеж (бэкенд, разобранное дерево).
+        """
+        if self.backend.script:
+            try:
+                raw = await self.browser.execute_script(
+                    self.backend.script, list(target_leagues.keys())
+                )
+                return self.backend, self.backend.parse(raw)
+            except JavascriptException as e:
+                await self.send_to_logs(
+                    f'Ошибка извлечения в браузере, разбор HTML: {e}'
+                )
+        backend = self.fallback_backend if self.backend.script \
+            else self.backend
+        return backend, backend.parse(
+            await self.browser.attribute('page_source')
+        )
 
     async def collect_odds_data(
             self,
@@ -257,112 +553,103 @@ class OddsFetcher:
         """
         Сбор данных о коэффициентах для заданных лиг.
         """
-        active_matches = {"fb.com": {}}
-
         try:
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-            match_groups = soup.select('.home-match-list-box .group-matches')
-            for group in match_groups:
-                league_name_element = group.select_one('.league-name')
-                if league_name_element is None:
+            backend, tree = await self.read_page(target_leagues)
+            rows = []
+            for group in backend.find_groups(tree):
+                league_name = backend.group_league(group)
+                if league_name is None:
                     continue
-                league_name = league_name_element.text
                 if league_name in target_leagues.keys():
-                    if league_name not in active_matches["fb.com"]:
-                        liga_name_translate = target_leagues[league_name]
-                        active_matches["fb.com"][liga_name_translate] = []
-                    matches = group.select(
-                        '.home-match-list__item.home-match-info'
-                    )
-                    for match in matches:
-                        team_names = match.select(
-                            '.match-teams-name .team-name'
-                        )
-                        if len(team_names) != 2:
-                            continue
-
-                        short_team1_name = team_names[0].text.strip()
-                        short_team2_name = team_names[1].text.strip()
-                        full_team1_name = await self.get_full_team_name(
-                            short_team1_name) if short_team1_name != '' else ''
-                        full_team2_name = await self.get_full_team_name(
-                            short_team2_name) if short_team1_name != '' else ''
+                    liga_name_translate = target_leagues[league_name]
+                    for match in backend.group_matches(group):
+                        rows.append((liga_name_translate, match))
+
+            short_names = {match.team_0 for _, match in rows} \
+                | {match.team_1 for _, match in rows}
+            async with self.emit_lock:
+                self.last_rows = rows
+                # Переводы всех названий страницы - одним запросом к Redis,
+                # полные названия новых команд - одним скриптом в браузере
+                await self.prefetch_translations(short_names)
+                await self.resolve_full_names(short_names)
+                await self.send_and_save_data(
+                    await self.build_odds_data(rows)
+                )
 
-                        scores = match.select('.match-score p span')
-                        if len(scores) != 2:
-                            continue
+        except Exception as e:
+            await self.send_to_logs(f"Произошла ошибка: {str(e)}")
 
-                        score1 = scores[0].text
-                        score2 = scores[1].text
+    async def build_odds_data(
+            self,
+            rows: list
+    ) -> dict:
+        """
+        Формирование данных о коэффициентах из собранных строк игр.
 
-                        process_time_element = match.select_one(
-                            '.match-left-time'
-                        )
-                        if process_time_element is None:
-                            continue
-                        process_time = process_time_element.text.strip()
-
-                        server_time = datetime.now().strftime(
-                            '%Y-%m-%d %H:%M:%S'
-                        )
-
-                        odds_data = {
-                            'opponent_0': {
-                                'name': full_team1_name,
-                                'score': score1,
-                                'handicap_bet': "",
-                                'total_bet': ""
-                            },
-                            'opponent_1': {
-                                'name': full_team2_name,
-                                'score': score2,
-                                'handicap_bet': "",
-                                'total_bet': ""
-                            },
-                            'process_time': process_time,
-                            'server_time': server_time
-                        }
-
-                        odds_boxes = match.select('.home-match-odds-box')
-                        found_handicap = False
-                        found_ou = False
-
-                        for odds_box in odds_boxes:
-                            category = odds_box.get('class', '')
-
-                            if 'match-full-odds-handicap' in category and not found_handicap:
-                                found_handicap = True
-                                odds_items = odds_box.select('.team-odds-list .value.font-din')
-                                if len(odds_items) >= 2:
-                                    odds_data['opponent_0']['handicap_bet'] = (
-                                        odds_items[0].text)
-                                    odds_data['opponent_1']['handicap_bet'] = (
-                                        odds_items[1].text)
-
-                            elif ('match-full-odds-total' in category and
-                                  not found_ou):
-                                found_ou = True
-                                odds_items = odds_box.select('.team-odds-list .value.font-din')
-                                if len(odds_items) >= 2:
-                                    odds_data['opponent_0']['total_bet'] = odds_items[0].text
-                                    odds_data['opponent_1']['total_bet'] = odds_items[1].text
-                        active_matches["fb.com"][liga_name_translate].append(odds_data)
-            # await self.send_to_logs(
-            #     f"Данные обновлены: {active_matches}"
-            # )
-            await self.send_and_save_data(active_matches)
+        :param rows: Список (лига, FbMatch).
+        :return: dict
+        """
+        active_matches = {"fb.com": {}}
+        for liga_name_translate, match in rows:
+            full_team1_name = await self.get_full_team_name(
+                match.team_0) if match.team_0 != '' else ''
+            full_team2_name = await self.get_full_team_name(
+                match.team_1) if match.team_1 != '' else ''
+
+            server_time = datetime.now().strftime(
+                '%Y-%m-%d %H:%M:%S'
+            )
 
-        except Exception as e:
-            await self.send_to_logs(f"Произошла ошибка: {str(e)}")
+            odds_data = game_record(
+                id=match_id(
+                    'fb.com', liga_name_translate,
+                    match.team_0, match.team_1
+                ),
+                opponent_0=opponent(
+                    name=full_team1_name,
+                    score=match.score_0,
+                    handicap_bet=match.handicap_bet_0,
+                    total_bet=match.total_bet_0
+                ),
+                opponent_1=opponent(
+                    name=full_team2_name,
+                    score=match.score_1,
+                    handicap_bet=match.handicap_bet_1,
+                    total_bet=match.total_bet_1
+                ),
+                process_time=match.process_time,
+                server_time=server_time
+            )
+            active_matches["fb.com"].setdefault(
+                liga_name_translate, []
+            ).append(odds_data)
+        return active_matches
 
     async def close(self):
+        await self.translation_stage.close()
+        if self.history:
+            await self.history.close()
+            await self.send_to_logs(f"История игр: {self.history.stats}")
+        await self.send_to_logs(
+            f"Кэш переводов (попадания/запросы): "
+            f"{self.translate_cash.format_stats()}"
+        )
+        await self.translate_cash.close()
+        # Клиент Redis закрывается последним: им пользуются история и кэш
+        if self.redis_client:
+            await self.redis_client.aclose()
+        await self.send_to_logs(
+            f"Команды браузера: {self.browser.format_stats()}"
+        )
         if self.driver:
-            self.driver.quit()
+            await self.memory.close()
+            await self.browser.quit()
+            self.browser.shutdown()
             await self.send_to_logs("Драйвер был закрыт принудительно")
 
     def __del__(self):
-        if self.driver:
+        if self.driver and self.browser.owns_browser:
             self.driver.quit()
             print("Драйвер закрыт")
 
@@ -379,15 +666,23 @@ class OddsFetcher:
 
         while attempt < max_retries:
             try:
+                self.started_at = time.monotonic()
+                self.memory.start()
                 await self.init_async_components()
                 leagues = kwargs.get('leagues', LEAGUES)
-                await self.get_url()
-                await self.main_page()
+                if not await self.resume_session():
+                    await self.get_url()
+                    await self.main_page()
                 while True:
                     await self.collect_odds_data(leagues)
-                    await asyncio.sleep(1)  # Пауза между циклами сбора данных
+                    if self.watch_mode == 'observer':
+                        # Следующий сбор - только после изменения списка игр
+                        while not await self.wait_for_changes():
+                            continue
+                    else:
+                        await asyncio.sleep(1)  # Пауза между циклами сбора данных
             except Exception as e:
-                self.driver.save_screenshot(
+                await self.browser.save_screenshot(
                     f'screenshot_fb_{attempt}.png'
                 )
                 await self.send_to_logs(
@@ -400,7 +695,7 @@ class OddsFetcher:
                         "Достигнуто максимальное количество попыток. Остановка.")
                     break
             finally:
-                self.driver.quit()
+                await self.browser.quit()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,22 @@
 from fetch_data.akty import FetchAkty
 from fetch_data.fb import OddsFetcher
+from fetch_data.browser_host import (
+    BROWSER_HOST,
+    BROWSER_HOST_TARGETS,
+    BrowserHost
+)
 
-# Здесь указываем список парсеров, который запускается через Celery
-parsers = {
+# Все парсеры, в том числе для вкладок общего браузера
+all_parsers = {
     'FetchAkty': FetchAkty,
     'FB': OddsFetcher
-}
\ No newline at end of file
+}
+# Здесь указываем список парсеров, который запускается через Celery.
+# С BROWSER_HOST=1 парсеры BROWSER_HOST_TARGETS работают во вкладках
+# одного браузера (задача 'Host'), остальные - как раньше
+parsers = {
+    name: parser for name, parser in all_parsers.items()
+    if not BROWSER_HOST or name not in BROWSER_HOST_TARGETS
+}
+if BROWSER_HOST:
+    parsers['Host'] = BrowserHost
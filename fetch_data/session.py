@@ -0,0 +1,253 @@
+"""
+Сессии браузера парсеров между перезапусками.
+
+Каждый запуск парсера раньше начинался с чистого Chrome: авторизация,
+переходы по страницам и фиксированные паузы занимали около минуты без
+данных. Теперь:
+
+- Chrome запускается с постоянным профилем `{BROWSER_PROFILE_DIR}/
+  {парсер}-{слот}` (кэш страниц, cookies). Новый инстанс парсера
+  стартует, пока старый еще работает, а один профиль не может быть
+  открыт двумя браузерами, поэтому у парсера BROWSER_PROFILE_SLOTS
+  профилей и берется свободный.
+- После входа в нужный раздел сохраняется снимок сессии: все cookies
+  и localStorage страниц (через CDP) и адрес раздела. При следующем
+  запуске снимок восстанавливается в браузер, и парсер сразу открывает
+  сохраненный адрес. Если за SESSION_CHECK_TIMEOUT секунд контент не
+  появился, снимок удаляется и парсер проходит вход заново.
+
+Снимок содержит данные авторизации и записывается с правами 0600.
+"""
+import os
+import json
+import time
+from urllib.parse import urlsplit
+from fetch_data.browser_scripts import RESTORE_STORAGE_JS
+from fetch_data.startup import wait_until
+
+# Каталог профилей Chrome и снимков сессий, пустая строка отключает
+BROWSER_PROFILE_DIR = os.getenv('BROWSER_PROFILE_DIR', 'browser_profiles')
+# Количество профилей на парсер (старый и новый инстанс при перезапуске)
+BROWSER_PROFILE_SLOTS = int(os.getenv('BROWSER_PROFILE_SLOTS', 2))
+# Максимальный возраст снимка сессии, секунды
+SESSION_MAX_AGE = int(os.getenv('SESSION_MAX_AGE', 12 * 3600))
+# Ожидание контента после восстановления сессии, секунды
+SESSION_CHECK_TIMEOUT = int(os.getenv('SESSION_CHECK_TIMEOUT', 20))
+# Поля cookie, которые принимает Network.setCookies
+COOKIE_FIELDS = (
+    'name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite',
+    'expires', 'priority'
+)
+
+
+def origin_of(url: str) -> str:
+    """
+    Origin адреса (схема и хост), как `location.origin`.
+    """
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def profile_locked(path: str) -> bool:
+    """
+    Открыт ли профиль работающим Chrome. Chrome держит в профиле
+    символическую ссылку SingletonLock вида `{хост}-{pid}`; ссылка
+    на завершенный процесс остается после аварийной остановки.
+    """
+    lock = os.path.join(path, 'SingletonLock')
+    if not os.path.lexists(lock):
+        return False
+    try:
+        pid = int(os.readlink(lock).rsplit('-', 1)[1])
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, ValueError, IndexError):
+        # Непонятная ссылка или чужой процесс: считаем профиль занятым
+        return True
+    return True
+
+
+def profile_dir(
+        name: str,
+        directory: str = BROWSER_PROFILE_DIR,
+        slots: int = BROWSER_PROFILE_SLOTS
+) -> str | None:
+    """
+    Свободный постоянный профиль Chrome парсера.
+
+    :param name: Имя парсера.
+    :param directory: Каталог профилей.
+    :param slots: Количество профилей парсера.
+    :return: Абсолютный путь профиля или None (профили отключены или
+    все заняты - Chrome запустится с временным профилем).
+    """
+    if not directory:
+        return None
+    for slot in range(slots):
+        path = os.path.abspath(os.path.join(directory, f'{name}-{slot}'))
+        if not profile_locked(path):
+            os.makedirs(path, exist_ok=True)
+            return path
+    return None
+
+
+class BrowserSession:
+    """
+    Снимок сессии браузера парсера (cookies, localStorage, адрес раздела).
+    """
+
+    def __init__(
+            self,
+            name: str,
+            directory: str = BROWSER_PROFILE_DIR,
+            max_age: int = SESSION_MAX_AGE
+    ):
+        """
+        :param name: Имя парсера.
+        :param directory: Каталог снимков, пустая строка отключает.
+        :param max_age: Максимальный возраст снимка, секунды.
+        """
+        self.path = os.path.join(directory, f'{name}.session.json') \
+            if directory else None
+        self.max_age = max_age
+        self.script_id = None
+
+    def load(self) -> dict | None:
+        """
+        Снимок сессии или None, если его нет или он устарел.
+        """
+        if not self.path:
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - data.get('saved', 0) > self.max_age:
+            return None
+        return data
+
+    async def save(
+            self,
+            browser,
+            resume_url: str,
+            origins: list
+    ) -> None:
+        """
+        Сохранение сессии.
+
+        :param browser: Драйвер (fetch_data.driver.AsyncDriver).
+        :param resume_url: Адрес, с которого продолжать работу.
+        :param origins: Origin страниц, localStorage которых сохраняется.
+        """
+        if not self.path:
+            return
+        cookies = await browser.execute_cdp_cmd('Network.getAllCookies', {})
+        await browser.execute_cdp_cmd('DOMStorage.enable', {})
+        storage = {}
+        for origin in dict.fromkeys(origins):
+            entries = (await browser.execute_cdp_cmd(
+                'DOMStorage.getDOMStorageItems',
+                {'storageId': {'securityOrigin': origin,
+                               'isLocalStorage': True}}
+            ))['entries']
+            if entries:
+                storage[origin] = dict(entries)
+        data = {
+            'saved': time.time(),
+            'resume_url': resume_url,
+            'cookies': cookies['cookies'],
+            'local_storage': storage,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        descriptor = os.open(
+            temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+        )
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    async def restore(self, browser) -> str | None:
+        """
+        Восстановление cookies и localStorage в браузер. Вызывается до
+        открытия страниц.
+
+        :param browser: Драйвер (fetch_data.driver.AsyncDriver).
+        :return: Адрес раздела или None, если снимка нет.
+        """
+        data = self.load()
+        if not data:
+            return None
+        now = time.time()
+        cookies = []
+        for cookie in data['cookies']:
+            if cookie.get('session'):
+                cookie = {key: value for key, value in cookie.items()
+                          if key != 'expires'}
+            elif cookie.get('expires', 0) < now:
+                continue
+            cookies.append({
+                key: cookie[key] for key in COOKIE_FIELDS if key in cookie
+            })
+        await browser.execute_cdp_cmd(
+            'Network.setCookies', {'cookies': cookies}
+        )
+        if data['local_storage']:
+            source = f"{RESTORE_STORAGE_JS}" \
+                     f"({json.dumps(data['local_storage'])});"
+            self.script_id = (await browser.execute_cdp_cmd(
+                'Page.addScriptToEvaluateOnNewDocument', {'source': source}
+            ))['identifier']
+        return data['resume_url']
+
+    async def resume(
+            self,
+            browser,
+            ready_selector: str,
+            timeout: int = SESSION_CHECK_TIMEOUT,
+            log=None
+    ) -> bool:
+        """
+        Продолжение сохраненной сессии: восстановление снимка, переход
+        на сохраненный адрес и ожидание контента раздела.
+
+        :param browser: Драйвер (fetch_data.driver.AsyncDriver).
+        :param ready_selector: CSS-селектор контента раздела.
+        :param timeout: Ожидание контента, секунды.
+        :param log: Корутина для логирования сообщений.
+        :return: True, если сессия действительна и раздел открыт.
+        """
+        try:
+            resume_url = await self.restore(browser)
+        except Exception as e:
+            resume_url = None
+            if log:
+                await log(f"Не удалось восстановить сессию: {e}")
+        if not resume_url:
+            return False
+        await browser.get(resume_url)
+        valid = await wait_until(
+            lambda: browser.find_element('css selector', ready_selector),
+            timeout
+        ) is not None
+        if self.script_id is not None:
+            # Дальше страницы сами управляют своим localStorage
+            await browser.execute_cdp_cmd(
+                'Page.removeScriptToEvaluateOnNewDocument',
+                {'identifier': self.script_id}
+            )
+            self.script_id = None
+        if not valid:
+            self.discard()
+            if log:
+                await log("Сохраненная сессия недействительна, вход заново")
+        return valid
+
+    def discard(self) -> None:
+        """
+        Удаление снимка сессии.
+        """
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
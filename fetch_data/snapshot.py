@@ -0,0 +1,44 @@
+"""
+Снимок контейнера с играми, полученный за один запрос к WebDriver.
+"""
+import hashlib
+from functools import cached_property
+
+
+class ContainerSnapshot:
+    """
+    Снимок контейнера на одном тике мониторинга.
+
+    Сырые данные - outerHTML контейнера или JSON-строка, собранная
+    скриптом в браузере (бэкенд 'js').
+    Хэш считается по сырым данным, дерево разбирается бэкендом только
+    при первом обращении. Проверка изменений и извлечение данных
+    используют один и тот же снимок, поэтому HTML не запрашивается
+    и не разбирается повторно.
+    """
+
+    def __init__(
+            self,
+            html: str,
+            backend
+    ):
+        """
+        :param html: outerHTML контейнера или JSON из скрипта извлечения.
+        :param backend: Бэкенд разбора из fetch_data.backends.
+        """
+        self.html = html
+        self.backend = backend
+
+    @cached_property
+    def hash(self) -> str:
+        """
+        MD5 сырых данных контейнера.
+        """
+        return hashlib.md5(self.html.encode('utf-8')).hexdigest()
+
+    @cached_property
+    def tree(self):
+        """
+        Дерево HTML, разобранное при первом обращении.
+        """
+        return self.backend.parse(self.html)
@@ -0,0 +1,133 @@
+"""
+Запуск парсера без фиксированных пауз.
+
+Переходы по страницам при запуске ждали фиксированное время (до 20
+секунд на шаг), даже если страница была готова раньше. Теперь каждый
+шаг ждет условия готовности с таймаутом: `wait_until` проверяет
+условие и между проверками отдает управление циклу событий, поэтому
+подключение к Redis и Socket.IO идет параллельно с навигацией
+браузера. `StartupTimer` замеряет этапы запуска для лога парсера.
+"""
+import os
+import time
+import asyncio
+from contextlib import contextmanager
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException
+)
+from fetch_data.browser_scripts import ELEMENT_INTERACTABLE_JS
+
+# Интервал проверки условий при запуске, секунды
+STARTUP_POLL_INTERVAL = float(os.getenv('STARTUP_POLL_INTERVAL', 0.25))
+
+
+async def wait_until(
+        condition,
+        timeout: float,
+        poll: float = STARTUP_POLL_INTERVAL
+):
+    """
+    Ожидание условия без блокировки цикла событий.
+
+    :param condition: Функция без аргументов (или возвращающая
+    корутину, например проверку через AsyncDriver); ожидание
+    заканчивается, когда она вернет истинное значение. Отсутствующий
+    или замененный элемент (NoSuchElementException,
+    StaleElementReferenceException) означает, что условие еще не
+    выполнено.
+    :param timeout: Максимальное ожидание, секунды.
+    :param poll: Интервал проверки, секунды.
+    :return: Значение условия или None по таймауту.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = condition()
+            if asyncio.iscoroutine(result):
+                result = await result
+        except (NoSuchElementException, StaleElementReferenceException):
+            result = None
+        if result:
+            return result
+        if time.monotonic() >= deadline:
+            return None
+        await asyncio.sleep(poll)
+
+
+def page_loaded(driver) -> bool:
+    """
+    Документ текущего окна (фрейма) полностью загружен.
+    """
+    return driver.execute_script('return document.readyState;') == 'complete'
+
+
+def element_interactable(locator: tuple):
+    """
+    Условие в стиле expected_conditions: элемент видим, доступен и не
+    перекрыт другим элементом.
+
+    :param locator: Кортеж (стратегия, значение).
+    :return: Функция от WebDriver, возвращающая элемент или False.
+    """
+    clickable = EC.element_to_be_clickable(locator)
+
+    def _predicate(driver):
+        element = clickable(driver)
+        if element and driver.execute_script(ELEMENT_INTERACTABLE_JS, element):
+            return element
+        return False
+
+    return _predicate
+
+
+class StartupTimer:
+    """
+    Длительность этапов запуска парсера. Этапы могут идти параллельно.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        # [(этап, длительность), ...] в порядке завершения
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Замер этапа: `with timer.phase('login'): ...`.
+
+        :param name: Название этапа.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.monotonic() - start))
+
+    async def measure(
+            self,
+            name: str,
+            coroutine
+    ):
+        """
+        Замер корутины, запускаемой отдельной задачей.
+
+        :param name: Название этапа.
+        :param coroutine: Корутина этапа.
+        :return: Результат корутины.
+        """
+        with self.phase(name):
+            return await coroutine
+
+    def report(self) -> str:
+        """
+        Строка для лога: этапы и общее время запуска.
+        """
+        phases = ', '.join(
+            f'{name} {duration:.1f} с' for name, duration in self.phases
+        )
+        return (
+            f"Этапы запуска: {phases}; "
+            f"всего {time.monotonic() - self.started:.1f} с"
+        )
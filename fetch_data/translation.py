@@ -0,0 +1,617 @@
+"""
+Перевод названий команд.
+
+Кэш переводов общий для обоих парсеров и состоит из трех уровней:
+ограниченный LRU в памяти процесса, локальная база SQLite (теплый
+старт после перезапуска и работа без Redis) и хэш Redis, общий для
+всех процессов. Все названия страницы дочитываются из нижних уровней
+пачкой (один SELECT, одна команда HMGET), кэш целиком никогда не
+загружается.
+
+Сам перевод выполняется отдельной асинхронной стадией: парсер сразу
+отправляет данные с исходными названиями, а переведенные названия
+уходят следующим обновлением, когда перевод готов.
+"""
+import os
+import json
+import asyncio
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from googletrans import Translator
+
+TRANSLATE_KEY = 'translate_hash'
+# Размер LRU-кэша переводов в памяти процесса
+TRANSLATE_CACHE_SIZE = int(os.getenv('TRANSLATE_CACHE_SIZE', 5000))
+# Локальная база переводов, пустая строка отключает уровень
+TRANSLATE_DB = os.getenv('TRANSLATE_DB', 'translations.sqlite3')
+# Интервал записи статистики кэша в лог, секунды
+TRANSLATE_STATS_INTERVAL = int(os.getenv('TRANSLATE_STATS_INTERVAL', 600))
+# Старый ключ: весь кэш одной JSON-строкой
+LEGACY_TRANSLATE_KEY = 'translate_cash'
+# 'google' - googletrans, 'fake' - локальный переводчик для тестов
+TRANSLATOR = os.getenv('TRANSLATOR', 'google')
+# Количество одновременных запросов к переводчику
+TRANSLATE_WORKERS = int(os.getenv('TRANSLATE_WORKERS', 2))
+# Максимальный размер пачки названий в одном запросе
+TRANSLATE_BATCH_SIZE = int(os.getenv('TRANSLATE_BATCH_SIZE', 20))
+# Сколько ждать пополнения пачки после первого названия, секунды
+TRANSLATE_BATCH_WAIT = float(os.getenv('TRANSLATE_BATCH_WAIT', 0.2))
+# Пауза перед повтором после ошибки переводчика, секунды (удваивается
+# при каждой следующей ошибке подряд до TRANSLATE_RETRY_MAX)
+TRANSLATE_RETRY_DELAY = float(os.getenv('TRANSLATE_RETRY_DELAY', 5))
+TRANSLATE_RETRY_MAX = float(os.getenv('TRANSLATE_RETRY_MAX', 300))
+# Разделитель названий пачки в одном запросе к переводчику
+TRANSLATE_SEPARATOR = '\n'
+
+
+class RedisTranslationStore:
+    """
+    Переводы в хэше Redis.
+    """
+
+    def __init__(
+            self,
+            redis_client,
+            key: str = TRANSLATE_KEY
+    ):
+        """
+        :param redis_client: Асинхронный клиент Redis.
+        :param key: Ключ хэша с переводами.
+        """
+        self.redis_client = redis_client
+        self.key = key
+
+    async def migrate_legacy(self) -> int:
+        """
+        Перенос переводов из старого JSON-ключа, если хэш еще пуст.
+
+        :return: Количество перенесенных переводов.
+        """
+        if await self.redis_client.exists(self.key):
+            return 0
+        data_str = await self.redis_client.get(LEGACY_TRANSLATE_KEY)
+        if not data_str:
+            return 0
+        translations = json.loads(data_str.decode('utf-8'))
+        if translations:
+            await self.redis_client.hset(self.key, mapping=translations)
+        return len(translations)
+
+    async def get_many(
+            self,
+            texts: list
+    ) -> dict:
+        """
+        Переводы для списка названий за один запрос.
+
+        :param texts: Исходные названия.
+        :return: Словарь {название: перевод} только для найденных.
+        """
+        if not texts:
+            return {}
+        values = await self.redis_client.hmget(self.key, texts)
+        return {
+            text: value.decode('utf-8')
+            for text, value in zip(texts, values) if value is not None
+        }
+
+    async def set(
+            self,
+            text: str,
+            translation: str
+    ) -> None:
+        """
+        Сохранение одного перевода.
+
+        :param text: Исходное название.
+        :param translation: Перевод.
+        """
+        await self.redis_client.hset(self.key, text, translation)
+
+    async def set_many(
+            self,
+            translations: dict
+    ) -> None:
+        """
+        Сохранение пачки переводов одной командой HSET.
+
+        :param translations: Словарь {название: перевод}.
+        """
+        if translations:
+            await self.redis_client.hset(self.key, mapping=translations)
+
+    async def clear(self) -> None:
+        """
+        Удаление всех переводов.
+        """
+        await self.redis_client.delete(self.key, LEGACY_TRANSLATE_KEY)
+
+
+class SqliteTranslationStore:
+    """
+    Переводы в локальной базе SQLite. Интерфейс совпадает
+    с RedisTranslationStore.
+
+    Запросы к базе блокирующие (при записи другого процесса - до
+    таймаута блокировки), поэтому они выполняются в отдельном потоке
+    со своим соединением, а не в цикле событий парсера.
+    """
+    # Ограничение количества параметров в одном запросе SQLite
+    CHUNK_SIZE = 500
+
+    def __init__(
+            self,
+            path: str = TRANSLATE_DB
+    ):
+        """
+        :param path: Путь к файлу базы.
+        """
+        self.path = path
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='sqlite'
+        )
+        # Соединение создается и используется только в потоке базы
+        self.connection = self.executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        # База общая для процессов парсеров, поэтому WAL и ожидание
+        # блокировки вместо ошибки
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS translations '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+        )
+        connection.commit()
+        return connection
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args
+        )
+
+    async def get_many(
+            self,
+            texts: list
+    ) -> dict:
+        """
+        Переводы для списка названий.
+
+        :param texts: Исходные названия.
+        :return: Словарь {название: перевод} только для найденных.
+        """
+        if not texts:
+            return {}
+        return await self._run(self._select, list(texts))
+
+    def _select(self, texts: list) -> dict:
+        found = {}
+        for start in range(0, len(texts), self.CHUNK_SIZE):
+            chunk = texts[start:start + self.CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self.connection.execute(
+                f'SELECT key, value FROM translations '
+                f'WHERE key IN ({placeholders})', chunk
+            ).fetchall())
+        return found
+
+    async def set_many(
+            self,
+            translations: dict
+    ) -> None:
+        """
+        Сохранение пачки переводов одной транзакцией.
+
+        :param translations: Словарь {название: перевод}.
+        """
+        if translations:
+            await self._run(self._insert, list(translations.items()))
+
+    def _insert(self, items: list) -> None:
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO translations (key, value) '
+                'VALUES (?, ?)', items
+            )
+
+    async def clear(self) -> None:
+        """
+        Удаление всех переводов.
+        """
+        await self._run(self._delete)
+
+    def _delete(self) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM translations')
+
+    async def close(self) -> None:
+        """
+        Закрытие соединения и остановка потока базы.
+        """
+        if self.connection is None:
+            return
+        await self._run(self.connection.close)
+        self.connection = None
+        self.executor.shutdown(wait=False)
+
+
+class TranslationCache:
+    """
+    Трехуровневый кэш переводов: LRU в памяти, SQLite, Redis.
+
+    Чтение из кода парсера (`in`, `[]`, `get`) идет только в память;
+    недостающие названия заранее дочитываются из нижних уровней
+    методом load. Найденное в Redis копируется в SQLite, новые переводы
+    записываются во все уровни. Для каждого уровня считаются попадания
+    и промахи.
+    """
+    TIERS = ('memory', 'local', 'redis')
+
+    def __init__(
+            self,
+            maxsize: int = TRANSLATE_CACHE_SIZE,
+            local=None,
+            remote=None,
+            log=None,
+            stats_interval: int = TRANSLATE_STATS_INTERVAL
+    ):
+        """
+        :param maxsize: Максимальное количество переводов в памяти.
+        :param local: Локальное хранилище (SqliteTranslationStore) или None.
+        :param remote: Общее хранилище (RedisTranslationStore) или None,
+        задается после подключения к Redis.
+        :param log: Корутина для логирования статистики.
+        :param stats_interval: Интервал записи статистики, секунды.
+        """
+        self.maxsize = maxsize
+        self.local = local
+        self.remote = remote
+        self.log = log
+        self.stats_interval = stats_interval
+        self.memory = OrderedDict()
+        self.stats = {tier: {'hits': 0, 'misses': 0} for tier in self.TIERS}
+        self.last_report = None
+
+    def __contains__(self, key) -> bool:
+        return key in self.memory
+
+    def __getitem__(self, key) -> str:
+        self.memory.move_to_end(key)
+        return self.memory[key]
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def keys(self):
+        return self.memory.keys()
+
+    def get(self, key, default=None):
+        if key in self.memory:
+            return self[key]
+        return default
+
+    def update(
+            self,
+            translations: dict
+    ) -> None:
+        """
+        Запись переводов в память с вытеснением самых старых.
+
+        :param translations: Словарь {название: перевод}.
+        """
+        for key, value in translations.items():
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    async def load(
+            self,
+            texts
+    ) -> None:
+        """
+        Дочитывание переводов из SQLite и Redis для названий, которых
+        нет в памяти.
+
+        :param texts: Названия на странице.
+        """
+        missing = []
+        for text in texts:
+            if not text:
+                continue
+            if text in self.memory:
+                self.memory.move_to_end(text)
+                self._count('memory', True)
+            else:
+                self._count('memory', False)
+                missing.append(text)
+
+        for tier, store in (('local', self.local), ('redis', self.remote)):
+            if not missing or store is None:
+                continue
+            found = await store.get_many(missing)
+            self.stats[tier]['hits'] += len(found)
+            self.stats[tier]['misses'] += len(missing) - len(found)
+            if found:
+                self.update(found)
+                if tier == 'redis' and self.local is not None:
+                    await self.local.set_many(found)
+                missing = [text for text in missing if text not in found]
+        await self._report()
+
+    async def save(
+            self,
+            translations: dict
+    ) -> None:
+        """
+        Запись новых переводов в SQLite и Redis.
+
+        :param translations: Словарь {название: перевод}.
+        """
+        if self.local is not None:
+            await self.local.set_many(translations)
+        if self.remote is not None:
+            await self.remote.set_many(translations)
+
+    async def clear(self) -> None:
+        """
+        Очистка всех уровней кэша.
+        """
+        self.memory.clear()
+        if self.local is not None:
+            await self.local.clear()
+        if self.remote is not None:
+            await self.remote.clear()
+
+    async def close(self) -> None:
+        """
+        Закрытие локальной базы (Redis закрывает владелец клиента).
+        """
+        if self.local is not None:
+            await self.local.close()
+
+    def format_stats(self) -> str:
+        """
+        Статистика попаданий и промахов по уровням одной строкой.
+        """
+        return ', '.join(
+            f"{tier}: {counts['hits']}/{counts['hits'] + counts['misses']}"
+            for tier, counts in self.stats.items()
+        ) + f' (в памяти {len(self.memory)})'
+
+    def _count(self, tier: str, hit: bool) -> None:
+        self.stats[tier]['hits' if hit else 'misses'] += 1
+
+    async def _report(self) -> None:
+        if not self.log:
+            return
+        now = asyncio.get_running_loop().time()
+        if self.last_report is None:
+            self.last_report = now
+        elif now - self.last_report >= self.stats_interval:
+            self.last_report = now
+            await self.log(f"Кэш переводов (попадания/запросы): "
+                           f"{self.format_stats()}")
+
+
+def create_translation_cache(log=None) -> TranslationCache:
+    """
+    Кэш переводов с локальной базой из TRANSLATE_DB. Уровень Redis
+    подключается позже, после создания клиента.
+
+    :param log: Корутина для логирования статистики.
+    """
+    local = SqliteTranslationStore(TRANSLATE_DB) if TRANSLATE_DB else None
+    return TranslationCache(local=local, log=log)
+
+
+class FakeTranslation:
+    """
+    Результат перевода в формате googletrans (поле text).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeTranslator:
+    """
+    Локальный переводчик без сети: возвращает названия с префиксом.
+    Повторяет интерфейс googletrans.Translator.translate.
+    """
+
+    def __init__(self, prefix: str = 'ru:'):
+        self.prefix = prefix
+
+    def translate(self, text, src: str = 'auto', dest: str = 'en'):
+        if isinstance(text, list):
+            return [self.translate(item, src, dest) for item in text]
+        # Как и googletrans, строки переводятся по отдельности
+        return FakeTranslation('\n'.join(
+            f'{self.prefix}{line}' for line in text.split('\n')
+        ))
+
+
+TRANSLATORS = {
+    'google': Translator,
+    'fake': FakeTranslator,
+}
+
+
+class TranslationStage:
+    """
+    Асинхронная стадия перевода с ограниченным пулом и пачками запросов.
+
+    Названия ставятся в очередь через request и переводятся в фоне:
+    каждый воркер собирает пачку названий и переводит ее одним
+    запросом (названия через перевод строки) в своем потоке, не блокируя
+    цикл событий. Готовые переводы записываются во все уровни
+    TranslationCache, после чего вызывается on_translated. После ошибки
+    переводчика все воркеры ждут паузу, растущую с каждой ошибкой подряд,
+    и пачка переводится повторно.
+    """
+
+    def __init__(
+            self,
+            cache: TranslationCache,
+            on_translated=None,
+            log=None,
+            translator: str = TRANSLATOR,
+            workers: int = TRANSLATE_WORKERS,
+            batch_size: int = TRANSLATE_BATCH_SIZE,
+            batch_wait: float = TRANSLATE_BATCH_WAIT,
+            retry_delay: float = TRANSLATE_RETRY_DELAY,
+            retry_max: float = TRANSLATE_RETRY_MAX
+    ):
+        """
+        :param cache: Кэш переводов парсера.
+        :param on_translated: Корутина, вызываемая с пачкой готовых
+        переводов {ключ: перевод}.
+        :param log: Корутина для логирования сообщений.
+        :param translator: Имя переводчика из TRANSLATORS.
+        :param workers: Количество воркеров (и потоков) перевода.
+        :param batch_size: Максимальный размер пачки.
+        :param batch_wait: Ожидание пополнения пачки, секунды.
+        :param retry_delay: Пауза после первой ошибки переводчика, секунды.
+        :param retry_max: Максимальная пауза после ошибок, секунды.
+        """
+        self.cache = cache
+        self.on_translated = on_translated
+        self.log = log
+        self.translator_class = TRANSLATORS[translator]
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.retry_delay = retry_delay
+        self.retry_max = retry_max
+        # Ошибки переводчика подряд и время, до которого запросы
+        # не отправляются (время цикла событий)
+        self.failures = 0
+        self.retry_at = 0.0
+        self.pending = set()
+        self.queue = None
+        self.tasks = []
+        self.executor = None
+
+    def request(
+            self,
+            key: str,
+            text: str | None = None
+    ) -> None:
+        """
+        Постановка названия в очередь на перевод. Повторные запросы
+        того же ключа, пока перевод не готов, игнорируются.
+
+        :param key: Ключ кэша (исходное или короткое название).
+        :param text: Текст для перевода, по умолчанию равен ключу.
+        """
+        if key in self.cache or key in self.pending:
+            return
+        if not self.tasks:
+            self.start()
+        self.pending.add(key)
+        self.queue.put_nowait((key, text or key))
+
+    def start(self) -> None:
+        """
+        Запуск воркеров в текущем цикле событий.
+        """
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.tasks = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def close(self) -> None:
+        """
+        Остановка воркеров.
+        """
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+    async def _collect_batch(self) -> list:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self.queue.get(), timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self) -> None:
+        # У каждого воркера свой переводчик: клиент googletrans
+        # не рассчитан на использование из нескольких потоков
+        translator = self.translator_class()
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            delay = self.retry_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            texts = [text for _, text in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self._translate, translator, texts
+                )
+            except Exception as e:
+                self.failures += 1
+                delay = min(
+                    self.retry_delay * 2 ** (self.failures - 1), self.retry_max
+                )
+                self.retry_at = loop.time() + delay
+                # Названия остаются в pending, поэтому парсер не ставит
+                # их в очередь повторно: пачка переводится после паузы
+                for item in batch:
+                    self.queue.put_nowait(item)
+                if self.log:
+                    await self.log(
+                        f"Ошибка перевода {texts}: {e}, "
+                        f"повтор через {delay:.0f} с"
+                    )
+                continue
+            self.failures = 0
+            translations = {
+                key: translation
+                for (key, _), translation in zip(batch, results)
+            }
+            self.cache.update(translations)
+            self.pending.difference_update(translations)
+            if self.log:
+                await self.log(f"Перевод текста: {translations}")
+            try:
+                await self.cache.save(translations)
+                if self.on_translated:
+                    await self.on_translated(translations)
+            except Exception as e:
+                if self.log:
+                    await self.log(f"Ошибка сохранения перевода: {e}")
+
+    @staticmethod
+    def _translate(
+            translator,
+            texts: list
+    ) -> list:
+        # googletrans переводит список отдельным запросом на каждое
+        # название, поэтому пачка отправляется одной строкой
+        result = translator.translate(
+            TRANSLATE_SEPARATOR.join(texts), src='zh-cn', dest='ru'
+        )
+        lines = [line.strip() for line in result.text.split(TRANSLATE_SEPARATOR)]
+        if len(lines) == len(texts):
+            return lines
+        # Переводчик объединил или разбил строки: по одному названию
+        return [
+            translator.translate(text, src='zh-cn', dest='ru').text
+            for text in texts
+        ]
@@ -0,0 +1,72 @@
+"""
+Отслеживание изменений на странице через MutationObserver.
+
+Вместо опроса страницы раз в секунду парсер ждет в браузере сигнала
+об изменении контейнера с играми и извлекает данные только тогда,
+когда что-то действительно поменялось.
+"""
+import os
+from selenium.webdriver.remote.webelement import WebElement
+from fetch_data.browser_scripts import WATCH_INSTALL_JS, WATCH_WAIT_JS
+
+# 'poll' - опрос с фиксированным интервалом, 'observer' - MutationObserver
+WATCH_MODE = os.getenv('WATCH_MODE', 'poll')
+# Максимальное ожидание изменений в браузере за один вызов, секунды
+WATCH_TIMEOUT = float(os.getenv('WATCH_TIMEOUT', 5))
+# Пауза для объединения пачки мутаций в одно изменение, секунды
+WATCH_SETTLE = float(os.getenv('WATCH_SETTLE', 0.05))
+
+
+class DomWatcher:
+    """
+    Наблюдатель за изменениями контейнера с играми в браузере.
+    """
+
+    def __init__(
+            self,
+            browser,
+            timeout: float = WATCH_TIMEOUT,
+            settle: float = WATCH_SETTLE
+    ):
+        """
+        :param browser: Драйвер (fetch_data.driver.AsyncDriver), в котором
+        установлен наблюдатель.
+        :param timeout: Максимальное ожидание изменений за один вызов.
+        :param settle: Пауза для объединения пачки мутаций.
+        """
+        self.browser = browser
+        self.timeout = timeout
+        self.settle = settle
+
+    async def install(
+            self,
+            element: WebElement | None = None,
+            selector: str | None = None
+    ) -> bool:
+        """
+        Установка MutationObserver на контейнер. Повторная установка
+        на тот же контейнер ничего не делает.
+
+        :param element: Элемент контейнера.
+        :param selector: CSS-селектор контейнера, если элемент не передан.
+        :return: True, если наблюдатель был установлен заново.
+        """
+        return await self.browser.execute_script(
+            WATCH_INSTALL_JS, element, selector
+        )
+
+    async def wait(self) -> bool | None:
+        """
+        Ожидание изменений контейнера, но не дольше self.timeout.
+
+        :return: True, если контейнер изменился, False если изменений
+        не было, None если наблюдатель потерян и его нужно установить заново.
+        """
+        # Команда уходит в браузер, только если таймаут изменился
+        # (например, после скрипта с другим таймаутом)
+        await self.browser.set_script_timeout(self.timeout + 5)
+        return await self.browser.execute_async_script(
+            WATCH_WAIT_JS,
+            int(self.timeout * 1000),
+            int(self.settle * 1000)
+        )
@@ -40,6 +40,22 @@ celery_app.conf.beat_schedule = {
         'schedule': crontab(minute=0, hour='*'),  # Каждый час
     },
 }
+# С BROWSER_HOST=1 парсеры BROWSER_HOST_TARGETS работают во вкладках
+# одного браузера (fetch_data/browser_host.py) и запускаются задачей 'Host'
+if os.getenv('BROWSER_HOST', '0') == '1':
+    host_targets = [
+        name.strip() for name in
+        os.getenv('BROWSER_HOST_TARGETS', 'FetchAkty,FB').split(',')
+    ]
+    for schedule_name in list(celery_app.conf.beat_schedule):
+        args = celery_app.conf.beat_schedule[schedule_name].get('args', ())
+        if args and args[0] in host_targets:
+            del celery_app.conf.beat_schedule[schedule_name]
+    celery_app.conf.beat_schedule['run_browser_host'] = {
+        'task': 'services_app.tasks.parse_some_data',
+        'schedule': crontab(minute=21, hour='*/1'),
+        'args': ('Host',),
+    }
 celery_app.conf.timezone = 'UTC'
 
 
@@ -0,0 +1,122 @@
+"""
+Шина обновлений между парсерами и сервером Socket.IO на Redis Streams.
+
+Парсер добавляет каждое сообщение протокола дельт в поток BUS_STREAM
+(XADD) и не держит соединение с сервером. Каждый воркер сервера читает
+поток целиком (XREAD, без групп потребителей: обновления нужны всем
+воркерам) и рассылает их своим клиентам. Поток обрезается примерно до
+BUS_MAXLEN записей; при старте воркер восстанавливает состояние из
+последних BUS_REPLAY записей.
+"""
+import os
+
+BUS_STREAM = os.getenv('BUS_STREAM', 'parser_updates')
+BUS_MAXLEN = int(os.getenv('BUS_MAXLEN', 10000))
+BUS_REPLAY = int(os.getenv('BUS_REPLAY', 1000))
+# Как парсеры отправляют обновления: 'redis' - шина, 'socketio' -
+# прежнее подключение к серверу клиентом Socket.IO
+PARSER_BUS = os.getenv('PARSER_BUS', 'redis')
+
+
+def as_payload(data: bytes) -> str | bytes:
+    """
+    Данные из Redis в том виде, в каком их отправляет парсер: JSON
+    строкой (текстовые кадры Socket.IO), msgpack байтами.
+    """
+    if data[:1] in (b'{', b'['):
+        return data.decode('utf-8')
+    return data
+
+
+class RedisBus:
+    """
+    Поток обновлений в Redis.
+    """
+
+    def __init__(
+            self,
+            redis_client,
+            stream: str = BUS_STREAM,
+            maxlen: int = BUS_MAXLEN
+    ):
+        """
+        :param redis_client: Асинхронный клиент Redis.
+        :param stream: Ключ потока.
+        :param maxlen: Примерная максимальная длина потока.
+        """
+        self.redis_client = redis_client
+        self.stream = stream
+        self.maxlen = maxlen
+
+    async def publish(
+            self,
+            message_type: str,
+            payload: str | bytes
+    ) -> None:
+        """
+        Публикация сообщения.
+
+        :param message_type: 'snapshot' или 'delta'.
+        :param payload: Сериализованное сообщение (transfer_data.codec).
+        """
+        await self.redis_client.xadd(
+            self.stream,
+            {'type': message_type, 'data': payload},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+
+    async def last_id(self) -> str | bytes:
+        """
+        Id последней записи потока или '0-0' для пустого потока.
+
+        В отличие от '$' этот id можно передавать в XREAD повторно:
+        записи, добавленные между запросами, не теряются.
+        """
+        entries = await self.redis_client.xrevrange(self.stream, count=1)
+        return entries[0][0] if entries else '0-0'
+
+    async def history(self, count: int = BUS_REPLAY) -> tuple:
+        """
+        Последние записи потока в порядке добавления.
+
+        :param count: Количество записей.
+        :return: Кортеж (id последней записи или '0-0', список
+        (тип, данные)).
+        """
+        entries = await self.redis_client.xrevrange(self.stream, count=count)
+        if not entries:
+            return '0-0', []
+        entries.reverse()
+        return entries[-1][0], [
+            (fields[b'type'].decode('utf-8'), as_payload(fields[b'data']))
+            for _, fields in entries
+        ]
+
+    async def listen(
+            self,
+            last_id: str | bytes = '$',
+            block_ms: int = 5000
+    ):
+        """
+        Чтение новых записей.
+
+        :param last_id: Id записи, после которой начинать чтение; '$' -
+        только новые записи.
+        :param block_ms: Время ожидания одного XREAD, мс.
+        :return: Асинхронный генератор (id, тип, данные).
+        """
+        if last_id == '$':
+            last_id = await self.last_id()
+        while True:
+            response = await self.redis_client.xread(
+                {self.stream: last_id}, block=block_ms, count=100
+            )
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    yield (
+                        entry_id,
+                        fields[b'type'].decode('utf-8'),
+                        as_payload(fields[b'data'])
+                    )
@@ -0,0 +1,83 @@
+"""
+Сериализация данных игр для Socket.IO и Redis.
+
+Кодек выбирается переменной DATA_CODEC:
+    'json'    - стандартный json (ensure_ascii=False), как раньше;
+    'orjson'  - тот же JSON, но в несколько раз быстрее;
+    'msgpack' - двоичный формат, сообщения Socket.IO уходят
+                двоичными вложениями.
+
+JSON-кодеки возвращают строку, поэтому клиенты, читающие текстовые
+сообщения, не замечают смены кодека. Если нужный пакет не установлен,
+используется стандартный json. decode принимает данные любого из
+кодеков.
+"""
+import os
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack не установлен
+    msgpack = None
+
+DATA_CODEC = os.getenv('DATA_CODEC', 'orjson')
+
+
+def get_codec(name: str = DATA_CODEC) -> str:
+    """
+    Название доступного кодека.
+
+    :param name: Запрошенный кодек.
+    :return: Запрошенный кодек или 'json', если его пакет не установлен.
+    """
+    if name == 'orjson' and orjson is None:
+        return 'json'
+    if name == 'msgpack' and msgpack is None:
+        return 'json'
+    if name not in ('json', 'orjson', 'msgpack'):
+        raise ValueError(f'Неизвестный кодек: {name}')
+    return name
+
+
+CODEC = get_codec()
+
+
+def encode(
+        data,
+        codec: str = CODEC
+) -> str | bytes:
+    """
+    Сериализация данных.
+
+    :param data: Словарь или список.
+    :param codec: Кодек.
+    :return: Строка JSON или байты msgpack.
+    """
+    if codec == 'orjson':
+        return orjson.dumps(data).decode('utf-8')
+    if codec == 'msgpack':
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False)
+
+
+def decode(data: str | bytes):
+    """
+    Десериализация данных любого кодека.
+
+    :param data: Строка JSON, байты JSON (из Redis) или байты msgpack.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        # JSON-объект или массив всегда начинается с '{' или '['
+        if data[:1] not in (b'{', b'[') and msgpack is not None:
+            return msgpack.unpackb(data, raw=False)
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data.decode('utf-8'))
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
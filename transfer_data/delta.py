@@ -0,0 +1,371 @@
+"""
+Протокол дельт для передачи данных об играх.
+
+Парсер хранит последнее отправленное состояние и вместо полного
+`{bookmaker: {league: [games]}}` отправляет только добавленные,
+измененные и удаленные игры. Каждое сообщение источника (букмекера)
+получает номер `seq`, растущий на единицу; `epoch` меняется при
+перезапуске парсера. Клиент, заметивший пропуск номера или смену
+эпохи, запрашивает полный снимок.
+
+Сообщения (v - версия схемы игры из transfer_data.records):
+    {'type': 'snapshot', 'v', 'source', 'epoch', 'seq',
+     'data': {source: {league: [game, ...]}}}
+    {'type': 'delta', 'v', 'source', 'epoch', 'seq',
+     'added': [{'league', 'game'}],
+     'changed': [{'id', 'fields'}],
+     'removed': [id, ...]}
+
+Сервер может объединить несколько дельт в одну (merge_deltas); такая
+дельта содержит 'from_seq' - номер первой объединенной дельты.
+"""
+import os
+import time
+import uuid
+import copy
+import hashlib
+from transfer_data.records import SCHEMA_VERSION
+
+# Интервал принудительной отправки полного снимка, секунды
+SNAPSHOT_INTERVAL = int(os.getenv('SNAPSHOT_INTERVAL', 60))
+# Поля, изменение которых само по себе не считается изменением игры
+IGNORED_FIELDS = ('server_time',)
+
+
+def match_id(
+        bookmaker: str,
+        league: str,
+        opponent_0: str,
+        opponent_1: str
+) -> str:
+    """
+    Стабильный идентификатор игры.
+
+    :param bookmaker: Букмекер.
+    :param league: Лига.
+    :param opponent_0: Исходное (непереведенное) название первой команды.
+    :param opponent_1: Исходное название второй команды.
+    :return: Короткий хэш.
+    """
+    key = f'{bookmaker}|{league}|{opponent_0}|{opponent_1}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def diff_game(
+        old: dict,
+        new: dict
+) -> dict:
+    """
+    Измененные поля игры. Вложенные словари (opponent_0, opponent_1)
+    сравниваются по полям.
+
+    :param old: Предыдущее состояние игры.
+    :param new: Текущее состояние игры.
+    :return: Словарь измененных полей или пустой словарь.
+    """
+    fields = {}
+    for key, value in new.items():
+        if key in IGNORED_FIELDS:
+            continue
+        old_value = old.get(key)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            nested = {
+                name: item for name, item in value.items()
+                if old_value.get(name) != item
+            }
+            if nested:
+                fields[key] = nested
+        elif old_value != value:
+            fields[key] = value
+    if fields:
+        for key in IGNORED_FIELDS:
+            if key in new:
+                fields[key] = new[key]
+    return fields
+
+
+def copy_game(game: dict) -> dict:
+    """
+    Копия игры с копиями вложенных словарей команд.
+    """
+    return {
+        key: dict(value) if isinstance(value, dict) else value
+        for key, value in game.items()
+    }
+
+
+def flatten(
+        source_data: dict
+) -> dict:
+    """
+    Плоское представление данных источника.
+
+    :param source_data: `{league: [game, ...]}` одного букмекера.
+    :return: `{id: {'league': league, 'game': game}}`.
+    """
+    matches = {}
+    for league, games in source_data.items():
+        for game in games:
+            matches[game['id']] = {'league': league, 'game': game}
+    return matches
+
+
+def merge_deltas(
+        first: dict,
+        second: dict
+) -> dict | None:
+    """
+    Объединение двух последовательных дельт одного потока в одну.
+    Исходные сообщения не изменяются (они общие для многих клиентов).
+
+    :param first: Более ранняя дельта.
+    :param second: Следующая дельта.
+    :return: Объединенная дельта с 'from_seq' или None, если дельты
+    относятся к разным эпохам.
+    """
+    if first['epoch'] != second['epoch']:
+        return None
+    added = {item['game']['id']: item for item in first['added']}
+    changed = {item['id']: item['fields'] for item in first['changed']}
+    removed = dict.fromkeys(first['removed'])
+
+    for key in second['removed']:
+        changed.pop(key, None)
+        # Игра, добавленная и удаленная до отправки, клиенту не нужна
+        if added.pop(key, None) is None:
+            removed[key] = None
+    for item in second['changed']:
+        key = item['id']
+        target = added.get(key)
+        if target is not None:
+            game = copy.deepcopy(target['game'])
+            _merge_fields(game, item['fields'])
+            added[key] = {'league': target['league'], 'game': game}
+        else:
+            fields = copy.deepcopy(changed.get(key, {}))
+            _merge_fields(fields, item['fields'])
+            changed[key] = fields
+    for item in second['added']:
+        key = item['game']['id']
+        # Удаление (если было) остается: у клиента может быть старая
+        # версия игры, а удаления применяются раньше добавлений
+        changed.pop(key, None)
+        added[key] = item
+
+    merged = dict(second)
+    merged.update({
+        'from_seq': first.get('from_seq', first['seq']),
+        'added': list(added.values()),
+        'changed': [
+            {'id': key, 'fields': fields} for key, fields in changed.items()
+        ],
+        'removed': list(removed),
+    })
+    return merged
+
+
+def _merge_fields(target: dict, fields: dict) -> None:
+    for key, value in fields.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            target[key].update(value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+class DeltaTracker:
+    """
+    Формирование дельт на стороне парсера.
+    """
+
+    def __init__(
+            self,
+            snapshot_interval: int = SNAPSHOT_INTERVAL
+    ):
+        """
+        :param snapshot_interval: Интервал отправки полного снимка, секунды.
+        """
+        self.snapshot_interval = snapshot_interval
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = {}
+        self.state = {}
+        self.last_snapshot = {}
+
+    def request_snapshot(self) -> None:
+        """
+        Следующее обновление каждого источника уйдет полным снимком
+        (например, после переподключения к серверу).
+        """
+        self.last_snapshot = {}
+
+    def update(
+            self,
+            data: dict
+    ) -> list:
+        """
+        Сравнение новых данных с последним отправленным состоянием.
+
+        :param data: `{bookmaker: {league: [game, ...]}}`, игры с полем 'id'.
+        :return: Список сообщений (по одному на источник с изменениями).
+        """
+        messages = []
+        now = time.monotonic()
+        for source, source_data in data.items():
+            matches = flatten(source_data)
+            last_snapshot = self.last_snapshot.get(source)
+            if last_snapshot is None or \
+                    now - last_snapshot >= self.snapshot_interval:
+                self.state[source] = matches
+                self.last_snapshot[source] = now
+                messages.append(self.snapshot(source, source_data))
+                continue
+
+            previous = self.state.get(source, {})
+            added = [
+                {'league': match['league'], 'game': match['game']}
+                for key, match in matches.items() if key not in previous
+            ]
+            removed = [key for key in previous if key not in matches]
+            changed = []
+            for key, match in matches.items():
+                if key not in previous:
+                    continue
+                fields = diff_game(previous[key]['game'], match['game'])
+                if fields:
+                    changed.append({'id': key, 'fields': fields})
+            self.state[source] = matches
+            if added or removed or changed:
+                messages.append({
+                    'type': 'delta',
+                    'v': SCHEMA_VERSION,
+                    'source': source,
+                    'epoch': self.epoch,
+                    'seq': self._next_seq(source),
+                    'added': added,
+                    'changed': changed,
+                    'removed': removed,
+                })
+        return messages
+
+    def snapshot(
+            self,
+            source: str,
+            source_data: dict
+    ) -> dict:
+        """
+        Сообщение с полным снимком источника.
+
+        :param source: Букмекер.
+        :param source_data: `{league: [game, ...]}`.
+        """
+        return {
+            'type': 'snapshot',
+            'v': SCHEMA_VERSION,
+            'source': source,
+            'epoch': self.epoch,
+            'seq': self._next_seq(source),
+            'data': {source: source_data},
+        }
+
+    def _next_seq(self, source: str) -> int:
+        self.seq[source] = self.seq.get(source, 0) + 1
+        return self.seq[source]
+
+
+class DeltaState:
+    """
+    Восстановление состояния из снимков и дельт (сервер и клиенты).
+    Сообщения комнат лиг (поле 'room', см. transfer_data.rooms) имеют
+    собственную нумерацию и хранятся отдельно от источника.
+    Игры хранятся копиями: сообщения остаются в очередях клиентов
+    и объединяются merge_deltas, поэтому изменять их нельзя.
+    """
+
+    def __init__(self):
+        self.sources = {}
+
+    def apply(
+            self,
+            message: dict
+    ) -> bool:
+        """
+        Применение снимка или дельты.
+
+        :param message: Сообщение протокола.
+        :return: False, если дельта не может быть применена (пропуск
+        номера или смена эпохи) и нужен полный снимок.
+        """
+        source = message['source']
+        key = message.get('room') or source
+        if message['type'] == 'snapshot':
+            self.sources[key] = {
+                'source': source,
+                'epoch': message['epoch'],
+                'seq': message['seq'],
+                'matches': {
+                    key: {'league': match['league'],
+                          'game': copy_game(match['game'])}
+                    for key, match in flatten(message['data'][source]).items()
+                },
+            }
+            return True
+
+        state = self.sources.get(key)
+        first_seq = message.get('from_seq', message['seq'])
+        if state is None or state['epoch'] != message['epoch'] or \
+                first_seq != state['seq'] + 1:
+            return False
+        matches = state['matches']
+        for key in message['removed']:
+            matches.pop(key, None)
+        for item in message['changed']:
+            match = matches.get(item['id'])
+            if match is None:
+                continue
+            for key, value in item['fields'].items():
+                if isinstance(value, dict):
+                    match['game'].setdefault(key, {}).update(value)
+                else:
+                    match['game'][key] = value
+        for item in message['added']:
+            matches[item['game']['id']] = {
+                'league': item['league'], 'game': copy_game(item['game'])
+            }
+        state['seq'] = message['seq']
+        return True
+
+    def source_data(
+            self,
+            source: str
+    ) -> dict:
+        """
+        Текущее состояние источника в исходном формате.
+
+        :param source: Букмекер (или комната лиги).
+        :return: `{source: {league: [game, ...]}}`.
+        """
+        leagues = {}
+        state = self.sources.get(source)
+        if state:
+            source = state['source']
+            for match in state['matches'].values():
+                leagues.setdefault(match['league'], []).append(match['game'])
+        return {source: leagues}
+
+    def snapshot(
+            self,
+            source: str
+    ) -> dict:
+        """
+        Полный снимок источника для клиента, запросившего resync.
+
+        :param source: Букмекер.
+        """
+        state = self.sources[source]
+        return {
+            'type': 'snapshot',
+            'v': SCHEMA_VERSION,
+            'source': state['source'],
+            'epoch': state['epoch'],
+            'seq': state['seq'],
+            'data': self.source_data(source),
+        }
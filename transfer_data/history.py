@@ -0,0 +1,232 @@
+"""
+История изменений игр (движение линий).
+
+У каждой игры свой поток Redis `{HISTORY_KEY}:{id}`: запись потока -
+изменение игры в момент отправки дельты. Идентификатор записи Redis
+содержит время записи в миллисекундах, поэтому выборка интервала
+(XRANGE по времени) идет по индексу потока, без просмотра всей
+истории; точное время изменения хранится в поле 't' записи. Записи
+старше HISTORY_RETENTION обрезаются при записи (MINID), поток игры,
+которая больше не меняется, удаляется по истечении того же срока
+(EXPIRE).
+
+Парсер только добавляет изменения в список в памяти; запись в Redis
+выполняется фоновой задачей пачками (один pipeline раз в
+HISTORY_FLUSH_INTERVAL секунд), поэтому отправка дельт не ждет Redis.
+Изменения, в которых поменялось только время игры, не записываются:
+оно меняется на каждом тике и не относится к движению линий.
+"""
+import os
+import time
+import asyncio
+from transfer_data.codec import encode, decode
+from transfer_data.delta import copy_game, diff_game
+
+HISTORY_KEY = os.getenv('HISTORY_KEY', 'odds_history')
+# Срок хранения истории, секунды
+HISTORY_RETENTION = int(os.getenv('HISTORY_RETENTION', 24 * 3600))
+# Интервал записи пачки в Redis, секунды
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 1))
+# Максимальное количество изменений, ожидающих записи (при недоступном
+# Redis старые изменения отбрасываются)
+HISTORY_MAX_PENDING = int(os.getenv('HISTORY_MAX_PENDING', 50000))
+# Максимальное количество записей в ответе
+HISTORY_MAX_ENTRIES = int(os.getenv('HISTORY_MAX_ENTRIES', 5000))
+# Поля, изменение которых само по себе не записывается в историю
+HISTORY_SKIP_FIELDS = ('process_time', 'server_time')
+
+
+def history_key(match: str) -> str:
+    return f'{HISTORY_KEY}:{match}'
+
+
+def is_movement(fields: dict) -> bool:
+    """
+    Есть ли среди измененных полей что-то кроме времени.
+    """
+    return any(key not in HISTORY_SKIP_FIELDS for key in fields)
+
+
+class HistoryWriter:
+    """
+    Пакетная запись изменений игр в потоки Redis.
+    """
+
+    def __init__(
+            self,
+            redis_client,
+            log=None,
+            retention: int = HISTORY_RETENTION,
+            flush_interval: float = HISTORY_FLUSH_INTERVAL,
+            max_pending: int = HISTORY_MAX_PENDING
+    ):
+        """
+        :param redis_client: Асинхронный клиент Redis.
+        :param log: Корутина для логирования сообщений.
+        :param retention: Срок хранения истории, секунды.
+        :param flush_interval: Интервал записи пачки, секунды.
+        :param max_pending: Максимальное количество ожидающих изменений.
+        """
+        self.redis_client = redis_client
+        self.log = log
+        self.retention = retention
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        # [(id игры, время, изменение), ...]
+        self.pending = []
+        # Последнее состояние игр по источникам: {id: {'league', 'game'}}
+        # (копии: игры сообщений общие с DeltaTracker парсера)
+        self.games = {}
+        self.task = None
+        self.stats = {'written': 0, 'dropped': 0}
+
+    def record(self, message: dict) -> None:
+        """
+        Добавление изменений из снимка или дельты в очередь записи.
+        Новая игра записывается целиком, дальше - только изменения.
+        Игры копируются: до записи парсер может изменить свои данные.
+
+        :param message: Сообщение протокола дельт.
+        """
+        now = time.time()
+        source = message['source']
+        games = self.games.setdefault(source, {})
+        if message['type'] == 'snapshot':
+            # Снимок уходит вместо дельты, изменения этого тика
+            # находятся сравнением с последним состоянием
+            current = {}
+            for league, league_games in message['data'][source].items():
+                for game in league_games:
+                    current[game['id']] = {
+                        'league': league, 'game': copy_game(game)
+                    }
+                    previous = games.get(game['id'])
+                    if previous is None:
+                        self._add(game['id'], now, {
+                            'league': league, 'game': copy_game(game)
+                        })
+                        continue
+                    fields = diff_game(previous['game'], game)
+                    if is_movement(fields):
+                        self._add(game['id'], now, {'fields': fields})
+            for key in games.keys() - current.keys():
+                self._add(key, now, {'removed': True})
+            self.games[source] = current
+            return
+        for item in message['added']:
+            game = item['game']
+            games[game['id']] = {
+                'league': item['league'], 'game': copy_game(game)
+            }
+            self._add(game['id'], now, {
+                'league': item['league'], 'game': copy_game(game)
+            })
+        for item in message['changed']:
+            match = games.get(item['id'])
+            if match is not None:
+                for key, value in item['fields'].items():
+                    if isinstance(value, dict):
+                        match['game'].setdefault(key, {}).update(value)
+                    else:
+                        match['game'][key] = value
+            if is_movement(item['fields']):
+                self._add(item['id'], now, {'fields': item['fields']})
+        for key in message['removed']:
+            games.pop(key, None)
+            self._add(key, now, {'removed': True})
+
+    def _add(
+            self,
+            match: str,
+            moment: float,
+            change: dict
+    ) -> None:
+        if self.task is None:
+            self.start()
+        self.pending.append((match, moment, change))
+        self._trim()
+
+    def _trim(self) -> None:
+        # При переполнении отбрасываются самые старые изменения
+        if len(self.pending) > self.max_pending:
+            overflow = len(self.pending) - self.max_pending
+            del self.pending[:overflow]
+            self.stats['dropped'] += overflow
+
+    def start(self) -> None:
+        """
+        Запуск фоновой записи в текущем цикле событий.
+        """
+        self.task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """
+        Остановка фоновой записи и запись оставшихся изменений.
+        """
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Запись накопленных изменений одним pipeline.
+        """
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        min_id = int((time.time() - self.retention) * 1000)
+        pipe = self.redis_client.pipeline(transaction=False)
+        for match, moment, change in batch:
+            change['t'] = moment
+            pipe.xadd(
+                history_key(match), {'data': encode(change)},
+                minid=min_id, approximate=True
+            )
+        for match in {match for match, _, _ in batch}:
+            pipe.expire(history_key(match), self.retention)
+        try:
+            await pipe.execute()
+            self.stats['written'] += len(batch)
+        except Exception as e:
+            # Пачка возвращается в начало очереди и будет записана
+            # следующим flush; при долгой недоступности Redis очередь
+            # ограничена max_pending
+            self.pending[:0] = batch
+            self._trim()
+            if self.log:
+                await self.log(
+                    f"Ошибка записи истории: {e}, "
+                    f"ожидают записи {len(self.pending)}"
+                )
+
+
+async def read_history(
+        redis_client,
+        match: str,
+        start: float | None = None,
+        end: float | None = None,
+        limit: int = HISTORY_MAX_ENTRIES
+) -> list:
+    """
+    Изменения игры за интервал.
+
+    :param redis_client: Асинхронный клиент Redis.
+    :param match: Идентификатор игры.
+    :param start: Начало интервала (unix-время, секунды) или None.
+    :param end: Конец интервала или None.
+    :param limit: Максимальное количество записей.
+    :return: Изменения по времени: `{'t': время, 'game'|'fields'|'removed'}`.
+    """
+    entries = await redis_client.xrange(
+        history_key(match),
+        min='-' if start is None else int(start * 1000),
+        max='+' if end is None else int(end * 1000),
+        count=limit
+    )
+    return [decode(fields[b'data']) for _, fields in entries]
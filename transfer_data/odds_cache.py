@@ -0,0 +1,159 @@
+"""
+Текущие данные букмекеров для REST (`GET /odds`).
+
+Ответ собирается из состояния DeltaState сервера, которое обновляется
+каждым снимком и дельтой парсеров, поэтому запросы не обращаются к
+Redis. Версия данных - эпохи и номера последних сообщений выбранных
+букмекеров: ETag считается по ней без сборки ответа, а собранный
+ответ (и его gzip) хранится до следующего обновления. Клиент,
+повторяющий запрос с If-None-Match, получает 304 без тела, пока
+данные не изменились.
+"""
+import os
+import gzip
+import hashlib
+from collections import OrderedDict
+from transfer_data.codec import encode, get_codec
+
+# Количество сохраненных ответов (разных сочетаний фильтров)
+ODDS_CACHE_SIZE = int(os.getenv('ODDS_CACHE_SIZE', 64))
+# Минимальный размер ответа для сжатия gzip, байты
+ODDS_GZIP_MIN_SIZE = int(os.getenv('ODDS_GZIP_MIN_SIZE', 1024))
+# HTTP-ответ всегда JSON, даже если DATA_CODEC=msgpack
+JSON_CODEC = get_codec('orjson')
+
+
+def etag_matches(
+        header: str | None,
+        etag: str
+) -> bool:
+    """
+    Проверка заголовка If-None-Match (слабое сравнение).
+
+    :param header: Значение заголовка или None.
+    :param etag: Текущий ETag.
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    current = etag.removeprefix('W/')
+    return any(
+        tag.strip().removeprefix('W/') == current
+        for tag in header.split(',')
+    )
+
+
+class OddsCache:
+    """
+    Собранные ответы `GET /odds` по сочетаниям фильтров.
+    """
+
+    def __init__(
+            self,
+            state,
+            maxsize: int = ODDS_CACHE_SIZE
+    ):
+        """
+        :param state: Состояние источников (transfer_data.delta.DeltaState).
+        :param maxsize: Количество сохраненных ответов.
+        """
+        self.state = state
+        self.maxsize = maxsize
+        # (букмекеры, лиги) -> [версия, JSON, gzip или None]
+        self.responses = OrderedDict()
+        self.stats = {'hits': 0, 'builds': 0}
+
+    def version(
+            self,
+            bookmakers: list | None = None
+    ) -> tuple:
+        """
+        Версия данных выбранных букмекеров.
+
+        :param bookmakers: Букмекеры или None для всех.
+        :return: Кортеж (букмекер, эпоха, номер) по каждому букмекеру
+        с данными.
+        """
+        sources = self.state.sources
+        names = sorted(sources) if bookmakers is None else sorted(
+            name for name in set(bookmakers) if name in sources
+        )
+        return tuple(
+            (name, sources[name]['epoch'], sources[name]['seq'])
+            for name in names
+        )
+
+    def etag(
+            self,
+            bookmakers: list | None = None,
+            leagues: list | None = None
+    ) -> str:
+        """
+        Слабый ETag ответа: одинаков для сжатого и несжатого ответа
+        и для всех воркеров, получивших одни и те же сообщения.
+        """
+        key = repr((self.version(bookmakers), self._key(bookmakers, leagues)))
+        return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]}"'
+
+    def render(
+            self,
+            bookmakers: list | None = None,
+            leagues: list | None = None,
+            use_gzip: bool = False
+    ) -> tuple:
+        """
+        Тело ответа.
+
+        :param bookmakers: Букмекеры или None для всех.
+        :param leagues: Лиги или None для всех.
+        :param use_gzip: Клиент принимает gzip.
+        :return: Кортеж (байты, 'gzip' или None).
+        """
+        key = self._key(bookmakers, leagues)
+        version = self.version(bookmakers)
+        entry = self.responses.get(key)
+        if entry is not None and entry[0] == version:
+            self.responses.move_to_end(key)
+            self.stats['hits'] += 1
+        else:
+            entry = [version, self._build(version, leagues), None]
+            self.responses[key] = entry
+            self.responses.move_to_end(key)
+            if len(self.responses) > self.maxsize:
+                self.responses.popitem(last=False)
+            self.stats['builds'] += 1
+        if not use_gzip or len(entry[1]) < ODDS_GZIP_MIN_SIZE:
+            return entry[1], None
+        if entry[2] is None:
+            entry[2] = gzip.compress(entry[1], compresslevel=6)
+        return entry[2], 'gzip'
+
+    def _build(
+            self,
+            version: tuple,
+            leagues: list | None
+    ) -> bytes:
+        """
+        `{bookmaker: {league: [game, ...]}}` выбранных букмекеров и лиг.
+        """
+        selected = set(leagues) if leagues else None
+        data = {}
+        for name, _, _ in version:
+            source_data = self.state.source_data(name)[name]
+            data[name] = source_data if selected is None else {
+                league: games for league, games in source_data.items()
+                if league in selected
+            }
+        body = encode(data, JSON_CODEC)
+        return body.encode('utf-8')
+
+    @staticmethod
+    def _key(
+            bookmakers: list | None,
+            leagues: list | None
+    ) -> tuple:
+        return (
+            tuple(sorted(set(bookmakers))) if bookmakers is not None else None,
+            tuple(sorted(set(leagues))) if leagues else None
+        )
@@ -0,0 +1,181 @@
+"""
+Исходящие очереди клиентов Socket.IO с объединением сообщений.
+
+У каждого клиента своя очередь и своя задача отправки, поэтому
+медленный клиент не задерживает остальных. В очереди хранится не
+больше одного сообщения на поток (источник, комнату лиги или старое
+событие 'message'): новые дельты объединяются с еще не отправленной
+(последняя запись побеждает), полные данные заменяют предыдущие.
+Отправка ждет, пока транспорт клиента не разберет уже отправленное,
+и за это время сообщения продолжают объединяться, так что память
+сервера не растет вместе с отставанием клиента.
+
+Если сообщение потока ждет отправки дольше CLIENT_MAX_LAG секунд или
+дельты нельзя объединить (смена эпохи), вместо них клиенту уйдет
+снимок, собранный из текущего состояния в момент отправки.
+"""
+import os
+import asyncio
+from transfer_data.codec import encode
+from transfer_data.delta import merge_deltas
+
+# Максимальное отставание потока, после которого дельты заменяются
+# снимком, секунды
+CLIENT_MAX_LAG = float(os.getenv('CLIENT_MAX_LAG', 5))
+# Сколько пакетов может ждать в транспорте клиента, прежде чем
+# отправка приостанавливается
+CLIENT_MAX_BACKLOG = int(os.getenv('CLIENT_MAX_BACKLOG', 2))
+# Интервал проверки транспорта занятого клиента, секунды
+CLIENT_BACKLOG_POLL = 0.05
+
+# Отметка потока, для которого при отправке собирается снимок
+SNAPSHOT = object()
+
+
+class ClientOutbox:
+    """
+    Исходящая очередь одного клиента.
+    """
+
+    def __init__(
+            self,
+            send,
+            snapshot,
+            backlog=None,
+            max_lag: float = CLIENT_MAX_LAG,
+            max_backlog: int = CLIENT_MAX_BACKLOG
+    ):
+        """
+        :param send: Корутина send(event, payload) отправки клиенту.
+        :param snapshot: Функция snapshot(stream) -> (event, payload)
+        или None: текущие данные потока в момент отправки.
+        :param backlog: Функция без аргументов - количество пакетов,
+        ожидающих в транспорте клиента.
+        :param max_lag: Максимальное отставание потока, секунды.
+        :param max_backlog: Допустимое количество пакетов в транспорте.
+        """
+        self.send = send
+        self.snapshot = snapshot
+        self.backlog = backlog or (lambda: 0)
+        self.max_lag = max_lag
+        self.max_backlog = max_backlog
+        # Поток -> [event, message, payload, время постановки]
+        self.pending = {}
+        self.ready = asyncio.Event()
+        self.task = None
+        self.stats = {'sent': 0, 'coalesced': 0, 'dropped': 0}
+
+    def put(
+            self,
+            stream: tuple,
+            event: str,
+            message: dict | None = None,
+            payload=None
+    ) -> None:
+        """
+        Постановка сообщения в очередь.
+
+        :param stream: Поток, например ('update', 'akty.com').
+        :param event: Событие Socket.IO.
+        :param message: Сообщение протокола дельт (для объединения
+        дельт) или None.
+        :param payload: Уже сериализованное сообщение, общее для всех
+        клиентов потока.
+        """
+        now = asyncio.get_running_loop().time()
+        entry = self.pending.get(stream)
+        if entry is None:
+            self.pending[stream] = [event, message, payload, now]
+        elif entry[1] is SNAPSHOT:
+            # Снимок соберется при отправке и уже будет включать
+            # это сообщение
+            self.stats['coalesced'] += 1
+        elif event == 'delta' and entry[0] == 'delta':
+            merged = merge_deltas(entry[1], message)
+            if merged is None:
+                self.mark_snapshot(stream)
+                self.stats['dropped'] += 1
+            else:
+                entry[1:3] = [merged, None]
+                self.stats['coalesced'] += 1
+            if entry[1] is not SNAPSHOT and now - entry[3] > self.max_lag:
+                self.mark_snapshot(stream)
+                self.stats['dropped'] += 1
+        elif event == 'delta':
+            # Ожидает снимок из парсера: отправим снимок текущего
+            # состояния, который включает и эту дельту
+            self.mark_snapshot(stream)
+            self.stats['coalesced'] += 1
+        else:
+            # Полные данные (снимок, старое событие 'message')
+            # заменяют неотправленные
+            entry[0:3] = [event, message, payload]
+            self.stats['coalesced'] += 1
+        self._wake()
+
+    def mark_snapshot(self, stream: tuple) -> None:
+        """
+        Отправить клиенту снимок потока вместо ожидающих сообщений.
+        """
+        entry = self.pending.get(stream)
+        if entry is None:
+            self.pending[stream] = [
+                'snapshot', SNAPSHOT, None, asyncio.get_running_loop().time()
+            ]
+        else:
+            entry[0:3] = ['snapshot', SNAPSHOT, None]
+        self._wake()
+
+    def retain(self, streams) -> int:
+        """
+        Удаление ожидающих сообщений всех потоков, кроме указанных
+        (клиент подписался на комнаты и больше не получает остальное).
+
+        :param streams: Потоки, сообщения которых остаются.
+        :return: Количество удаленных сообщений.
+        """
+        dropped = [stream for stream in self.pending if stream not in streams]
+        for stream in dropped:
+            del self.pending[stream]
+        self.stats['dropped'] += len(dropped)
+        return len(dropped)
+
+    def _wake(self) -> None:
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._run())
+        self.ready.set()
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.pending.clear()
+
+    async def _run(self) -> None:
+        while True:
+            await self.ready.wait()
+            # Транспорт клиента еще не отправил предыдущие пакеты:
+            # ждем, сообщения тем временем объединяются
+            while self.backlog() > self.max_backlog:
+                await asyncio.sleep(CLIENT_BACKLOG_POLL)
+            if not self.pending:
+                self.ready.clear()
+                continue
+            stream = next(iter(self.pending))
+            event, message, payload, _ = self.pending.pop(stream)
+            if not self.pending:
+                self.ready.clear()
+            if message is SNAPSHOT:
+                built = self.snapshot(stream)
+                if built is None:
+                    continue
+                event, payload = built
+            elif payload is None:
+                payload = encode(message)
+            try:
+                await self.send(event, payload)
+            except Exception:
+                # Клиент отключается, очередь будет закрыта
+                self.stats['dropped'] += 1
+                continue
+            self.stats['sent'] += 1
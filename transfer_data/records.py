@@ -0,0 +1,61 @@
+"""
+Записи игр, общие для парсеров и сервера.
+
+Игра передается словарем схемы SCHEMA_VERSION, который строит
+game_record:
+
+    {'id', 'opponent_0': {'name', 'score', 'handicap_bet', 'total_bet'},
+     'opponent_1': {...}, 'process_time', 'server_time'}
+
+Парсеры, сервер, история и кэш ответов работают с этими словарями
+напрямую (дельты сравнивают их по полям), поэтому отдельного класса
+записи нет. Номер схемы передается в поле 'v' каждого сообщения
+протокола дельт. При несовместимом изменении формата игры номер
+увеличивается.
+"""
+
+SCHEMA_VERSION = 1
+# Поля команды в записи игры
+OPPONENT_FIELDS = ('name', 'score', 'handicap_bet', 'total_bet')
+
+
+def opponent(
+        name: str,
+        score: str,
+        handicap_bet: str,
+        total_bet: str
+) -> dict:
+    """
+    Команда в игре.
+    """
+    return {
+        'name': name,
+        'score': score,
+        'handicap_bet': handicap_bet,
+        'total_bet': total_bet,
+    }
+
+
+def game_record(
+        id: str,
+        opponent_0: dict,
+        opponent_1: dict,
+        process_time: str,
+        server_time: str
+) -> dict:
+    """
+    Игра одного букмекера в формате схемы SCHEMA_VERSION.
+
+    :param id: Стабильный идентификатор игры (delta.match_id).
+    :param opponent_0: Первая команда (opponent).
+    :param opponent_1: Вторая команда.
+    :param process_time: Время игры на сайте букмекера.
+    :param server_time: Время сбора данных парсером.
+    """
+    return {
+        'id': id,
+        'opponent_0': opponent_0,
+        'opponent_1': opponent_1,
+        'process_time': process_time,
+        'server_time': server_time,
+    }
@@ -0,0 +1,221 @@
+"""
+Подписки клиентов Socket.IO на комнаты букмекеров и лиг.
+
+Комната называется `{букмекер}/{лига}` (например,
+`akty.com/IPBL Pro Division`) или `{букмекер}/*` для всех лиг
+букмекера. Клиенты, не подписанные ни на одну комнату, получают все
+сообщения, как раньше.
+
+Комната `{букмекер}/*` получает исходные сообщения парсера. Комнаты
+лиг получают только свою часть снимка или дельты и собственную
+нумерацию `seq` (поле 'room' в сообщении), поэтому пропуск номера
+по-прежнему означает потерю сообщения, а не чужую лигу.
+"""
+from transfer_data.records import SCHEMA_VERSION
+
+# Обозначение всех лиг букмекера
+ALL_LEAGUES = '*'
+
+
+def room_name(
+        source: str,
+        league: str = ALL_LEAGUES
+) -> str:
+    """
+    Название комнаты.
+
+    :param source: Букмекер.
+    :param league: Лига или ALL_LEAGUES.
+    """
+    return f'{source}/{league}'
+
+
+def parse_room(room: str) -> tuple:
+    """
+    Разбор названия комнаты.
+
+    :param room: Название комнаты.
+    :return: Кортеж (букмекер, лига).
+    :raises ValueError: Название без букмекера или лиги.
+    """
+    source, _, league = room.partition('/')
+    if not source or not league:
+        raise ValueError(f'Некорректное название комнаты: {room}')
+    return source, league
+
+
+def split_update(
+        message: dict,
+        leagues: set,
+        previous: dict
+) -> dict:
+    """
+    Части снимка или дельты источника для отдельных лиг.
+
+    :param message: Сообщение протокола дельт.
+    :param leagues: Лиги, на которые есть подписчики.
+    :param previous: `{id: league}` игр источника до применения дельты
+    (в удалениях и изменениях лига не передается).
+    :return: `{league: часть}`; для дельты - только лиги с изменениями.
+    Часть снимка - `{'data': [game, ...]}`, часть дельты -
+    `{'added', 'changed', 'removed'}`.
+    """
+    source = message['source']
+    if message['type'] == 'snapshot':
+        source_data = message['data'][source]
+        return {
+            league: {'data': source_data.get(league, [])}
+            for league in leagues
+        }
+
+    parts = {}
+
+    def part(league: str) -> dict:
+        return parts.setdefault(
+            league, {'added': [], 'changed': [], 'removed': []}
+        )
+
+    for item in message['added']:
+        if item['league'] in leagues:
+            part(item['league'])['added'].append(item)
+    for item in message['changed']:
+        league = previous.get(item['id'])
+        if league in leagues:
+            part(league)['changed'].append(item)
+    for key in message['removed']:
+        league = previous.get(key)
+        if league in leagues:
+            part(league)['removed'].append(key)
+    return parts
+
+
+class RoomRegistry:
+    """
+    Подписки клиентов и нумерация сообщений комнат лиг.
+    """
+
+    def __init__(self):
+        self.members = {}
+        self.seq = {}
+
+    def subscribe(
+            self,
+            sid: str,
+            room: str
+    ) -> None:
+        self.members.setdefault(room, set()).add(sid)
+
+    def unsubscribe(
+            self,
+            sid: str,
+            room: str | None = None
+    ) -> list:
+        """
+        Отписка клиента от комнаты или от всех комнат.
+
+        :return: Комнаты, от которых клиент отписан.
+        """
+        rooms = [room] if room else [
+            name for name, sids in self.members.items() if sid in sids
+        ]
+        for name in rooms:
+            sids = self.members.get(name)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self.members[name]
+        return rooms
+
+    def subscribed(self) -> set:
+        """
+        Клиенты, подписанные хотя бы на одну комнату.
+        """
+        return set().union(*self.members.values())
+
+    def rooms_of(self, sid: str) -> list:
+        return [name for name, sids in self.members.items() if sid in sids]
+
+    def league_rooms(self, source: str) -> set:
+        """
+        Лиги источника, на комнаты которых есть подписчики.
+        """
+        leagues = set()
+        for name in self.members:
+            room_source, league = name.partition('/')[::2]
+            if room_source == source and league != ALL_LEAGUES:
+                leagues.add(league)
+        return leagues
+
+    def room_message(
+            self,
+            message: dict,
+            league: str,
+            part: dict
+    ) -> dict:
+        """
+        Сообщение для комнаты лиги со следующим номером комнаты.
+
+        :param message: Исходное сообщение источника.
+        :param league: Лига.
+        :param part: Часть сообщения из split_update.
+        """
+        room = room_name(message['source'], league)
+        self.seq[room] = self.seq.get(room, 0) + 1
+        return self._build(
+            message['type'], message['source'], league,
+            message['epoch'], self.seq[room], part
+        )
+
+    def room_snapshot(
+            self,
+            source: str,
+            league: str,
+            epoch: str,
+            games: list
+    ) -> dict:
+        """
+        Снимок комнаты лиги с текущим номером (для новых подписчиков
+        и resync).
+        """
+        room = room_name(source, league)
+        return self._build(
+            'snapshot', source, league, epoch, self.seq.get(room, 0),
+            {'data': games}
+        )
+
+    @staticmethod
+    def _build(
+            message_type: str,
+            source: str,
+            league: str,
+            epoch: str,
+            seq: int,
+            part: dict
+    ) -> dict:
+        message = {
+            'type': message_type,
+            'v': SCHEMA_VERSION,
+            'source': source,
+            'room': room_name(source, league),
+            'epoch': epoch,
+            'seq': seq,
+        }
+        if message_type == 'snapshot':
+            message['data'] = {source: {league: part['data']}}
+        else:
+            message.update(part)
+        return message
+
+
+def leagues_by_id(source_state: dict | None) -> dict:
+    """
+    `{id: league}` текущих игр источника из состояния DeltaState.
+
+    :param source_state: Элемент DeltaState.sources или None.
+    """
+    if not source_state:
+        return {}
+    return {
+        key: match['league'] for key, match in source_state['matches'].items()
+    }
+
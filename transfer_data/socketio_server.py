@@ -1,7 +1,24 @@
 import os
+import asyncio
 import socketio
+import redis.asyncio as aioredis
 from dotenv import load_dotenv
 from app.logging import setup_logger
+from transfer_data.delta import DeltaState
+from transfer_data.codec import encode, decode
+from transfer_data.records import SCHEMA_VERSION
+from transfer_data.transport import server_options
+from transfer_data.outbox import ClientOutbox
+from transfer_data.bus import RedisBus
+from transfer_data.odds_cache import OddsCache
+from transfer_data.rooms import (
+    ALL_LEAGUES,
+    RoomRegistry,
+    leagues_by_id,
+    parse_room,
+    room_name,
+    split_update
+)
 
 # Загрузка переменных окружения из .env файла
 load_dotenv()
@@ -14,18 +31,39 @@ origins = [
     "https://parserbk.compas-pro.ru",
 ]
 
+REDIS_URL = os.getenv('REDIS_URL')
+# 'redis' - сессии и рассылки согласуются между воркерами через Redis,
+# 'memory' - один процесс без Redis. Без REDIS_URL всегда 'memory'
+SOCKET_MANAGER = os.getenv('SOCKET_MANAGER', 'redis') if REDIS_URL \
+    else 'memory'
+
+# WebSocket с запасным long-polling и сжатием, см. transfer_data.transport
 sio = socketio.AsyncServer(
     async_mode="asgi",
-    allow_upgrades=False,
     cors_allowed_origins=origins,
     namespaces='/socket.io',
-    max_http_buffer_size=10 * 1024 * 1024  # 10 MB
+    client_manager=socketio.AsyncRedisManager(REDIS_URL)
+    if SOCKET_MANAGER == 'redis' else None,
+    **server_options()
 )
 
-app = socketio.ASGIApp(sio)
-
 # Предопределенные пароли
 SOCKET_KEY = os.getenv('SOCKET_KEY')
+# Дублировать ли состояние источника полным событием 'message'
+# для клиентов, еще не перешедших на протокол дельт. Клиенты, которые
+# отправляли subscribe или resync, его не получают
+LEGACY_MESSAGES = os.getenv('SOCKET_LEGACY_MESSAGES', '1') == '1'
+
+# Текущее состояние всех источников, восстановленное из дельт
+state = DeltaState()
+# Ответы GET /odds, собранные из текущего состояния
+odds_cache = OddsCache(state)
+# Подписки клиентов на комнаты букмекеров и лиг
+rooms = RoomRegistry()
+# Исходящие очереди подключенных клиентов
+outboxes = {}
+# Клиенты протокола дельт (отправляли subscribe или resync)
+delta_clients = set()
 
 
 async def send_to_logs(message: str):
@@ -50,6 +88,15 @@ async def connect(sid: str, environ: dict, auth: dict):
     if auth is None or 'socket_key' not in auth or auth['socket_key'] != SOCKET_KEY:
         await send_to_logs(f"Неудачная попытка подключения: {sid}, {auth}")
         return False  # Отклонить подключение
+    outboxes[sid] = ClientOutbox(
+        # Клиент подключен к этому воркеру: отправка без публикации
+        # через менеджер клиентов
+        send=lambda event, payload: sio.emit(
+            event, payload, to=sid, ignore_queue=True
+        ),
+        snapshot=stream_snapshot,
+        backlog=lambda: transport_backlog(sid)
+    )
     await send_to_logs(f"Клиент подключился: {sid}")
 
 @sio.on('disconnect')
@@ -60,8 +107,88 @@ async def disconnect(sid: str):
     :param sid: Идентификатор сессии клиента.
     """
 
+    rooms.unsubscribe(sid)
+    delta_clients.discard(sid)
+    outbox = outboxes.pop(sid, None)
+    if outbox:
+        await outbox.close()
+        await send_to_logs(f"Клиент отключился: {sid}, {outbox.stats}")
+        return
     await send_to_logs(f"Клиент отключился: {sid}")
 
+
+def transport_backlog(sid: str) -> int:
+    """
+    Количество пакетов, ожидающих отправки в транспорте клиента
+    (очередь сокета engineio).
+
+    :param sid: Идентификатор сессии клиента.
+    """
+    try:
+        eio_sid = sio.manager.eio_sid_from_sid(sid, '/')
+        return sio.eio.sockets[eio_sid].queue.qsize()
+    except (KeyError, AttributeError):
+        return 0
+
+
+def outbox_stats() -> dict:
+    """
+    Суммарные счетчики исходящих очередей: отправлено, объединено,
+    отброшено (заменено снимком).
+    """
+    total = {'clients': len(outboxes), 'sent': 0, 'coalesced': 0, 'dropped': 0}
+    for outbox in outboxes.values():
+        for key, value in outbox.stats.items():
+            total[key] += value
+    return total
+
+
+def broadcast_targets(source: str | None = None) -> list:
+    """
+    Очереди клиентов без подписок и подписчиков комнаты `{source}/*`.
+
+    :param source: Букмекер или None (только клиенты без подписок).
+    """
+    subscribed = rooms.subscribed()
+    room_members = rooms.members.get(room_name(source), ()) if source else ()
+    return [
+        outbox for sid, outbox in outboxes.items()
+        if sid not in subscribed or sid in room_members
+    ]
+
+
+def update_stream(name: str) -> tuple:
+    """
+    Поток очереди клиента для букмекера или комнаты. Комната
+    `{букмекер}/*` получает исходные сообщения источника, поэтому ее
+    снимки идут тем же потоком ('update', букмекер), что и дельты:
+    в разных потоках снимок и дельты обгоняли бы друг друга.
+
+    :param name: Букмекер или комната.
+    """
+    source, _, league = name.partition('/')
+    return 'update', source if league in ('', ALL_LEAGUES) else name
+
+
+def stream_snapshot(stream: tuple) -> tuple | None:
+    """
+    Текущие данные потока для клиента, отставшего от него.
+
+    :param stream: ('update', источник или комната) или
+    ('message', источник).
+    :return: (событие, данные) или None.
+    """
+    kind, key = stream
+    if kind == 'message':
+        if key not in state.sources:
+            return None
+        return 'message', encode(state.source_data(key))
+    if kind == 'update':
+        message = room_snapshot(key if '/' in key else room_name(key))
+        return ('snapshot', encode(message)) if message else None
+    return None
+
+
 @sio.on('message')
 async def message(sid: str, data: str):
     """
@@ -70,6 +197,298 @@ async def message(sid: str, data: str):
     :param sid: Идентификатор сессии клиента.
     :param data: Данные, полученные от клиента.
     """
-    await send_to_logs(f"Получено сообщение от {sid}: {data}")
-    await sio.send(data)
+    # Полное содержимое не логируется: сообщения приходят на каждом
+    # тике парсеров и достигают сотен килобайт
+    await send_to_logs(f"Получено сообщение от {sid}: {len(data)} символов")
+    if bus_task is not None:
+        # Клиенты других воркеров получат сообщение из шины
+        await bus.publish('message', data)
+    else:
+        relay_message(sid, data)
+
+
+def relay_message(sid: str, data: str) -> None:
+    """
+    Постановка произвольного сообщения в очереди клиентов без подписок.
+
+    :param sid: Идентификатор сессии отправителя.
+    :param data: Сообщение.
+    """
+    for outbox in broadcast_targets():
+        outbox.put(('raw', sid), 'message', payload=data)
+
+
+async def relay_update(sid: str, data: str | bytes):
+    """
+    Применение снимка или дельты от парсера и постановка в очереди
+    клиентов. Дельта, которую нельзя применить (пропуск номера после
+    переподключения), не рассылается: клиенты дождутся снимка.
+    Комнаты лиг получают только свою часть сообщения.
+
+    :param sid: Идентификатор сессии парсера.
+    :param data: Сообщение протокола дельт (JSON или msgpack,
+    см. transfer_data.codec).
+    """
+    update = decode(data)
+    if update.get('v') != SCHEMA_VERSION:
+        await send_to_logs(
+            f"Сообщение {update.get('source')} от {sid} со схемой "
+            f"{update.get('v')} вместо {SCHEMA_VERSION} отклонено"
+        )
+        return
+    source = update['source']
+    # В удалениях и изменениях лига не передается, она берется
+    # из состояния до применения дельты
+    previous = leagues_by_id(state.sources.get(source))
+    if not state.apply(update):
+        await send_to_logs(
+            f"Пропуск дельты {source} seq={update['seq']} "
+            f"от {sid}, ожидание снимка"
+        )
+        return
+    for outbox in broadcast_targets(source):
+        outbox.put(('update', source), update['type'], update, data)
+    leagues = rooms.league_rooms(source)
+    if leagues:
+        for league, part in split_update(update, leagues, previous).items():
+            room = room_name(source, league)
+            room_message = rooms.room_message(update, league, part)
+            payload = encode(room_message)
+            for member in rooms.members.get(room, ()):
+                outboxes[member].put(
+                    ('update', room), room_message['type'], room_message,
+                    payload
+                )
+    if LEGACY_MESSAGES:
+        targets = [
+            outbox for sid, outbox in outboxes.items()
+            if sid not in delta_clients
+        ]
+        payload = encode(state.source_data(source)) if targets else None
+        for outbox in targets:
+            outbox.put(('message', source), 'message', payload=payload)
+
+
+async def receive_update(
+        sid: str,
+        message_type: str,
+        data: str | bytes
+) -> None:
+    """
+    Сообщение парсера, подключенного по Socket.IO (PARSER_BUS=socketio).
+    При работающей шине оно публикуется в нее, чтобы его получили
+    клиенты всех воркеров (в том числе этого), иначе рассылается сразу.
+
+    :param sid: Идентификатор сессии парсера.
+    :param message_type: 'snapshot' или 'delta'.
+    :param data: Сообщение протокола дельт.
+    """
+    if bus_task is not None:
+        await bus.publish(message_type, data)
+    else:
+        await relay_update(sid, data)
+
+
+@sio.on('snapshot')
+async def snapshot(sid: str, data: str | bytes):
+    """
+    Обработчик полного снимка источника от парсера.
+
+    :param sid: Идентификатор сессии парсера.
+    :param data: Снимок.
+    """
+    await receive_update(sid, 'snapshot', data)
+
+
+@sio.on('delta')
+async def delta(sid: str, data: str | bytes):
+    """
+    Обработчик дельты от парсера.
+
+    :param sid: Идентификатор сессии парсера.
+    :param data: Дельта.
+    """
+    await receive_update(sid, 'delta', data)
+
+
+def room_snapshot(room: str) -> dict | None:
+    """
+    Текущий снимок комнаты.
+
+    :param room: Комната `{букмекер}/{лига}` или `{букмекер}/*`.
+    :return: Сообщение snapshot или None, если данных источника еще нет.
+    """
+    source, league = parse_room(room)
+    if source not in state.sources:
+        return None
+    if league == ALL_LEAGUES:
+        return state.snapshot(source)
+    return rooms.room_snapshot(
+        source, league, state.sources[source]['epoch'],
+        state.source_data(source)[source].get(league, [])
+    )
+
+
+def mark_delta_client(sid: str) -> None:
+    """
+    Клиент работает по протоколу дельт: старое событие 'message'
+    ему больше не отправляется.
+
+    :param sid: Идентификатор сессии клиента.
+    """
+    if sid in delta_clients:
+        return
+    delta_clients.add(sid)
+    outbox = outboxes[sid]
+    outbox.retain({
+        stream for stream in outbox.pending if stream[0] != 'message'
+    })
+
+
+@sio.on('subscribe')
+async def subscribe(sid: str, names: str | list):
+    """
+    Подписка клиента на комнаты. После подписки клиент получает
+    снимок каждой комнаты и дальше только ее сообщения.
+
+    :param sid: Идентификатор сессии клиента.
+    :param names: Комната или список комнат, например
+    `akty.com/IPBL Pro Division` или `fb.com/*`.
+    :return: Все комнаты клиента (подтверждение).
+    """
+    mark_delta_client(sid)
+    for room in [names] if isinstance(names, str) else names:
+        try:
+            parse_room(room)
+        except ValueError as e:
+            await send_to_logs(f"Подписка {sid} отклонена: {e}")
+            continue
+        rooms.subscribe(sid, room)
+        outboxes[sid].mark_snapshot(update_stream(room))
+    # Сообщения, поставленные клиенту до подписки (пока он получал
+    # все), к его комнатам не относятся
+    subscribed = rooms.rooms_of(sid)
+    if subscribed:
+        outboxes[sid].retain({update_stream(room) for room in subscribed})
+    return subscribed
+
+
+@sio.on('unsubscribe')
+async def unsubscribe(sid: str, names: str | list | None = None):
+    """
+    Отписка клиента от комнат. Клиент без подписок снова получает
+    все сообщения.
+
+    :param sid: Идентификатор сессии клиента.
+    :param names: Комната, список комнат или None для всех.
+    :return: Оставшиеся комнаты клиента.
+    """
+    if names is None or isinstance(names, str):
+        names = [names]
+    for name in names:
+        rooms.unsubscribe(sid, name)
+    return rooms.rooms_of(sid)
+
+
+@sio.on('resync')
+async def resync(sid: str, source: str | None = None):
+    """
+    Запрос полного снимка клиентом, заметившим пропуск номера дельты.
+    Снимок встает в очередь клиента вместо ожидающих дельт потока.
+
+    :param sid: Идентификатор сессии клиента.
+    :param source: Букмекер, комната (`{букмекер}/{лига}`) или None
+    для всех источников.
+    """
+    mark_delta_client(sid)
+    sources = [source] if source else list(state.sources)
+    for name in sources:
+        outboxes[sid].mark_snapshot(update_stream(name))
+
+
+# Клиент Redis воркера (шина, история игр) и шина обновлений
+# парсеров; None без Redis
+redis_client = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+bus = RedisBus(redis_client) if redis_client else None
+# Задача чтения шины
+bus_task = None
+
+
+async def consume_bus() -> None:
+    """
+    Чтение обновлений парсеров из шины Redis и рассылка клиентам
+    этого воркера. Перед чтением новых записей состояние
+    восстанавливается из последних записей потока.
+    """
+    last_id, entries = await bus.history()
+    for message_type, data in entries:
+        if message_type == 'message':
+            continue
+        update = decode(data)
+        if update.get('v') == SCHEMA_VERSION:
+            # Дельты до первого снимка источника не применятся - это
+            # ожидаемо, клиентов еще нет
+            state.apply(update)
+    await send_to_logs(
+        f"Состояние восстановлено из шины: {len(entries)} записей, "
+        f"источники {list(state.sources)}"
+    )
+    while True:
+        try:
+            async for last_id, message_type, data in bus.listen(last_id):
+                if message_type == 'message':
+                    relay_message('bus', data)
+                else:
+                    await relay_update('bus', data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await send_to_logs(f"Ошибка чтения шины: {e}")
+            await asyncio.sleep(1)
+
+
+async def start_bus() -> None:
+    """
+    Запуск чтения шины при старте приложения.
+    """
+    global bus_task
+    if bus_task is None and bus is not None:
+        bus_task = asyncio.ensure_future(consume_bus())
+
+
+async def stop_bus() -> None:
+    """
+    Остановка чтения шины.
+    """
+    global bus_task
+    if bus_task is not None:
+        bus_task.cancel()
+        bus_task = None
+
+
+async def readiness() -> dict:
+    """
+    Готовность воркера принимать клиентов: Redis доступен, шина
+    читается. Без REDIS_URL (один процесс) воркер готов всегда.
+
+    :return: Состояние воркера, ключ 'ready' - итог проверки.
+    """
+    status = {
+        'worker': os.getpid(),
+        'clients': len(outboxes),
+        'sources': list(state.sources),
+        'redis': False,
+        'bus': bus_task is not None and not bus_task.done(),
+    }
+    if bus is None:
+        status['ready'] = True
+        return status
+    try:
+        status['redis'] = bool(await redis_client.ping())
+    except Exception as e:
+        await send_to_logs(f"Redis недоступен: {e}")
+    status['ready'] = status['redis'] and status['bus']
+    return status
+
 
+app = socketio.ASGIApp(sio, on_startup=start_bus, on_shutdown=stop_bus)
@@ -0,0 +1,78 @@
+"""
+Текущие данные букмекеров в Redis.
+
+Раньше оба парсера записывали свои данные в один ключ `akty_data` и
+каждую секунду затирали данные друг друга. Теперь данные хранятся в
+хэше STATE_KEY: у каждого букмекера свое поле, и парсер обновляет
+только его. Значение поля - `{'updated': время записи, 'data':
+{league: [game, ...]}}` в кодеке transfer_data.codec. Одна команда
+HGETALL возвращает согласованные данные всех букмекеров (load), а
+время записи показывает, насколько свежи данные каждого из них.
+
+Для внешних читателей, которые еще не перешли на хэш, можно включить
+запись старого ключа (STATE_LEGACY_KEY=akty_data): JSON
+`{bookmaker: {league: [game, ...]}}` последнего записавшего парсера.
+"""
+import os
+import json
+import time
+from transfer_data.codec import encode, decode
+
+STATE_KEY = os.getenv('STATE_KEY', 'odds_state')
+# Старый ключ с данными последнего парсера, по умолчанию не пишется
+# (устарел, будет удален)
+STATE_LEGACY_KEY = os.getenv('STATE_LEGACY_KEY', '')
+
+
+class RedisStateStore:
+    """
+    Данные букмекеров в хэше Redis, по полю на букмекера.
+    """
+
+    def __init__(
+            self,
+            redis_client,
+            key: str = STATE_KEY,
+            legacy_key: str = STATE_LEGACY_KEY
+    ):
+        """
+        :param redis_client: Асинхронный клиент Redis.
+        :param key: Ключ хэша.
+        :param legacy_key: Старый ключ или пустая строка.
+        """
+        self.redis_client = redis_client
+        self.key = key
+        self.legacy_key = legacy_key
+
+    async def save(
+            self,
+            data: dict
+    ) -> None:
+        """
+        Запись данных букмекеров. Поля других букмекеров не меняются.
+
+        :param data: `{bookmaker: {league: [game, ...]}}`.
+        """
+        now = time.time()
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hset(self.key, mapping={
+            source: encode({'updated': now, 'data': source_data})
+            for source, source_data in data.items()
+        })
+        if self.legacy_key:
+            pipe.set(self.legacy_key, json.dumps(data, ensure_ascii=False))
+        await pipe.execute()
+
+    async def load(self) -> dict:
+        """
+        Данные всех букмекеров одной командой HGETALL.
+
+        :return: `{bookmaker: {'updated': время записи, 'data':
+        {league: [game, ...]}}}`.
+        """
+        fields = await self.redis_client.hgetall(self.key)
+        return {
+            (source.decode('utf-8') if isinstance(source, bytes)
+             else source): decode(value)
+            for source, value in fields.items()
+        }
@@ -0,0 +1,99 @@
+"""
+Настройки транспорта Socket.IO для сервера и парсеров.
+
+По умолчанию соединение сразу открывается по WebSocket, а HTTP
+long-polling остается запасным вариантом (прокси без поддержки
+WebSocket). Ответы long-polling сжимаются, если больше
+SOCKET_COMPRESSION_THRESHOLD байт; кадры WebSocket сжимаются
+расширением permessage-deflate на стороне uvicorn (SOCKET_WS_DEFLATE).
+SOCKET_SERIALIZER=msgpack переводит пакеты Socket.IO в двоичный
+формат msgpack; сервер и все клиенты должны использовать один
+сериализатор.
+
+Запросы long-polling одной сессии должны попадать в один процесс.
+Воркеры uvicorn делят один порт без привязки клиентов, поэтому при
+WEB_WORKERS > 1 по умолчанию остается только WebSocket (long-polling
+возможен за балансировщиком с sticky-сессиями, см. SOCKET_TRANSPORTS).
+"""
+import os
+
+# Количество воркеров uvicorn (app/main.py)
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', 1))
+# Допустимые транспорты в порядке предпочтения
+SOCKET_TRANSPORTS = os.getenv(
+    'SOCKET_TRANSPORTS',
+    'websocket,polling' if WEB_WORKERS == 1 else 'websocket'
+).split(',')
+# 'default' - JSON-пакеты, 'msgpack' - двоичные пакеты
+SOCKET_SERIALIZER = os.getenv('SOCKET_SERIALIZER', 'default')
+# Минимальный размер ответа long-polling для сжатия, байты
+SOCKET_COMPRESSION_THRESHOLD = int(
+    os.getenv('SOCKET_COMPRESSION_THRESHOLD', 1024)
+)
+# Сжатие кадров WebSocket (permessage-deflate)
+SOCKET_WS_DEFLATE = os.getenv('SOCKET_WS_DEFLATE', '1') == '1'
+# Максимальный размер сообщения, байты
+SOCKET_MAX_BUFFER = int(os.getenv('SOCKET_MAX_BUFFER', 10 * 1024 * 1024))
+
+
+def server_options(
+        transports: list = None,
+        serializer: str = SOCKET_SERIALIZER
+) -> dict:
+    """
+    Параметры транспорта для `socketio.AsyncServer`.
+
+    :param transports: Допустимые транспорты (по умолчанию SOCKET_TRANSPORTS).
+    :param serializer: Сериализатор пакетов.
+    """
+    transports = transports or SOCKET_TRANSPORTS
+    return {
+        'transports': transports,
+        # Переход с long-polling на WebSocket для клиентов, которые
+        # начинают с long-polling (например, браузеры за прокси)
+        'allow_upgrades': 'websocket' in transports,
+        'http_compression': True,
+        'compression_threshold': SOCKET_COMPRESSION_THRESHOLD,
+        'serializer': serializer,
+        'max_http_buffer_size': SOCKET_MAX_BUFFER,
+    }
+
+
+def client_options(serializer: str = SOCKET_SERIALIZER) -> dict:
+    """
+    Параметры для `socketio.AsyncSimpleClient` / `socketio.AsyncClient`.
+
+    :param serializer: Сериализатор пакетов (как на сервере).
+    """
+    options = {'serializer': serializer}
+    if SOCKET_WS_DEFLATE:
+        # Клиент aiohttp сам не запрашивает permessage-deflate
+        options['websocket_extra_options'] = {'compress': 15}
+    return options
+
+
+async def connect_client(
+        sio,
+        url: str,
+        auth: dict,
+        transports: list = None
+) -> str:
+    """
+    Подключение клиента сначала по WebSocket, а при ошибке - по
+    long-polling (engineio сам не переключается на следующий транспорт).
+
+    :param sio: Клиент `socketio.AsyncSimpleClient`.
+    :param url: Адрес сервера.
+    :param auth: Данные авторизации.
+    :param transports: Транспорты в порядке предпочтения.
+    :return: Использованный транспорт.
+    :raises Exception: Ошибка подключения последним транспортом.
+    """
+    transports = transports or SOCKET_TRANSPORTS
+    for index, transport in enumerate(transports):
+        try:
+            await sio.connect(url, auth=auth, transports=[transport])
+            return transport
+        except Exception:
+            if index == len(transports) - 1:
+                raise